@@ -1,22 +1,91 @@
 let allNewsItems = [];
 let filteredNewsItems = [];
-let currentOffset = 0;
+let nextCursor = null;
+let nextSnapshotPage = null;
 let isLoading = false;
 let hasMore = true;
 let totalItems = 0;
 let currentCategory = 'all';
+// Topic or group the feed is narrowed to (server-side filter)
+let currentTopic = null;
+let currentGroup = null;
+let newsStream = null;
 
 // API Configuration
 const API_URL = 'https://news-agent-service.wonderfulsmoke-89cc5644.westus2.azurecontainerapps.io/api/news';
 const ITEMS_PER_PAGE = 50;
+// Where the agent's static feed snapshot (FEED_EXPORT_DIR) is published,
+// e.g. 'feed' next to this page; null loads every page from the API
+const SNAPSHOT_URL = null;
 
 // Initialize the app
 document.addEventListener('DOMContentLoaded', () => {
     loadNewsItems(true);
+    connectNewsStream();
+    loadFacets();
     setupEventListeners();
     setupModalHandlers();
 });
 
+// Newly saved stories are pushed by the API (server-sent events), no need
+// to reload the feed to find them. The browser reconnects on its own and
+// the API replays what was missed in between.
+function connectNewsStream() {
+    if (!window.EventSource) {
+        return;
+    }
+    if (newsStream) {
+        newsStream.close();
+    }
+    newsStream = new EventSource(`${API_URL}/stream?category=${currentCategory}`);
+    newsStream.addEventListener('story', (e) => {
+        const item = JSON.parse(e.data);
+        if (allNewsItems.some(existing => existing.id === item.id)) {
+            return;
+        }
+        // The stream is filtered by category only
+        if ((currentTopic && !(item.topic || []).includes(currentTopic)) ||
+            (currentGroup && !(item.groups || []).includes(currentGroup))) {
+            return;
+        }
+        allNewsItems = [item, ...allNewsItems];
+        totalItems += 1;
+        filterAndDisplayNews();
+    });
+}
+
+// Topics and groups with their story counts, most stories first
+async function loadFacets() {
+    try {
+        const facets = await fetchJson(`${API_URL}/facets`);
+        const select = document.getElementById('facetSelect');
+        [['topic', 'Topics', facets.topics], ['group', 'Groups', facets.groups]].forEach(([kind, label, values]) => {
+            if (!values || values.length === 0) {
+                return;
+            }
+            const optgroup = document.createElement('optgroup');
+            optgroup.label = label;
+            values.forEach(value => {
+                optgroup.appendChild(new Option(`${value._id} (${value.count})`, `${kind}:${value._id}`));
+            });
+            select.appendChild(optgroup);
+        });
+    } catch (error) {
+        console.warn('Failed to load topics and groups:', error);
+    }
+}
+
+function facetParams() {
+    let params = '';
+    if (currentTopic) {
+        params += `&topic=${encodeURIComponent(currentTopic)}`;
+    }
+    if (currentGroup) {
+        params += `&group=${encodeURIComponent(currentGroup)}`;
+    }
+    return params;
+}
+
 // Setup event listeners
 function setupEventListeners() {
     // Tab buttons
@@ -27,6 +96,7 @@ function setupEventListeners() {
             btn.classList.add('active');
             currentCategory = btn.dataset.category;
             resetAndLoadNews();
+            connectNewsStream();
         });
     });
 
@@ -36,6 +106,16 @@ function setupEventListeners() {
         filterAndDisplayNews();
     });
 
+    // Topic / group filter: only that feed is fetched
+    const facetSelect = document.getElementById('facetSelect');
+    facetSelect.addEventListener('change', () => {
+        const [kind, ...rest] = facetSelect.value.split(':');
+        const value = rest.join(':') || null;
+        currentTopic = kind === 'topic' ? value : null;
+        currentGroup = kind === 'group' ? value : null;
+        resetAndLoadNews();
+    });
+
     // Filter buttons
     const filterButtons = document.querySelectorAll('.filter-btn');
     filterButtons.forEach(btn => {
@@ -62,7 +142,8 @@ function setupEventListeners() {
 // Reset state and load news
 function resetAndLoadNews() {
     allNewsItems = [];
-    currentOffset = 0;
+    nextCursor = null;
+    nextSnapshotPage = null;
     hasMore = true;
     document.getElementById('newsContainer').innerHTML = '';
     loadNewsItems(true);
@@ -159,6 +240,52 @@ function openArticleModal(item) {
     document.body.style.overflow = 'hidden';
 }
 
+async function fetchJson(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    return response.json();
+}
+
+// Page of the static snapshot, same JSON as the API plus the path of the
+// next snapshot page. Past the last one the API continues from next_cursor.
+async function fetchSnapshotPage(isInitialLoad) {
+    let path = nextSnapshotPage;
+    if (isInitialLoad) {
+        const manifest = await fetchJson(`${SNAPSHOT_URL}/manifest.json`);
+        // Topic snapshots span all categories, groups have none
+        const feed = currentGroup ? null
+            : currentTopic ? (currentCategory === 'all' ? manifest.topics[currentTopic] : null)
+            : manifest.feeds[currentCategory];
+        if (manifest.page_size !== ITEMS_PER_PAGE || !feed) {
+            return null;
+        }
+        path = feed.pages[0];
+    }
+    const data = await fetchJson(`${SNAPSHOT_URL}/${path}`);
+    nextSnapshotPage = data.next_page || null;
+    return data;
+}
+
+async function fetchNewsPage(isInitialLoad) {
+    if (SNAPSHOT_URL && (isInitialLoad || nextSnapshotPage)) {
+        try {
+            const data = await fetchSnapshotPage(isInitialLoad);
+            if (data) {
+                return data;
+            }
+        } catch (error) {
+            console.warn('Snapshot unavailable, loading from the API:', error);
+        }
+        nextSnapshotPage = null;
+    }
+
+    // Keyset pagination: continue after the last item of the previous page
+    const cursorParam = !isInitialLoad && nextCursor ? `&cursor=${encodeURIComponent(nextCursor)}` : '';
+    return fetchJson(`${API_URL}?limit=${ITEMS_PER_PAGE}&category=${currentCategory}${facetParams()}${cursorParam}`);
+}
+
 // Load news items from API with pagination
 async function loadNewsItems(isInitialLoad = false) {
     if (isLoading || (!hasMore && !isInitialLoad)) {
@@ -177,25 +304,19 @@ async function loadNewsItems(isInitialLoad = false) {
     }
 
     try {
-        // Add reset parameter for initial load to clear the deduplication cache
-        const resetParam = isInitialLoad ? '&reset=true' : '';
-        const url = `${API_URL}?limit=${ITEMS_PER_PAGE}&offset=${currentOffset}&category=${currentCategory}${resetParam}`;
-        const response = await fetch(url);
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
+        const data = await fetchNewsPage(isInitialLoad);
         const newItems = data.news_items || [];
 
         // Append new items to existing ones
         allNewsItems = [...allNewsItems, ...newItems];
 
         // Update pagination state
-        currentOffset += newItems.length;
-        hasMore = data.has_more || false;
-        totalItems = data.total || allNewsItems.length;
+        nextCursor = data.next_cursor || null;
+        hasMore = (data.has_more && nextCursor !== null) || false;
+        // Total is only reported with the first page
+        if (isInitialLoad) {
+            totalItems = data.total || allNewsItems.length;
+        }
 
         // Filter and display
         filterAndDisplayNews();
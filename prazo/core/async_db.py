@@ -0,0 +1,238 @@
+"""
+Async counterparts of the `prazo.core.db` operations, for code running on an
+event loop (agent tools, graph nodes, the ingestion pipeline) so database
+round-trips do not block concurrent work.
+
+Documents, story keys and the URL filter are shared with `prazo.core.db`,
+only the I/O differs.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Dict, List, Set
+
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError
+
+from prazo.core import db, indexes, stats
+from prazo.core.config import config
+from prazo.core.feed_version import FEED_VERSION_ID, feed_version_bump
+from prazo.core.logger import logger
+from prazo.schemas import NewsItem
+
+# Async clients are bound to the event loop they were first used on, and the
+# ingestion pipeline runs its own loop, so there is one client per loop
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_collection() -> AsyncCollection:
+    """News items collection for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncMongoClient(config.MONGODB_URI)
+    return client[config.MONGODB_DB][config.MONGODB_COLLECTION]
+
+
+async def aresolve_story_keys(docs: List[dict]) -> List[str]:
+    """Story key per document, see `db.assign_story_keys`."""
+    query = db.story_keys_query(docs)
+    existing_docs = []
+    if query:
+        existing_docs = (
+            await get_collection()
+            .find(query, db.STORY_KEY_PROJECTION)
+            .to_list()
+        )
+    return db.assign_story_keys(docs, existing_docs)
+
+
+async def asave_news_items(news_items: List[NewsItem]) -> int:
+    """
+    Save multiple news items to the database, see `db.save_news_items`.
+
+    Args:
+        news_items: List of NewsItem objects to save
+
+    Returns:
+        int: Number of stories inserted or updated
+    """
+    if not news_items:
+        logger.info("No news items to save")
+        return 0
+
+    try:
+        docs = [db.news_item_doc(item) for item in news_items]
+        keys = await aresolve_story_keys(docs)
+        stories = db.group_stories(docs, keys)
+        operations = [
+            db.build_story_upsert(key, story_docs)
+            for key, story_docs in stories.items()
+        ]
+        existing = {
+            doc["story_key"]: doc
+            for doc in await get_collection()
+            .find({"story_key": {"$in": list(stories)}}, db.STATS_PROJECTION)
+            .to_list()
+        }
+        result = await get_collection().bulk_write(operations, ordered=False)
+        db.add_to_url_filter(
+            (url for doc in docs for url in doc.get("sources", [])),
+            persist=False,
+        )
+        await asyncio.to_thread(db.save_url_filter)
+        await aupdate_stats(
+            stories,
+            existing,
+            db.inserted_story_keys(stories, result.upserted_ids),
+        )
+        saved = result.upserted_count + result.modified_count
+        if await amark_duplicates(db.saved_story_keys(keys)) or saved:
+            await ainvalidate_feed_cache(
+                db.newest_story_id(result.upserted_ids)
+            )
+        logger.info(
+            f"Saved {len(docs)} news items as {len(operations)} stories "
+            f"({result.upserted_count} new, {result.modified_count} updated)"
+        )
+        return saved
+    except BulkWriteError as e:
+        details = e.details
+        logger.error(
+            f"Error saving some news items to database: {details.get('writeErrors')}"
+        )
+        # Duplicates were not marked: no watermark, the new stories wait
+        # for a later save's
+        await ainvalidate_feed_cache()
+        return details.get("nUpserted", 0) + details.get("nModified", 0)
+    except Exception as e:
+        logger.error(f"Error saving news items to database: {e}")
+        return 0
+
+
+async def aupdate_stats(
+    stories: Dict[str, List[dict]],
+    existing: Dict[str, dict],
+    inserted: Set[str],
+):
+    """Apply the counter deltas of a save, see `db.update_stats`."""
+    await aupdate_counters(*stats.save_deltas(stories, existing, inserted))
+
+
+async def aupdate_counters(deltas: stats.Counts, new_stories: int = 0):
+    try:
+        operations = stats.counter_updates(deltas, new_stories)
+        if operations:
+            await get_collection().database[stats.STATS_COLLECTION].bulk_write(
+                operations, ordered=False
+            )
+    except Exception as e:
+        logger.error(f"Error updating stats counters: {e}")
+
+
+async def ainvalidate_feed_cache(last_story_id: Any = None):
+    """Bump the feed version, see `db.invalidate_feed_cache`."""
+    try:
+        await get_collection().database[indexes.META_COLLECTION].update_one(
+            {"_id": FEED_VERSION_ID},
+            feed_version_bump(last_story_id),
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Error bumping the feed version: {e}")
+
+
+async def amark_duplicates(keys: List[str]) -> int:
+    """
+    Mark duplicate stories at write time, see `db.mark_duplicates`.
+
+    Returns:
+        int: Number of stories whose mark changed
+    """
+    if not keys:
+        return 0
+    try:
+        collection = get_collection()
+        saved = await collection.find(
+            {"story_key": {"$in": keys}}, {"sources": 1}
+        ).to_list()
+        query = db.story_keys_query(saved)
+        if query is None:
+            return 0
+        related = await collection.find(
+            query, db.DUPLICATE_PROJECTION
+        ).to_list()
+        related += await collection.find(
+            {"duplicate_of": {"$in": [doc["story_key"] for doc in related]}},
+            db.DUPLICATE_PROJECTION,
+        ).to_list()
+        marks = db.duplicate_marks(related)
+        if marks:
+            await collection.bulk_write(db.mark_updates(marks), ordered=False)
+            await aupdate_counters(stats.mark_deltas(related, marks))
+            logger.info(f"Updated duplicate marks of {len(marks)} stories")
+        return len(marks)
+    except Exception as e:
+        logger.error(f"Error marking duplicate stories: {e}")
+        return 0
+
+
+async def acheck_urls_exist(urls: List[str]) -> Set[str]:
+    """
+    Check which URLs from the provided list already exist in the database,
+    see `db.check_urls_exist`.
+
+    Args:
+        urls: List of URLs to check
+
+    Returns:
+        Set[str]: Set of URLs (as given) that exist in the database
+    """
+    if not urls:
+        return set()
+
+    try:
+        canonical_urls, candidates = db.url_check_candidates(urls)
+        if not candidates:
+            return set()
+
+        existing_docs = (
+            await get_collection()
+            .find({"sources": {"$in": candidates}}, {"sources": 1, "_id": 0})
+            .to_list()
+        )
+        return db.matching_input_urls(canonical_urls, existing_docs)
+    except Exception as e:
+        logger.error(f"Error checking URLs in database: {e}")
+        return set()
+
+
+async def aget_all_existing_urls() -> Set[str]:
+    """
+    Get all unique URLs that exist in the database.
+
+    Returns:
+        Set[str]: Set of all existing URLs
+    """
+    try:
+        all_urls = set()
+        async for doc in get_collection().find(
+            {}, {"sources": 1, "_id": 0}, batch_size=1000
+        ):
+            all_urls.update(doc.get("sources", []))
+
+        logger.info(f"Found {len(all_urls)} unique URLs in database")
+        return all_urls
+    except Exception as e:
+        logger.error(f"Error getting all URLs from database: {e}")
+        return set()
+
+
+async def ainitialize_database():
+    """
+    Initialize the database, see `db.initialize_database`: indexes are
+    planned and reported in one place, on the sync client, off the event
+    loop. Should be called once at application startup.
+    """
+    await asyncio.to_thread(db.initialize_database)
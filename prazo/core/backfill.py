@@ -0,0 +1,18 @@
+"""
+Data backfills for documents saved by older versions of the agent.
+
+Usage: python -m prazo.core.backfill
+"""
+
+from prazo.core.db import (
+    backfill_duplicates,
+    backfill_story_keys,
+    initialize_database,
+    reconcile_news_stats,
+)
+
+if __name__ == "__main__":
+    initialize_database()
+    backfill_story_keys()
+    backfill_duplicates()
+    reconcile_news_stats()
@@ -0,0 +1,367 @@
+"""
+Push of newly saved stories to connected clients (`/api/news/stream`).
+
+One reader per API process waits for the agent to save (the feed version
+is bumped) and then reads the canonical stories past the newest `_id` it has
+seen. Each story is encoded once and fanned out to every subscriber's
+queue, so read load does not grow with the number of open clients.
+
+The reader is woken by a change stream on the feed version document, or
+polls the version where change streams are unavailable (they need a replica
+set). A save inserts its stories, marks their duplicates and only then
+bumps the version with the newest `_id` it inserted (the watermark). Stories
+are read up to the watermark, never past it: a later save's stories,
+inserted but not yet marked, wait for its own bump, so only canonical
+stories are pushed. This relies on saves not overlapping (the agent saves
+once per run).
+
+Kept free of config imports so the API service can use it too.
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Set
+
+import pymongo
+from pymongo.errors import OperationFailure
+
+from prazo.core.feed_version import (
+    FEED_VERSION_ID,
+    LAST_STORY_FIELD,
+    FeedVersion,
+)
+from prazo.core.indexes import CANONICAL
+
+logger = logging.getLogger(__name__)
+
+# Stories read per query, and replayed at most to a reconnecting client
+STREAM_BATCH = 100
+# Seconds between comment lines keeping idle connections (and proxies) open
+HEARTBEAT_INTERVAL = 15.0
+# Events a subscriber may fall behind before it is dropped (the client
+# reconnects and is replayed what it missed)
+SUBSCRIBER_QUEUE_SIZE = 256
+# Seconds before retrying after a failed read
+RETRY_DELAY = 5.0
+
+SSE_HEARTBEAT = b": ping\n\n"
+WATERMARK_PROJECTION = {LAST_STORY_FIELD: 1}
+VERSION_CHANGES = [{"$match": {"documentKey._id": FEED_VERSION_ID}}]
+
+
+@dataclass
+class StoryEvent:
+    """A saved story, encoded once for all subscribers"""
+
+    id: Any
+    tool_source: List[str]
+    data: bytes
+
+    def sse(self) -> bytes:
+        return sse_event(self.data, event="story", event_id=str(self.id))
+
+
+def sse_event(
+    data: bytes, event: Optional[str] = None, event_id: Optional[str] = None
+) -> bytes:
+    """Server-sent event frame of a one-line (e.g. compact JSON) payload."""
+    frame = b""
+    if event_id is not None:
+        frame += f"id: {event_id}\n".encode()
+    if event is not None:
+        frame += f"event: {event}\n".encode()
+    return frame + b"data: " + data + b"\n\n"
+
+
+def new_stories_query(last_id: Any, up_to: Any) -> dict:
+    """Canonical stories after `last_id`, up to the watermark `up_to`."""
+    query = {**CANONICAL, "_id": {"$lte": up_to}}
+    if last_id is not None:
+        query["_id"]["$gt"] = last_id
+    return query
+
+
+def _watermark(doc: Optional[dict]) -> Any:
+    return (doc or {}).get(LAST_STORY_FIELD)
+
+
+class ChangeFeed:
+    """
+    Fan-out of newly saved stories to subscriber queues, read by one
+    background thread (for the Flask API).
+
+    Args:
+        collection: News items collection
+        feed_version: Version of the feed, its collection is watched
+        projection: Fields read per story
+        encode: Encodes a story document for the event payload
+    """
+
+    def __init__(
+        self,
+        collection: pymongo.collection.Collection,
+        feed_version: FeedVersion,
+        projection: dict,
+        encode: Callable[[dict], bytes],
+    ):
+        self.collection = collection
+        self.feed_version = feed_version
+        self.projection = projection
+        self.encode = encode
+        self.last_id = None
+        self._subscribers: Set[Any] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def event(self, doc: dict) -> StoryEvent:
+        return StoryEvent(
+            id=doc["_id"],
+            tool_source=doc.get("tool_source") or [],
+            data=self.encode(doc),
+        )
+
+    def _find_new(self, after_id: Any, up_to: Any):
+        return (
+            self.collection.find(
+                new_stories_query(after_id, up_to), self.projection
+            )
+            .sort("_id", pymongo.ASCENDING)
+            .limit(STREAM_BATCH)
+        )
+
+    def watermark(self) -> Any:
+        """Newest story `_id` whose duplicates are marked (`None` if unset)."""
+        return _watermark(
+            self.feed_version.meta_collection.find_one(
+                {"_id": FEED_VERSION_ID}, WATERMARK_PROJECTION
+            )
+        )
+
+    def _offer(self, subscriber, event: StoryEvent) -> bool:
+        try:
+            subscriber.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def _close(self, subscriber):
+        # Make room for the end-of-stream marker
+        with subscriber.mutex:
+            subscriber.queue.clear()
+        subscriber.put_nowait(None)
+
+    def publish(self, events: List[StoryEvent]):
+        """Hand events to every subscriber, dropping those falling behind."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if not all(self._offer(subscriber, event) for event in events):
+                logger.warning("Dropping a stream subscriber falling behind")
+                self.unsubscribe(subscriber)
+                self._close(subscriber)
+
+    def subscribe(self) -> queue.Queue:
+        """Queue of `StoryEvent`s (`None` once dropped), starts the reader."""
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="change-feed", daemon=True
+                )
+                self._thread.start()
+        return subscriber
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def close_subscribers(self):
+        """End every subscriber's stream (e.g. on shutdown)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            self._close(subscriber)
+
+    def missed(self, after_id: Any) -> List[StoryEvent]:
+        """Stories saved after `after_id`, replayed to a reconnecting client."""
+        up_to = self.watermark()
+        if up_to is None:
+            return []
+        return [self.event(doc) for doc in self._find_new(after_id, up_to)]
+
+    def read_new(self):
+        """Publish the stories saved since the last read, up to the watermark."""
+        up_to = self.watermark()
+        if up_to is None:
+            return
+        while True:
+            events = [
+                self.event(doc) for doc in self._find_new(self.last_id, up_to)
+            ]
+            if events:
+                self.last_id = events[-1].id
+                self.publish(events)
+            if len(events) < STREAM_BATCH:
+                return
+
+    def _changes(self) -> Iterator[None]:
+        """Yields whenever the feed version may have changed."""
+        try:
+            with self.feed_version.meta_collection.watch(
+                VERSION_CHANGES
+            ) as stream:
+                for _ in stream:
+                    yield
+        except OperationFailure as e:
+            logger.info(
+                f"Change streams unavailable ({e}), polling the feed version"
+            )
+        version = self.feed_version.current()
+        while True:
+            time.sleep(self.feed_version.poll_interval)
+            current = self.feed_version.current()
+            if current != version:
+                version = current
+                yield
+
+    @staticmethod
+    def _start_id(newest: Optional[dict], watermark: Any) -> Any:
+        # Stories up to the watermark were pushed before this reader started;
+        # without one (saved before watermarks), everything stored was
+        if watermark is not None:
+            return watermark
+        return newest["_id"] if newest else None
+
+    def _run(self):
+        while True:
+            try:
+                if self.last_id is None:
+                    self.last_id = self._start_id(
+                        self.collection.find_one(
+                            {}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)]
+                        ),
+                        self.watermark(),
+                    )
+                # Catch up after a failure
+                self.read_new()
+                for _ in self._changes():
+                    self.read_new()
+            except Exception as e:
+                logger.error(f"Change feed failed, retrying: {e}")
+                time.sleep(RETRY_DELAY)
+
+
+class AsyncChangeFeed(ChangeFeed):
+    """
+    `ChangeFeed` read through an async collection (`AsyncMongoClient`) by
+    a task of the event loop: `start` it on startup, `stop` it on cleanup.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task: Optional[asyncio.Task] = None
+
+    def _offer(self, subscriber, event: StoryEvent) -> bool:
+        try:
+            subscriber.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def _close(self, subscriber):
+        while not subscriber.empty():
+            subscriber.get_nowait()
+        subscriber.put_nowait(None)
+
+    def subscribe(self) -> asyncio.Queue:
+        subscriber = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._arun())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def awatermark(self) -> Any:
+        return _watermark(
+            await self.feed_version.meta_collection.find_one(
+                {"_id": FEED_VERSION_ID}, WATERMARK_PROJECTION
+            )
+        )
+
+    async def _afind_new(self, after_id: Any, up_to: Any) -> List[StoryEvent]:
+        docs = await self._find_new(after_id, up_to).to_list()
+        return [self.event(doc) for doc in docs]
+
+    async def amissed(self, after_id: Any) -> List[StoryEvent]:
+        up_to = await self.awatermark()
+        if up_to is None:
+            return []
+        return await self._afind_new(after_id, up_to)
+
+    async def aread_new(self):
+        up_to = await self.awatermark()
+        if up_to is None:
+            return
+        while True:
+            events = await self._afind_new(self.last_id, up_to)
+            if events:
+                self.last_id = events[-1].id
+                self.publish(events)
+            if len(events) < STREAM_BATCH:
+                return
+
+    async def _achanges(self):
+        try:
+            async with await self.feed_version.meta_collection.watch(
+                VERSION_CHANGES
+            ) as stream:
+                async for _ in stream:
+                    yield
+        except OperationFailure as e:
+            logger.info(
+                f"Change streams unavailable ({e}), polling the feed version"
+            )
+        version = await self.feed_version.acurrent()
+        while True:
+            await asyncio.sleep(self.feed_version.poll_interval)
+            current = await self.feed_version.acurrent()
+            if current != version:
+                version = current
+                yield
+
+    async def _arun(self):
+        while True:
+            try:
+                if self.last_id is None:
+                    self.last_id = self._start_id(
+                        await self.collection.find_one(
+                            {}, {"_id": 1}, sort=[("_id", pymongo.DESCENDING)]
+                        ),
+                        await self.awatermark(),
+                    )
+                await self.aread_new()
+                async for _ in self._achanges():
+                    await self.aread_new()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Change feed failed, retrying: {e}")
+                await asyncio.sleep(RETRY_DELAY)
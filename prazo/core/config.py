@@ -29,6 +29,36 @@ class Config(BaseModel):
     MONGODB_COLLECTION: Optional[str] = os.getenv(
         "MONGODB_COLLECTION", "news_items"
     )
+    SUMMARY_MODEL: str = os.getenv("SUMMARY_MODEL", "gpt-4o-mini")
+    SUMMARY_MAX_CONCURRENCY: int = int(
+        os.getenv("SUMMARY_MAX_CONCURRENCY", "8")
+    )
+    # Number of short articles packed into a single summarisation prompt
+    SUMMARY_PACK_SIZE: int = int(os.getenv("SUMMARY_PACK_SIZE", "4"))
+    SUMMARY_PACK_MAX_CHARS: int = int(
+        os.getenv("SUMMARY_PACK_MAX_CHARS", "4000")
+    )
+    # Max LLM tokens spent on summaries per crawl (unset = unlimited)
+    SUMMARY_TOKEN_BUDGET: Optional[int] = (
+        int(os.getenv("SUMMARY_TOKEN_BUDGET"))
+        if os.getenv("SUMMARY_TOKEN_BUDGET")
+        else None
+    )
+    # On-disk copy of the URL bloom filter, for fast warm starts
+    URL_FILTER_FILE: str = os.getenv("URL_FILTER_FILE", ".cache/url_filter.bin")
+    URL_FILTER_CAPACITY: int = int(os.getenv("URL_FILTER_CAPACITY", "1000000"))
+    URL_FILTER_ERROR_RATE: float = float(
+        os.getenv("URL_FILTER_ERROR_RATE", "0.001")
+    )
+    # Hours between full recomputations of the incrementally kept stats
+    STATS_RECONCILE_HOURS: float = float(
+        os.getenv("STATS_RECONCILE_HOURS", "24")
+    )
+    # Static feed snapshot written after each run (unset = not exported),
+    # see `prazo.core.feed_export`
+    FEED_EXPORT_DIR: Optional[str] = os.getenv("FEED_EXPORT_DIR")
+    FEED_EXPORT_PAGES: int = int(os.getenv("FEED_EXPORT_PAGES", "3"))
+    FEED_EXPORT_PAGE_SIZE: int = int(os.getenv("FEED_EXPORT_PAGE_SIZE", "50"))
     TOPICS_FILE: Optional[str] = "prazo/core/topics.yaml"
     SOURCES_FILE: Optional[str] = "prazo/core/sources.yaml"
 
@@ -1,69 +1,472 @@
-from typing import List, Set
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import pymongo
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
 from prazo.core.config import config
+from prazo.core.feed_version import bump_feed_version
+from prazo.core.indexes import (
+    META_COLLECTION,
+    ensure_indexes,
+    log_index_report,
+)
 from prazo.core.logger import logger
-from prazo.schemas import NewsItem
+from prazo.core.stats import (
+    COUNTED_FIELDS,
+    FACET_FIELDS,
+    STATS_COLLECTION,
+    Counts,
+    counter_updates,
+    ensure_stats_indexes,
+    last_reconciled,
+    mark_deltas,
+    reconcile_stats,
+    save_deltas,
+)
+from prazo.core.vector_index import pack_embedding
+from prazo.schemas import FeedState, NewsItem
+from prazo.utils.bloom import BloomFilter
+from prazo.utils.urls import canonicalize_url, canonicalize_urls, story_key
 
 # Initialize MongoDB connection
 client = pymongo.MongoClient(config.MONGODB_URI)
 db = client[config.MONGODB_DB]
 collection = db[config.MONGODB_COLLECTION]
+# HTTP validators (ETag / Last-Modified) of polled feeds, keyed by feed URL
+feed_state_collection = db["feed_state"]
+# Schema bookkeeping (applied index version, feed version, ...)
+meta_collection = db[META_COLLECTION]
+# Counters behind the API stats, see `prazo.core.stats`
+stats_collection = db[STATS_COLLECTION]
+
+# List fields merged (as sets) when the same story is saved again
+MERGED_LIST_FIELDS = ["sources", "topic", "groups", "tool_source"]
+
+STORY_KEY_PROJECTION = {"sources": 1, "story_key": 1, "_id": 0}
+STATS_PROJECTION = {
+    field: 1 for field in COUNTED_FIELDS + ["story_key", "duplicate_of"]
+}
+# With the facets, counted only while the story is canonical
+DUPLICATE_PROJECTION = {
+    field: 1
+    for field in ["sources", "story_key", "created_at", "duplicate_of"]
+    + FACET_FIELDS
+}
+
+# In-process filter of stored source URLs, see `load_url_filter`. While
+# unset, every existence check goes to the database.
+url_filter: Optional[BloomFilter] = None
+url_filter_lock = threading.Lock()
+# Stories are stamped with their creation time rather than their save time,
+# so a warm start re-reads stories updated shortly before the last sync
+URL_FILTER_CATCH_UP = timedelta(days=1)
+
+
+def story_keys_query(docs: List[dict]) -> Optional[dict]:
+    """
+    Query for saved stories sharing a source URL with `docs`: documents
+    about to be saved, or stories just saved (duplicate marking).
+    """
+    all_urls = list({url for doc in docs for url in doc.get("sources", [])})
+    if not all_urls:
+        return None
+    return {"sources": {"$in": all_urls}, "story_key": {"$exists": True}}
+
+
+def assign_story_keys(
+    docs: List[dict], existing_docs: Iterable[dict]
+) -> List[Optional[str]]:
+    """
+    Find the story key of each document.
+
+    A document sharing a source URL with an already saved story (or with an
+    earlier document of the same batch) gets that story's key, otherwise the
+    key of its own canonical primary source URL.
+
+    Args:
+        docs: News item documents to be saved
+        existing_docs: Saved stories matching `story_keys_query(docs)`
+
+    Returns:
+        List[Optional[str]]: Story key per document
+    """
+    url_keys: Dict[str, str] = {}
+    for doc in existing_docs:
+        for url in doc.get("sources", []):
+            url_keys.setdefault(url, doc["story_key"])
+
+    keys = []
+    for doc in docs:
+        sources = doc.get("sources", [])
+        key = next((url_keys[url] for url in sources if url in url_keys), None)
+        if key is None:
+            key = story_key(sources, doc.get("title"))
+        for url in sources:
+            url_keys.setdefault(url, key)
+        keys.append(key)
+    return keys
+
+
+def resolve_story_keys(docs: List[dict]) -> List[Optional[str]]:
+    """Story key per document, see `assign_story_keys`."""
+    query = story_keys_query(docs)
+    existing_docs = (
+        collection.find(query, STORY_KEY_PROJECTION) if query else []
+    )
+    return assign_story_keys(docs, existing_docs)
+
+
+def news_item_doc(item: NewsItem) -> dict:
+    """Document fields of a news item, with its packed embedding."""
+    return {**item.model_dump(), "embedding": pack_embedding(item.embedding)}
+
+
+def build_story_upsert(key: str, docs: List[dict]) -> UpdateOne:
+    """
+    Upsert of one story: the first version's title/summary (and embedding)
+    are kept, list fields are merged and the earliest `created_at` wins.
+    """
+    first = docs[0]
+    inserted = {
+        "title": first["title"],
+        "summary": first["summary"],
+        "published_date": first["published_date"],
+    }
+    embedding = next(
+        (doc["embedding"] for doc in docs if doc.get("embedding") is not None),
+        None,
+    )
+    if embedding is not None:
+        inserted["embedding"] = embedding
+    return UpdateOne(
+        {"story_key": key},
+        {
+            "$setOnInsert": inserted,
+            "$addToSet": {
+                field: {
+                    "$each": list(
+                        dict.fromkeys(
+                            value
+                            for doc in docs
+                            for value in doc.get(field, [])
+                        )
+                    )
+                }
+                for field in MERGED_LIST_FIELDS
+            },
+            "$min": {"created_at": min(doc["created_at"] for doc in docs)},
+            "$max": {"updated_at": max(doc["updated_at"] for doc in docs)},
+        },
+        upsert=True,
+    )
+
+
+def group_stories(
+    docs: List[dict], keys: List[Optional[str]]
+) -> Dict[str, List[dict]]:
+    """Documents grouped by their story key, in order of first appearance."""
+    stories: Dict[str, List[dict]] = {}
+    for doc, key in zip(docs, keys):
+        if key is None:
+            logger.warning("Skipping news item without sources or title")
+            continue
+        stories.setdefault(key, []).append(doc)
+    return stories
+
+
+def inserted_story_keys(
+    stories: Dict[str, List[dict]], upserted_ids: Dict[int, object]
+) -> Set[str]:
+    """Story keys inserted by the upserts built from `stories`."""
+    keys = list(stories)
+    return {keys[index] for index in upserted_ids}
 
 
 def save_news_items(news_items: List[NewsItem]) -> int:
     """
     Save multiple news items to the database.
 
+    Items are upserted by story key, so reruns and stories found by several
+    topics/tools update the existing document instead of adding a new one.
+
     Args:
         news_items: List of NewsItem objects to save
 
     Returns:
-        int: Number of items successfully inserted
+        int: Number of stories inserted or updated
     """
     if not news_items:
         logger.info("No news items to save")
         return 0
 
     try:
-        # Convert NewsItem objects to dictionaries
-        items_to_insert = [item.model_dump() for item in news_items]
-        result = collection.insert_many(items_to_insert)
-        count = len(result.inserted_ids)
-        logger.info(f"Successfully saved {count} news items to database")
-        return count
+        # Convert NewsItem objects to dictionaries, grouped per story
+        docs = [news_item_doc(item) for item in news_items]
+        keys = resolve_story_keys(docs)
+        stories = group_stories(docs, keys)
+        operations = [
+            build_story_upsert(key, story_docs)
+            for key, story_docs in stories.items()
+        ]
+        existing = {
+            doc["story_key"]: doc
+            for doc in collection.find(
+                {"story_key": {"$in": list(stories)}}, STATS_PROJECTION
+            )
+        }
+        result = collection.bulk_write(operations, ordered=False)
+        add_to_url_filter(url for doc in docs for url in doc.get("sources", []))
+        update_stats(
+            stories, existing, inserted_story_keys(stories, result.upserted_ids)
+        )
+        saved = result.upserted_count + result.modified_count
+        if mark_duplicates(saved_story_keys(keys)) or saved:
+            invalidate_feed_cache(newest_story_id(result.upserted_ids))
+        logger.info(
+            f"Saved {len(docs)} news items as {len(operations)} stories "
+            f"({result.upserted_count} new, {result.modified_count} updated)"
+        )
+        return saved
+    except BulkWriteError as e:
+        details = e.details
+        logger.error(
+            f"Error saving some news items to database: {details.get('writeErrors')}"
+        )
+        # Duplicates were not marked: no watermark, the new stories wait
+        # for a later save's
+        invalidate_feed_cache()
+        return details.get("nUpserted", 0) + details.get("nModified", 0)
     except Exception as e:
         logger.error(f"Error saving news items to database: {e}")
         return 0
 
 
+def update_stats(
+    stories: Dict[str, List[dict]],
+    existing: Dict[str, dict],
+    inserted: Set[str],
+):
+    """Apply the counter deltas of a save, see `stats.save_deltas`."""
+    update_counters(*save_deltas(stories, existing, inserted))
+
+
+def update_counters(deltas: Counts, new_stories: int = 0):
+    try:
+        operations = counter_updates(deltas, new_stories)
+        if operations:
+            stats_collection.bulk_write(operations, ordered=False)
+    except Exception as e:
+        # Corrected by the next reconciliation
+        logger.error(f"Error updating stats counters: {e}")
+
+
+def reconcile_news_stats(max_age: Optional[timedelta] = None) -> int:
+    """
+    Recompute the stats counters, see `stats.reconcile_stats`.
+
+    Args:
+        max_age: Only reconcile if the last reconciliation is older
+
+    Returns:
+        int: Number of counters corrected
+    """
+    try:
+        reconciled_at = last_reconciled(stats_collection)
+        if (
+            max_age is not None
+            and reconciled_at is not None
+            and datetime.now(timezone.utc) - reconciled_at < max_age
+        ):
+            return 0
+        corrected = reconcile_stats(collection, stats_collection)
+        if corrected:
+            invalidate_feed_cache()
+        return corrected
+    except Exception as e:
+        logger.error(f"Error reconciling stats: {e}")
+        return 0
+
+
+def newest_story_id(upserted_ids: Dict[int, Any]) -> Any:
+    """Newest `_id` inserted by a save, `None` if it inserted nothing."""
+    return max(upserted_ids.values(), default=None)
+
+
+def invalidate_feed_cache(last_story_id: Any = None):
+    """
+    Bump the feed version so API caches drop pages built before a write.
+
+    Args:
+        last_story_id: Newest story inserted by the write, see
+            `feed_version.feed_version_bump`
+    """
+    try:
+        bump_feed_version(meta_collection, last_story_id)
+    except Exception as e:
+        logger.error(f"Error bumping the feed version: {e}")
+
+
+def saved_story_keys(keys: List[Optional[str]]) -> List[str]:
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+def duplicate_marks(stories: List[dict]) -> Dict[Any, Optional[str]]:
+    """
+    Mark stories that share a source URL (directly or through other
+    stories): the earliest saved one is canonical, the others get
+    `duplicate_of` its story key and are left out of the API feed.
+
+    Args:
+        stories: Stories with `_id`, `story_key`, `sources`, `created_at`
+            and `duplicate_of`
+
+    Returns:
+        Dict[Any, Optional[str]]: New `duplicate_of` (`None`: canonical)
+        per `_id` of the stories whose mark changes
+    """
+    stories = list({doc["_id"]: doc for doc in stories}.values())
+    parent = {doc["_id"]: doc["_id"] for doc in stories}
+
+    def find(_id):
+        while parent[_id] != _id:
+            parent[_id] = parent[parent[_id]]
+            _id = parent[_id]
+        return _id
+
+    url_owner = {}
+    for doc in stories:
+        for url in doc.get("sources", []):
+            if url in url_owner:
+                parent[find(doc["_id"])] = find(url_owner[url])
+            else:
+                url_owner[url] = doc["_id"]
+
+    groups: Dict[object, List[dict]] = {}
+    for doc in stories:
+        groups.setdefault(find(doc["_id"]), []).append(doc)
+
+    marks = {}
+    for group in groups.values():
+        canonical = min(
+            group,
+            key=lambda doc: (doc.get("created_at") or datetime.max, doc["_id"]),
+        )
+        for doc in group:
+            duplicate_of = None if doc is canonical else canonical["story_key"]
+            if doc.get("duplicate_of") != duplicate_of:
+                marks[doc["_id"]] = duplicate_of
+    return marks
+
+
+def mark_updates(marks: Dict[Any, Optional[str]]) -> List[UpdateOne]:
+    """Updates applying `duplicate_marks`."""
+    return [
+        UpdateOne(
+            {"_id": _id},
+            (
+                {"$set": {"duplicate_of": duplicate_of}}
+                if duplicate_of
+                else {"$unset": {"duplicate_of": ""}}
+            ),
+        )
+        for _id, duplicate_of in marks.items()
+    ]
+
+
+def mark_duplicates(keys: List[str]) -> int:
+    """
+    Dedup at write time: mark the stories `keys` and the stories related to
+    them, see `duplicate_marks`.
+
+    Returns:
+        int: Number of stories whose mark changed
+    """
+    if not keys:
+        return 0
+    try:
+        saved = list(
+            collection.find({"story_key": {"$in": keys}}, {"sources": 1})
+        )
+        query = story_keys_query(saved)
+        if query is None:
+            return 0
+        related = list(collection.find(query, DUPLICATE_PROJECTION))
+        # Stories marked as duplicates of a related story are regrouped too
+        related += collection.find(
+            {"duplicate_of": {"$in": [doc["story_key"] for doc in related]}},
+            DUPLICATE_PROJECTION,
+        )
+        marks = duplicate_marks(related)
+        if marks:
+            collection.bulk_write(mark_updates(marks), ordered=False)
+            update_counters(mark_deltas(related, marks))
+            logger.info(f"Updated duplicate marks of {len(marks)} stories")
+        return len(marks)
+    except Exception as e:
+        logger.error(f"Error marking duplicate stories: {e}")
+        return 0
+
+
+def url_check_candidates(urls: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Canonical form of each URL, and the canonical URLs that need an exact
+    database check (all of them, or the possible hits of `url_filter`).
+    """
+    canonical_urls = {url: canonicalize_url(url) for url in urls}
+    candidates = set(canonical_urls.values())
+    if url_filter is not None:
+        candidates = {url for url in candidates if url in url_filter}
+    return canonical_urls, list(candidates)
+
+
+def matching_input_urls(
+    canonical_urls: Dict[str, str], existing_docs: Iterable[dict]
+) -> Set[str]:
+    """Input URLs whose canonical form is a source of `existing_docs`."""
+    existing_urls = set()
+    for doc in existing_docs:
+        existing_urls.update(doc.get("sources", []))
+    return {
+        url
+        for url, canonical_url in canonical_urls.items()
+        if canonical_url in existing_urls
+    }
+
+
 def check_urls_exist(urls: List[str]) -> Set[str]:
     """
     Check which URLs from the provided list already exist in the database.
 
+    URLs are compared in canonical form, so tracking parameters, AMP paths or
+    mobile subdomains do not hide an article that is already stored.
+
     Args:
         urls: List of URLs to check
 
     Returns:
-        Set[str]: Set of URLs that exist in the database
+        Set[str]: Set of URLs (as given) that exist in the database
     """
     if not urls:
         return set()
 
     try:
+        # Only possible hits of the URL filter need the exact check
+        canonical_urls, candidates = url_check_candidates(urls)
+        if not candidates:
+            return set()
+
         # Find all documents where sources array contains any of the provided URLs
         existing_docs = collection.find(
-            {"sources": {"$in": urls}}, {"sources": 1, "_id": 0}
+            {"sources": {"$in": candidates}}, {"sources": 1, "_id": 0}
         )
 
-        # Flatten all sources from found documents into a set
-        existing_urls = set()
-        for doc in existing_docs:
-            existing_urls.update(doc.get("sources", []))
-
         # Return only the URLs from our input list that exist
-        return existing_urls.intersection(set(urls))
+        return matching_input_urls(canonical_urls, existing_docs)
     except Exception as e:
         logger.error(f"Error checking URLs in database: {e}")
         return set()
@@ -91,14 +494,300 @@ def get_all_existing_urls() -> Set[str]:
         return set()
 
 
+def build_url_filter(capacity: int) -> int:
+    """
+    Stream all stored source URLs into a new `url_filter`.
+
+    Args:
+        capacity: Number of URLs the filter is sized for
+
+    Returns:
+        int: Number of URLs read
+    """
+    global url_filter
+
+    bloom = BloomFilter(capacity, config.URL_FILTER_ERROR_RATE)
+    bloom.mark_synced()
+    read = 0
+    for doc in collection.find({}, {"sources": 1, "_id": 0}, batch_size=1000):
+        sources = doc.get("sources", [])
+        bloom.update(sources)
+        read += len(sources)
+    with url_filter_lock:
+        url_filter = bloom
+    return read
+
+
+def load_url_filter() -> Optional[BloomFilter]:
+    """
+    Load the URL filter used by `check_urls_exist`.
+
+    Warm start: the filter saved by the previous run is loaded and only
+    stories updated since then are read. Cold start (or a filter that grew
+    past its capacity): it is rebuilt from all stored sources. Either way the
+    result is saved for the next run.
+
+    Returns:
+        Optional[BloomFilter]: The filter, `None` if it could not be built
+    """
+    global url_filter
+
+    start = time.perf_counter()
+    try:
+        bloom = None
+        if os.path.exists(config.URL_FILTER_FILE):
+            try:
+                bloom = BloomFilter.load(config.URL_FILTER_FILE)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable URL filter: {e}")
+
+        if bloom is not None and not bloom.is_full:
+            since = (
+                datetime.fromtimestamp(bloom.synced_at) - URL_FILTER_CATCH_UP
+            )
+            bloom.mark_synced()
+            with url_filter_lock:
+                url_filter = bloom
+            for doc in collection.find(
+                {"updated_at": {"$gte": since}},
+                {"sources": 1, "_id": 0},
+                batch_size=1000,
+            ):
+                add_to_url_filter(doc.get("sources", []), persist=False)
+            mode = "warm"
+        else:
+            capacity = config.URL_FILTER_CAPACITY
+            if bloom is not None:
+                capacity = max(capacity, bloom.capacity * 2)
+            build_url_filter(capacity)
+            mode = "cold"
+
+        save_url_filter()
+        logger.info(
+            f"Loaded URL filter ({mode} start) with ~{len(url_filter)} URLs "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+    except Exception as e:
+        logger.error(
+            f"Error loading URL filter, checking URLs in database: {e}"
+        )
+        url_filter = None
+    return url_filter
+
+
+def add_to_url_filter(urls: Iterable[str], persist: bool = True) -> None:
+    """Record saved source URLs, persisting the filter when asked."""
+    if url_filter is None:
+        return
+    with url_filter_lock:
+        url_filter.update(urls)
+    if persist:
+        save_url_filter()
+
+
+def save_url_filter() -> None:
+    if url_filter is None:
+        return
+    try:
+        with url_filter_lock:
+            url_filter.save(config.URL_FILTER_FILE)
+    except OSError as e:
+        logger.error(f"Error saving URL filter: {e}")
+
+
+def invalidate_url_filter() -> None:
+    """
+    Drop the filter and its saved copy, e.g. after stored URLs were
+    rewritten, so the next `load_url_filter` rebuilds it.
+    """
+    global url_filter
+
+    url_filter = None
+    try:
+        os.remove(config.URL_FILTER_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def get_feed_state(feed_url: str) -> dict:
+    """
+    Get the HTTP validators stored for a feed on its last poll.
+
+    Args:
+        feed_url: URL of the feed
+
+    Returns:
+        dict: `etag` and `last_modified` (missing if never polled)
+    """
+    try:
+        return feed_state_collection.find_one({"_id": feed_url}) or {}
+    except Exception as e:
+        logger.error(f"Error reading feed state for {feed_url}: {e}")
+        return {}
+
+
+def save_feed_state(
+    feed_url: str, etag: Optional[str], last_modified: Optional[str]
+) -> None:
+    """
+    Store the HTTP validators of a feed response for the next conditional GET.
+
+    Args:
+        feed_url: URL of the feed
+        etag: ETag response header
+        last_modified: Last-Modified response header
+    """
+    try:
+        feed_state_collection.update_one(
+            {"_id": feed_url},
+            {"$set": {"etag": etag, "last_modified": last_modified}},
+            upsert=True,
+        )
+    except Exception as e:
+        logger.error(f"Error saving feed state for {feed_url}: {e}")
+
+
+def save_feed_states(feed_states: List[FeedState]) -> int:
+    """
+    Store the validators of polled feeds once their entries are saved.
+
+    A feed read only partially (`max_articles`), or with an entry missing
+    from the database (summarising or saving failed), keeps its previous
+    validators: the next poll is a full GET and the entries are read again.
+
+    Args:
+        feed_states: Feeds polled by the crawl, see `FeedParserTool.discover`
+
+    Returns:
+        int: Number of feeds whose validators were stored
+    """
+    stored = 0
+    for feed_state in feed_states:
+        if not feed_state.complete:
+            logger.info(
+                f"Feed read partially, polled in full next time: "
+                f"{feed_state.feed_url}"
+            )
+            continue
+        missing = set(feed_state.urls) - check_urls_exist(feed_state.urls)
+        if missing:
+            logger.info(
+                f"{len(missing)} entries of {feed_state.feed_url} not saved, "
+                f"polled in full next time"
+            )
+            continue
+        save_feed_state(
+            feed_state.feed_url, feed_state.etag, feed_state.last_modified
+        )
+        stored += 1
+    return stored
+
+
+def backfill_story_keys() -> int:
+    """
+    Canonicalize stored source URLs and (re)assign story keys.
+
+    Covers documents saved before story keys existed and documents whose
+    URLs were saved under older canonicalization rules. Documents are
+    visited oldest first; a document whose key is already taken by another
+    story is merged into that story and deleted.
+
+    Returns:
+        int: Number of documents updated or merged
+    """
+    updated = merged = 0
+    try:
+        docs = collection.find(
+            {},
+            {
+                field: 1
+                for field in MERGED_LIST_FIELDS
+                + ["title", "created_at", "story_key"]
+            },
+        ).sort("created_at", pymongo.ASCENDING)
+
+        for doc in docs:
+            sources = canonicalize_urls(doc.get("sources", []))
+            key = story_key(sources, doc.get("title"))
+            if key is None:
+                continue
+            if sources == doc.get("sources", []) and key == doc.get(
+                "story_key"
+            ):
+                continue
+
+            story = collection.find_one(
+                {"story_key": key, "_id": {"$ne": doc["_id"]}}, {"_id": 1}
+            )
+            if story is None:
+                collection.update_one(
+                    {"_id": doc["_id"]},
+                    {"$set": {"sources": sources, "story_key": key}},
+                )
+                updated += 1
+            else:
+                collection.update_one(
+                    {"_id": story["_id"]},
+                    {
+                        "$addToSet": {
+                            field: {"$each": doc.get(field, [])}
+                            for field in MERGED_LIST_FIELDS
+                            if field != "sources"
+                        }
+                        | {"sources": {"$each": sources}},
+                        "$min": {"created_at": doc["created_at"]},
+                    },
+                )
+                collection.delete_one({"_id": doc["_id"]})
+                merged += 1
+
+        logger.info(
+            f"Backfilled story keys: {updated} documents updated, {merged} merged"
+        )
+        if updated or merged:
+            # New canonical URLs are not in the filter yet
+            invalidate_url_filter()
+            invalidate_feed_cache()
+    except Exception as e:
+        logger.error(f"Error backfilling story keys: {e}")
+    return updated + merged
+
+
+def backfill_duplicates(batch_size: int = 500) -> int:
+    """
+    Mark duplicate stories saved before dedup moved to write time.
+
+    Returns:
+        int: Number of stories whose mark changed
+    """
+    changed = 0
+    try:
+        keys = []
+        for doc in collection.find(
+            {"story_key": {"$exists": True}}, {"story_key": 1, "_id": 0}
+        ):
+            keys.append(doc["story_key"])
+            if len(keys) == batch_size:
+                changed += mark_duplicates(keys)
+                keys = []
+        changed += mark_duplicates(keys)
+        logger.info(f"Backfilled duplicate marks of {changed} stories")
+        if changed:
+            invalidate_feed_cache()
+    except Exception as e:
+        logger.error(f"Error backfilling duplicate marks: {e}")
+    return changed
+
+
 def initialize_database():
     """
     Initialize the database by creating necessary indexes.
     Should be called once at application startup.
     """
     try:
-        # Create index on sources field for faster URL lookups
-        collection.create_index("sources")
+        ensure_indexes(collection, meta_collection)
+        ensure_stats_indexes(stats_collection)
+        log_index_report(collection)
         logger.info("Database indexes created successfully")
     except Exception as e:
         logger.error(f"Error creating database indexes: {e}")
@@ -0,0 +1,265 @@
+"""
+Static snapshot of the news feed, written after each ingest run.
+
+The first pages of every feed category and topic are precomputed as the
+JSON of `/api/news` (canonical stories only, same projection), with gzip
+(and brotli) variants next to them, so a static host or object store can
+serve the common read path without the API or the database. A
+`manifest.json` lists the pages of each feed; the last exported page keeps
+its `next_cursor`, so a client continues on the API from there.
+
+Each run writes a new snapshot directory and then replaces the manifest, so
+readers never see a half-written snapshot. The previous snapshot is kept
+for clients that loaded the old manifest.
+
+Kept free of config imports, the agent passes its settings in.
+
+Usage: python -m prazo.core.feed_export (export now, to `FEED_EXPORT_DIR`)
+"""
+
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import orjson
+import pymongo
+
+from prazo.core.indexes import (
+    CANONICAL,
+    FEED_SORT,
+    NEWS_ITEM_PROJECTION,
+    feed_query,
+)
+from prazo.utils.http_body import encode_body
+from prazo.utils.pagination import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CATEGORIES = ["all", "daily", "topics"]
+MANIFEST_NAME = "manifest.json"
+# Snapshot directories kept, the newest and the one before it
+KEEP_SNAPSHOTS = 2
+# File suffix of each pre-compressed variant
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+SNAPSHOT_NAME = re.compile(r"^\d{8}T\d{12}Z$")
+SLUG_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def topic_slug(topic: str, taken: Optional[set] = None) -> str:
+    """
+    Directory name of a topic's pages.
+
+    Args:
+        topic: Topic name, as stored on the stories
+        taken: Slugs already in use, a clashing slug gets a numeric suffix
+    """
+    slug = SLUG_SEPARATORS.sub("-", topic.lower()).strip("-") or "topic"
+    if taken is not None:
+        base, n = slug, 2
+        while slug in taken:
+            slug, n = f"{base}-{n}", n + 1
+        taken.add(slug)
+    return slug
+
+
+def _serialize(doc: dict) -> dict:
+    # As the API serializes items: the ObjectId as a string id
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
+def build_pages(
+    docs: List[dict],
+    total: int,
+    page_size: int,
+    pages: int,
+    page_path: Callable[[int], str],
+) -> List[dict]:
+    """
+    Split one feed into snapshot pages.
+
+    Args:
+        docs: Stories in feed order (`FEED_SORT`), up to one more than the
+            pages hold, which tells whether the feed continues past them
+        total: Stories in the feed, sent with the first page
+        page_size: Stories per page
+        pages: Pages exported at most
+        page_path: Path of the n-th page (from 1), relative to the manifest
+
+    Returns:
+        List[dict]: `/api/news` responses, with the path of the next
+        snapshot page (`next_page`) while there is one
+    """
+    count = max(1, min(pages, -(-len(docs) // page_size)))
+    snapshot = []
+    for n in range(1, count + 1):
+        start = (n - 1) * page_size
+        items = docs[start : start + page_size]
+        has_more = len(docs) > start + page_size
+        page = {
+            "count": len(items),
+            "limit": page_size,
+            "has_more": has_more,
+            # Taken before serializing the last item (replaces `_id`)
+            "next_cursor": encode_cursor(items[-1]) if has_more else None,
+            "next_page": page_path(n + 1) if n < count else None,
+            "news_items": [_serialize(item) for item in items],
+        }
+        if n == 1:
+            page["total"] = total
+        snapshot.append(page)
+    return snapshot
+
+
+def _write(path: str, body: bytes, compress: bool = True):
+    with open(path, "wb") as f:
+        f.write(body)
+    if compress:
+        for encoding, variant in encode_body(body).encoded.items():
+            with open(path + ENCODING_SUFFIXES[encoding], "wb") as f:
+                f.write(variant)
+
+
+def write_snapshot(
+    out_dir: str, version: str, files: Dict[str, bytes], manifest: dict
+) -> str:
+    """
+    Write a snapshot and publish it by replacing the manifest.
+
+    Args:
+        out_dir: Export directory (e.g. synced to an object store)
+        version: Snapshot name, paths in `files` are relative to it
+        files: JSON body per path
+        manifest: Lists the pages, written last
+
+    Returns:
+        str: Path of the manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    staging = os.path.join(out_dir, f".{version}.tmp")
+    try:
+        for path, body in files.items():
+            target = os.path.join(staging, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write(target, body)
+        os.rename(staging, os.path.join(out_dir, version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # Published by a rename, not overwritten in place
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    staging_manifest = os.path.join(out_dir, f".{MANIFEST_NAME}.tmp")
+    _write(staging_manifest, orjson.dumps(manifest), compress=False)
+    os.replace(staging_manifest, manifest_path)
+    prune_snapshots(out_dir)
+    return manifest_path
+
+
+def prune_snapshots(out_dir: str, keep: int = KEEP_SNAPSHOTS):
+    """Delete all but the newest `keep` snapshot directories."""
+    names = sorted(
+        name
+        for name in os.listdir(out_dir)
+        if SNAPSHOT_NAME.match(name)
+        and os.path.isdir(os.path.join(out_dir, name))
+    )
+    for name in names[:-keep]:
+        shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+
+
+def _read_feed(
+    collection: pymongo.collection.Collection,
+    query_filter: dict,
+    limit: int,
+    hint: Optional[str] = None,
+) -> List[dict]:
+    cursor = collection.find(query_filter, NEWS_ITEM_PROJECTION)
+    if hint is not None:
+        cursor = cursor.hint(hint)
+    return list(cursor.sort(FEED_SORT).limit(limit))
+
+
+def export_feed(
+    collection: pymongo.collection.Collection,
+    out_dir: str,
+    pages: int = 3,
+    page_size: int = 50,
+) -> dict:
+    """
+    Export the first pages of every category and topic feed.
+
+    Args:
+        collection: News items collection
+        out_dir: Export directory
+        pages: Pages exported per feed
+        page_size: Stories per page (as the frontend requests them)
+
+    Returns:
+        dict: The published manifest
+    """
+    generated_at = datetime.now(timezone.utc)
+    version = generated_at.strftime("%Y%m%dT%H%M%S%fZ")
+    files: Dict[str, bytes] = {}
+
+    def add_feed(
+        path: str, query_filter: dict, hint: Optional[str] = None
+    ) -> dict:
+        def page_path(n: int) -> str:
+            return f"{version}/{path}/{n}.json"
+
+        docs = _read_feed(collection, query_filter, pages * page_size + 1, hint)
+        total = collection.count_documents(query_filter)
+        feed_pages = build_pages(docs, total, page_size, pages, page_path)
+        for n, page in enumerate(feed_pages, start=1):
+            files[f"{path}/{n}.json"] = orjson.dumps(page)
+        return {
+            "total": total,
+            "pages": [page_path(n) for n in range(1, len(feed_pages) + 1)],
+        }
+
+    feeds = {}
+    for category in EXPORT_CATEGORIES:
+        query = feed_query(category)
+        feeds[category] = add_feed(category, query.filter, query.hint)
+    slugs: set = set()
+    topics = {}
+    for topic in sorted(collection.distinct("topic", CANONICAL)):
+        if topic:
+            query = feed_query(topic=topic)
+            topics[topic] = add_feed(
+                f"topic/{topic_slug(topic, slugs)}", query.filter, query.hint
+            )
+
+    manifest = {
+        "version": version,
+        "generated_at": generated_at,
+        "page_size": page_size,
+        "feeds": feeds,
+        "topics": topics,
+    }
+    write_snapshot(out_dir, version, files, manifest)
+    logger.info(
+        f"Exported feed snapshot {version}: {len(files)} pages "
+        f"({len(topics)} topics) to {out_dir}"
+    )
+    return manifest
+
+
+if __name__ == "__main__":
+    from prazo.core.config import config
+    from prazo.core.db import collection
+
+    if not config.FEED_EXPORT_DIR:
+        raise SystemExit("FEED_EXPORT_DIR is not set")
+    manifest = export_feed(
+        collection,
+        config.FEED_EXPORT_DIR,
+        config.FEED_EXPORT_PAGES,
+        config.FEED_EXPORT_PAGE_SIZE,
+    )
+    print(f"Exported snapshot {manifest['version']}")
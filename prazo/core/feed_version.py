@@ -0,0 +1,136 @@
+"""
+Version of the stories served by the news feed.
+
+The agent bumps it whenever it changes stored stories, and readers (the API
+response cache) drop whatever they built from an older version. It is
+stored in the `indexes.META_COLLECTION` collection next to the index version.
+
+Kept free of config imports so the API service can use it too.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+
+import pymongo
+
+logger = logging.getLogger(__name__)
+
+FEED_VERSION_ID = "feed"
+# Newest story `_id` whose duplicate marks are settled
+LAST_STORY_FIELD = "last_story_id"
+
+
+def feed_version_bump(last_story_id: Any = None) -> dict:
+    """
+    Update document bumping the feed version (with `upsert=True`).
+
+    Args:
+        last_story_id: Newest story `_id` inserted by the save bumping the
+            version, once its duplicates are marked: the change feed
+            pushes stories up to it (see `prazo.core.change_feed`)
+    """
+    update = {
+        "$inc": {"version": 1},
+        "$set": {"updated_at": datetime.now(timezone.utc)},
+    }
+    if last_story_id is not None:
+        update["$max"] = {LAST_STORY_FIELD: last_story_id}
+    return update
+
+
+def bump_feed_version(
+    meta_collection: pymongo.collection.Collection, last_story_id: Any = None
+):
+    meta_collection.update_one(
+        {"_id": FEED_VERSION_ID}, feed_version_bump(last_story_id), upsert=True
+    )
+
+
+def get_feed_version(
+    meta_collection: pymongo.collection.Collection,
+) -> Tuple[int, Optional[datetime]]:
+    """
+    Returns:
+        Tuple[int, Optional[datetime]]: Feed version and when it was bumped
+        (`0, None` if never)
+    """
+    return _parse_feed_version(
+        meta_collection.find_one({"_id": FEED_VERSION_ID})
+    )
+
+
+def _parse_feed_version(doc: Optional[dict]) -> Tuple[int, Optional[datetime]]:
+    doc = doc or {}
+    return doc.get("version", 0), doc.get("updated_at")
+
+
+class FeedVersion:
+    """
+    Feed version as seen by a reader, read from the database at most once
+    every `poll_interval` seconds.
+
+    Args:
+        meta_collection: Collection holding the version
+        poll_interval: Seconds a read version is trusted
+        clock: Monotonic clock, in seconds
+    """
+
+    def __init__(
+        self,
+        meta_collection: pymongo.collection.Collection,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.meta_collection = meta_collection
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._version = 0
+        # When the data last changed, for `Last-Modified` headers
+        self.updated_at: Optional[datetime] = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, now: float) -> bool:
+        return (
+            self._checked_at is not None
+            and now - self._checked_at < self.poll_interval
+        )
+
+    def current(self) -> int:
+        with self._lock:
+            now = self.clock()
+            if self._is_fresh(now):
+                return self._version
+            try:
+                self._version, self.updated_at = get_feed_version(
+                    self.meta_collection
+                )
+            except Exception as e:
+                # Keep serving what was built from the last known version
+                logger.warning(f"Failed to read the feed version: {e}")
+            self._checked_at = now
+            return self._version
+
+
+class AsyncFeedVersion(FeedVersion):
+    """
+    `FeedVersion` read through an async collection (`AsyncMongoClient`),
+    use `acurrent` from the event loop.
+    """
+
+    async def acurrent(self) -> int:
+        now = self.clock()
+        if self._is_fresh(now):
+            return self._version
+        # Concurrent callers keep the last version until this read is done
+        self._checked_at = now
+        try:
+            self._version, self.updated_at = _parse_feed_version(
+                await self.meta_collection.find_one({"_id": FEED_VERSION_ID})
+            )
+        except Exception as e:
+            logger.warning(f"Failed to read the feed version: {e}")
+        return self._version
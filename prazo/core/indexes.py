@@ -0,0 +1,298 @@
+"""
+Index management for the news items collection.
+
+Indexes are declared once here and matched to the query shapes of the read
+API (`feed_query`), so the agent and the API service create the same
+indexes at startup and the API always runs an index-backed, non-blocking
+sort.
+
+The declared set is versioned: bump `INDEX_VERSION` whenever
+`NEWS_INDEXES` or `DROPPED_INDEXES` change. The applied version is stored in
+the `META_COLLECTION` collection.
+
+Kept free of config imports so the API service can use it too.
+
+Usage: python -m prazo.core.indexes (apply and print a usage report)
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymongo
+from pymongo import IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 5
+
+# Newest first; `_id` breaks ties so the order is total
+FEED_SORT = [
+    ("published_date", pymongo.DESCENDING),
+    ("created_at", pymongo.DESCENDING),
+    ("_id", pymongo.DESCENDING),
+]
+
+# Fields of a news item the frontend renders; `_id` and `created_at` are
+# also needed for the cursor (`FEED_SORT`). Internal fields (`story_key`,
+# `duplicate_of`, ...) stay in the database.
+NEWS_ITEM_PROJECTION = {
+    "title": 1,
+    "summary": 1,
+    "sources": 1,
+    "published_date": 1,
+    "created_at": 1,
+    "topic": 1,
+    "groups": 1,
+    "tool_source": 1,
+}
+
+# Stories shown in the feed: duplicates are marked at write time
+# (`duplicate_of`), a null/missing mark is a canonical story
+CANONICAL = {"duplicate_of": None}
+
+NEWS_INDEXES = [
+    # URL existence checks and API dedup
+    IndexModel("sources", name="sources_1"),
+    # One document per story; legacy documents without a key are left out
+    # until `backfill_story_keys` has run
+    IndexModel(
+        "story_key",
+        name="story_key_1",
+        unique=True,
+        partialFilterExpression={"story_key": {"$exists": True}},
+    ),
+    # Feed of all canonical stories, and of those not matching a tool
+    # filter; also finds the duplicates of a story
+    IndexModel(
+        [("duplicate_of", pymongo.ASCENDING)] + FEED_SORT, name="feed_sort"
+    ),
+    # Feed of a single tool (equalities, then the feed sort)
+    IndexModel(
+        [
+            ("duplicate_of", pymongo.ASCENDING),
+            ("tool_source", pymongo.ASCENDING),
+        ]
+        + FEED_SORT,
+        name="tool_source_feed_sort",
+    ),
+    # Feed of a single topic or group. Both are arrays, and a compound
+    # index may hold only one array field: each gets its own (multikey)
+    # index, and a feed filtered on both uses the topic one.
+    IndexModel(
+        [
+            ("duplicate_of", pymongo.ASCENDING),
+            ("topic", pymongo.ASCENDING),
+        ]
+        + FEED_SORT,
+        name="topic_feed_sort",
+    ),
+    IndexModel(
+        [
+            ("duplicate_of", pymongo.ASCENDING),
+            ("groups", pymongo.ASCENDING),
+        ]
+        + FEED_SORT,
+        name="groups_feed_sort",
+    ),
+    # Search (`/api/news/search`), a title match ranks above a summary one
+    IndexModel(
+        [("title", pymongo.TEXT), ("summary", pymongo.TEXT)],
+        name="text_search",
+        weights={"title": 10, "summary": 1},
+        default_language="english",
+    ),
+]
+
+# Indexes created by earlier versions that are no longer wanted
+DROPPED_INDEXES: List[str] = []
+
+# Schema bookkeeping collection, holds the applied index version
+META_COLLECTION = "schema_meta"
+META_ID = "indexes"
+
+
+@dataclass
+class FeedQuery:
+    """Filter of a feed page and the index that serves it"""
+
+    filter: dict = field(default_factory=lambda: dict(CANONICAL))
+    hint: str = "feed_sort"
+
+
+def feed_query(
+    category: str = "all",
+    topic: Optional[str] = None,
+    group: Optional[str] = None,
+) -> FeedQuery:
+    """
+    Query shape of the API news feed for a category.
+
+    Args:
+        category: 'all', 'daily' (news channel crawls) or 'topics'
+            (everything else)
+        topic: Only stories of this topic
+        group: Only stories of this group
+
+    Returns:
+        FeedQuery: Filter and index hint, to be sorted by `FEED_SORT`
+    """
+    if category == "daily":
+        query = FeedQuery(
+            {**CANONICAL, "tool_source": {"$in": ["daily_news"]}},
+            "tool_source_feed_sort",
+        )
+    elif category == "topics":
+        # $nin cannot be served from index bounds without a blocking sort,
+        # walking the feed order and filtering is cheaper
+        query = FeedQuery(
+            {**CANONICAL, "tool_source": {"$nin": ["daily_news"]}}
+        )
+    else:
+        query = FeedQuery(dict(CANONICAL))
+
+    # A topic or group is more selective than a category: its index reads
+    # only that feed, the other equalities are checked on the way
+    if group:
+        query.filter["groups"] = group
+        query.hint = "groups_feed_sort"
+    if topic:
+        query.filter["topic"] = topic
+        query.hint = "topic_feed_sort"
+    return query
+
+
+def in_category(tool_source: List[str], category: str = "all") -> bool:
+    """Whether a story with these tools is in a `feed_query` category."""
+    if category == "daily":
+        return "daily_news" in tool_source
+    if category == "topics":
+        return "daily_news" not in tool_source
+    return True
+
+
+def index_key(index: dict) -> List[Tuple[str, int]]:
+    return [(name, direction) for name, direction in index["key"].items()]
+
+
+def stored_index_key(key: List[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+    """Key as listed by the server, which stores text fields as `_fts`/`_ftsx`"""
+    stored = []
+    for name, direction in key:
+        if direction == pymongo.TEXT or name == "_ftsx":
+            if ("_fts", pymongo.TEXT) not in stored:
+                stored += [("_fts", pymongo.TEXT), ("_ftsx", 1)]
+        else:
+            stored.append((name, direction))
+    return stored
+
+
+def plan_index_changes(
+    existing: Dict[str, dict], applied_version: Optional[int]
+) -> Tuple[List[IndexModel], List[str]]:
+    """
+    Work out which indexes to create and drop.
+
+    Args:
+        existing: `index_information()` of the collection
+        applied_version: Version stored by the last run (`None` if never run)
+
+    Returns:
+        Tuple[List[IndexModel], List[str]]: Indexes to create, names to drop
+    """
+    to_drop = []
+    if applied_version != INDEX_VERSION:
+        to_drop = [name for name in DROPPED_INDEXES if name in existing]
+
+    to_create = []
+    for model in NEWS_INDEXES:
+        name = model.document["name"]
+        current = existing.get(name)
+        if current is not None and stored_index_key(
+            [tuple(key) for key in current["key"]]
+        ) != stored_index_key(index_key(model.document)):
+            # Same name, new definition: rebuild
+            to_drop.append(name)
+            current = None
+        if current is None:
+            to_create.append(model)
+    return to_create, to_drop
+
+
+def ensure_indexes(
+    collection: pymongo.collection.Collection,
+    meta_collection: pymongo.collection.Collection,
+) -> bool:
+    """
+    Bring the collection's indexes up to `INDEX_VERSION`.
+
+    Returns:
+        bool: Whether any index was created or dropped
+    """
+    meta = meta_collection.find_one({"_id": META_ID}) or {}
+    to_create, to_drop = plan_index_changes(
+        collection.index_information(), meta.get("version")
+    )
+    for name in to_drop:
+        collection.drop_index(name)
+    if to_create:
+        collection.create_indexes(to_create)
+    meta_collection.update_one(
+        {"_id": META_ID},
+        {
+            "$set": {
+                "version": INDEX_VERSION,
+                "applied_at": datetime.now(timezone.utc),
+            }
+        },
+        upsert=True,
+    )
+    if to_create or to_drop:
+        logger.info(
+            f"Indexes at version {INDEX_VERSION}: created "
+            f"{[m.document['name'] for m in to_create]}, dropped {to_drop}"
+        )
+    return bool(to_create or to_drop)
+
+
+def index_report(collection: pymongo.collection.Collection) -> dict:
+    """
+    Compare declared indexes with the collection's.
+
+    Returns:
+        dict: `missing` declared indexes, `unmanaged` indexes not declared
+        here, `unused` indexes without any access since the server started
+        and `accesses` per index
+    """
+    declared = {model.document["name"] for model in NEWS_INDEXES}
+    existing = set(collection.index_information()) - {"_id_"}
+    accesses = {
+        stats["name"]: stats["accesses"]["ops"]
+        for stats in collection.aggregate([{"$indexStats": {}}])
+        if stats["name"] != "_id_"
+    }
+    return {
+        "missing": sorted(declared - existing),
+        "unmanaged": sorted(existing - declared),
+        "unused": sorted(name for name, ops in accesses.items() if not ops),
+        "accesses": accesses,
+    }
+
+
+def log_index_report(collection: pymongo.collection.Collection) -> dict:
+    report = index_report(collection)
+    if report["missing"]:
+        logger.warning(f"Missing indexes: {report['missing']}")
+    if report["unmanaged"]:
+        logger.warning(f"Indexes not managed by prazo: {report['unmanaged']}")
+    if report["unused"]:
+        logger.info(f"Indexes unused since server start: {report['unused']}")
+    return report
+
+
+if __name__ == "__main__":
+    from prazo.core.db import collection, meta_collection
+
+    ensure_indexes(collection, meta_collection)
+    print(log_index_report(collection))
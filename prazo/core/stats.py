@@ -0,0 +1,394 @@
+"""
+Incrementally maintained statistics of the news items collection.
+
+Every save adds its deltas to small counter documents (one per tool
+source, topic, group and publication day, plus the total), so reading the
+stats and the feed facets costs the same whatever the size of the
+collection. Topics and groups (the feed facets) count canonical stories
+only, the ones the feed serves: marking a story as a duplicate takes it
+out of them, see `mark_deltas`. `reconcile_stats`
+recomputes all counters from the collection to correct any drift (writes
+outside the save path, failed or concurrent saves).
+
+Kept free of config imports so the API service can use it too.
+
+Usage: python -m prazo.core.stats (reconcile now)
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pymongo
+from pymongo import DeleteOne, IndexModel, UpdateOne
+
+from prazo.core.indexes import CANONICAL
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "news_stats"
+TOTAL_ID = "total"
+# List fields of a story counted per value
+COUNTED_FIELDS = ["tool_source", "topic", "groups"]
+# Of those, the feed facets: canonical stories only
+FACET_FIELDS = ["topic", "groups"]
+DAY = "day"
+# Values listed per facet of the feed filters
+FACET_LIMIT = 50
+
+STATS_INDEXES = [
+    # Top values of a dimension
+    IndexModel([("dim", pymongo.ASCENDING), ("count", pymongo.DESCENDING)]),
+    # Latest days
+    IndexModel([("dim", pymongo.ASCENDING), ("value", pymongo.DESCENDING)]),
+]
+
+Counts = Counter  # (dimension, value) -> count
+
+
+def counter_id(dim: str, value: str) -> str:
+    return f"{dim}:{value}"
+
+
+def story_day(
+    published_date: Optional[datetime], created_at: Optional[datetime]
+) -> Optional[str]:
+    """
+    Day a story is counted on: published, or else first saved. Days are
+    UTC, as `reconcile_stats` groups them (naive datetimes are UTC).
+    """
+    date = published_date or created_at
+    if date is None:
+        return None
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.strftime("%Y-%m-%d")
+
+
+def is_canonical(story: dict) -> bool:
+    return not story.get("duplicate_of")
+
+
+def story_counts(story: dict) -> Counts:
+    """Counters a stored story contributes to."""
+    counts = Counts(
+        (field, value)
+        for field in COUNTED_FIELDS
+        for value in set(story.get(field) or [])
+    )
+    day = story_day(story.get("published_date"), story.get("created_at"))
+    if day:
+        counts[(DAY, day)] += 1
+    return counts
+
+
+def save_deltas(
+    stories: Dict[str, List[dict]],
+    existing: Dict[str, dict],
+    inserted: Set[str],
+) -> Tuple[Counts, int]:
+    """
+    Counter changes of one save.
+
+    Args:
+        stories: Saved documents per story key
+        existing: Stored stories (before the save) by story key
+        inserted: Story keys the save inserted
+
+    Returns:
+        Tuple[Counts, int]: Counter deltas and number of new stories
+    """
+    deltas = Counts()
+    for key, docs in stories.items():
+        if key in inserted:
+            deltas += story_counts(
+                {
+                    field: [v for doc in docs for v in doc.get(field) or []]
+                    for field in COUNTED_FIELDS
+                }
+                | {
+                    "published_date": docs[0].get("published_date"),
+                    "created_at": min(doc["created_at"] for doc in docs),
+                }
+            )
+        elif key in existing:
+            # Merged into a stored story: only new list values count, in
+            # the facets only if the story is canonical
+            canonical = is_canonical(existing[key])
+            for field in COUNTED_FIELDS:
+                if field in FACET_FIELDS and not canonical:
+                    continue
+                stored = set(existing[key].get(field) or [])
+                for value in {v for doc in docs for v in doc.get(field) or []}:
+                    if value not in stored:
+                        deltas[(field, value)] += 1
+        # Neither: inserted by a concurrent save, left to reconciliation
+    return deltas, len(inserted & set(stories))
+
+
+def mark_deltas(
+    stories: Iterable[dict], marks: Dict[Any, Optional[str]]
+) -> Counts:
+    """
+    Facet counter changes of duplicate marks: a story marked as a duplicate
+    leaves the facets, a story no longer marked comes back.
+
+    Args:
+        stories: Stored stories with `_id`, `duplicate_of` (before the
+            marks) and the facet fields
+        marks: New `duplicate_of` per `_id` of the stories whose mark
+            changes (`None`: canonical)
+    """
+    deltas = Counts()
+    for story in {doc["_id"]: doc for doc in stories}.values():
+        if story["_id"] not in marks:
+            continue
+        canonical = marks[story["_id"]] is None
+        if canonical == is_canonical(story):
+            continue
+        for field in FACET_FIELDS:
+            for value in set(story.get(field) or []):
+                deltas[(field, value)] += 1 if canonical else -1
+    return deltas
+
+
+def counter_updates(deltas: Counts, new_stories: int) -> List[UpdateOne]:
+    """Atomic `$inc` upserts applying counter deltas."""
+    operations = [
+        UpdateOne(
+            {"_id": counter_id(dim, value)},
+            {
+                "$inc": {"count": count},
+                "$setOnInsert": {"dim": dim, "value": value},
+            },
+            upsert=True,
+        )
+        for (dim, value), count in deltas.items()
+        if count
+    ]
+    if new_stories:
+        operations.append(
+            UpdateOne(
+                {"_id": TOTAL_ID}, {"$inc": {"count": new_stories}}, upsert=True
+            )
+        )
+    return operations
+
+
+def count_collection(
+    collection: pymongo.collection.Collection,
+) -> Tuple[Counts, int]:
+    """Exact counters, aggregated over the whole collection."""
+    counts = Counts()
+    for field in COUNTED_FIELDS:
+        # Facets count the stories the feed serves
+        match = [{"$match": CANONICAL}] if field in FACET_FIELDS else []
+        for group in collection.aggregate(
+            match
+            + [
+                # List fields are merged with $addToSet, values are unique
+                {"$unwind": f"${field}"},
+                {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            ],
+            allowDiskUse=True,
+        ):
+            counts[(field, group["_id"])] = group["count"]
+    for group in collection.aggregate(
+        [
+            {
+                "$group": {
+                    "_id": {
+                        "$dateToString": {
+                            "format": "%Y-%m-%d",
+                            "date": {
+                                "$ifNull": ["$published_date", "$created_at"]
+                            },
+                        }
+                    },
+                    "count": {"$sum": 1},
+                }
+            }
+        ],
+        allowDiskUse=True,
+    ):
+        if group["_id"]:
+            counts[(DAY, group["_id"])] = group["count"]
+    return counts, collection.count_documents({})
+
+
+def reconcile_stats(
+    collection: pymongo.collection.Collection,
+    stats_collection: pymongo.collection.Collection,
+) -> int:
+    """
+    Recompute every counter from the collection.
+
+    Saves running meanwhile may be counted twice or missed until the next
+    reconciliation.
+
+    Returns:
+        int: Number of counters corrected or removed
+    """
+    counts, total = count_collection(collection)
+    expected = {
+        counter_id(dim, value): count for (dim, value), count in counts.items()
+    }
+    stored = {
+        doc["_id"]: doc.get("count")
+        for doc in stats_collection.find(
+            {"dim": {"$exists": True}}, {"count": 1}
+        )
+    }
+
+    operations: List = [
+        UpdateOne(
+            {"_id": counter_id(dim, value)},
+            {"$set": {"dim": dim, "value": value, "count": count}},
+            upsert=True,
+        )
+        for (dim, value), count in counts.items()
+        if stored.get(counter_id(dim, value)) != count
+    ]
+    operations += [
+        DeleteOne({"_id": _id}) for _id in stored if _id not in expected
+    ]
+    if operations:
+        stats_collection.bulk_write(operations, ordered=False)
+    stats_collection.update_one(
+        {"_id": TOTAL_ID},
+        {"$set": {"count": total, "reconciled_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    logger.info(f"Reconciled stats: {len(operations)} counters corrected")
+    return len(operations)
+
+
+def last_reconciled(
+    stats_collection: pymongo.collection.Collection,
+) -> Optional[datetime]:
+    doc = stats_collection.find_one({"_id": TOTAL_ID}, {"reconciled_at": 1})
+    reconciled_at = (doc or {}).get("reconciled_at")
+    if reconciled_at is not None and reconciled_at.tzinfo is None:
+        # pymongo returns stored datetimes as naive UTC
+        reconciled_at = reconciled_at.replace(tzinfo=timezone.utc)
+    return reconciled_at
+
+
+def ensure_stats_indexes(stats_collection: pymongo.collection.Collection):
+    stats_collection.create_indexes(STATS_INDEXES)
+
+
+def _values(docs: Iterable[dict]) -> List[dict]:
+    return [{"_id": doc["value"], "count": doc["count"]} for doc in docs]
+
+
+def _counter_queries(top_topics: int, days: int) -> Dict[str, tuple]:
+    # Response field: dimension, sort field and limit of its counters
+    return {
+        "by_tool_source": ("tool_source", "count", 0),
+        "top_topics": ("topic", "count", top_topics),
+        "by_day": (DAY, "value", days),
+    }
+
+
+def _facet_queries(limit: int) -> Dict[str, tuple]:
+    return {
+        "topics": ("topic", "count", limit),
+        "groups": ("groups", "count", limit),
+    }
+
+
+def _counters_query(stats_collection, dim: str, sort: str, limit: int):
+    return (
+        stats_collection.find({"dim": dim, "count": {"$gt": 0}})
+        .sort(sort, pymongo.DESCENDING)
+        .limit(limit)
+    )
+
+
+def _read_counters(
+    stats_collection: pymongo.collection.Collection,
+    queries: Dict[str, tuple],
+) -> Dict[str, list]:
+    return {
+        name: _values(_counters_query(stats_collection, *query))
+        for name, query in queries.items()
+    }
+
+
+async def _aread_counters(
+    stats_collection, queries: Dict[str, tuple]
+) -> Dict[str, list]:
+    return {
+        name: _values(await _counters_query(stats_collection, *query).to_list())
+        for name, query in queries.items()
+    }
+
+
+def _stats_response(total: Optional[dict], counters: Dict[str, list]) -> dict:
+    total = total or {}
+    return {
+        "total_items": total.get("count", 0),
+        **counters,
+        "reconciled_at": total.get("reconciled_at"),
+    }
+
+
+def read_stats(
+    stats_collection: pymongo.collection.Collection,
+    top_topics: int = 10,
+    days: int = 30,
+) -> dict:
+    """
+    Stats of the collection, from the counters only.
+
+    Returns:
+        dict: `total_items`, `by_tool_source` and `top_topics` (most
+        stories first) and `by_day` (latest `days` first)
+    """
+    counters = _read_counters(
+        stats_collection, _counter_queries(top_topics, days)
+    )
+    return _stats_response(
+        stats_collection.find_one({"_id": TOTAL_ID}), counters
+    )
+
+
+async def aread_stats(
+    stats_collection, top_topics: int = 10, days: int = 30
+) -> dict:
+    """Async version of `read_stats`, for an `AsyncMongoClient` collection."""
+    counters = await _aread_counters(
+        stats_collection, _counter_queries(top_topics, days)
+    )
+    return _stats_response(
+        await stats_collection.find_one({"_id": TOTAL_ID}), counters
+    )
+
+
+def read_facets(
+    stats_collection: pymongo.collection.Collection,
+    limit: int = FACET_LIMIT,
+) -> dict:
+    """
+    Values the feed can be filtered on (`topic`, `group`), from the
+    counters only.
+
+    Returns:
+        dict: `topics` and `groups`, most stories first
+    """
+    return _read_counters(stats_collection, _facet_queries(limit))
+
+
+async def aread_facets(stats_collection, limit: int = FACET_LIMIT) -> dict:
+    """Async version of `read_facets`."""
+    return await _aread_counters(stats_collection, _facet_queries(limit))
+
+
+if __name__ == "__main__":
+    from prazo.core.db import collection, stats_collection
+
+    ensure_stats_indexes(stats_collection)
+    reconcile_stats(collection, stats_collection)
+    print(read_stats(stats_collection))
@@ -0,0 +1,167 @@
+"""
+Full-text search over the news items collection (`/api/news/search`).
+
+A search is one aggregation on the `text_search` index: matching canonical
+stories are ranked by MongoDB's text score (title matches weigh more,
+see `NEWS_INDEXES`) and paged with a keyset cursor on (score, `_id`), like
+the feed.
+
+Kept free of config imports so the API service can use it too.
+"""
+
+import html
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import pymongo
+
+from prazo.core.indexes import feed_query
+from prazo.utils.pagination import after_cursor
+
+# Most relevant first; `_id` breaks ties so the order is total
+SEARCH_SORT = [("score", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+SEARCH_SORT_FIELDS = [name for name, _ in SEARCH_SORT]
+
+SNIPPET_WORDS = 30
+
+TERM = re.compile(r"[a-z0-9]+")
+# Edge punctuation of a word, kept out of the highlight
+WORD_EDGES = re.compile(r"^(\W*)(.*?)(\W*)$", re.DOTALL)
+SUFFIXES = ("ing", "ies", "ed", "es", "s")
+
+
+def parse_date_bound(value: Optional[str], end: bool = False):
+    """
+    Read an ISO date (or datetime) bound of a date filter.
+
+    Args:
+        value: e.g. '2025-10-22' or '2025-10-22T08:00:00'
+        end: Upper bound, a bare date then covers the whole day
+
+    Raises:
+        ValueError: If the value is not an ISO date
+    """
+    if not value:
+        return None
+    bound = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        bound += timedelta(days=1) - timedelta(microseconds=1)
+    return bound
+
+
+def search_filter(
+    category: str = "all",
+    topic: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """
+    Filters applied to the text matches.
+
+    Args:
+        category: 'all', 'daily' or 'topics', as in the feed
+        topic: Only stories of this topic
+        since: Published at or after
+        until: Published at or before
+    """
+    query_filter = feed_query(category, topic).filter
+    published = {}
+    if since is not None:
+        published["$gte"] = since
+    if until is not None:
+        published["$lte"] = until
+    if published:
+        query_filter["published_date"] = published
+    return query_filter
+
+
+def search_pipeline(
+    text: str,
+    query_filter: dict,
+    projection: dict,
+    cursor_key: Optional[list],
+    limit: int,
+) -> List[dict]:
+    """
+    Aggregation returning a page of search results.
+
+    Args:
+        text: Search string (`$text` syntax: words, "phrases", -excluded)
+        query_filter: See `search_filter`
+        projection: Fields returned, a `score` field is added
+        cursor_key: Position after the previous page (`SEARCH_SORT_FIELDS`)
+        limit: Results per page; one more is returned to tell whether more
+            remain
+    """
+    pipeline = [
+        {"$match": {"$text": {"$search": text}, **query_filter}},
+        {"$project": {**projection, "score": {"$meta": "textScore"}}},
+    ]
+    if cursor_key is not None:
+        pipeline.append(
+            {"$match": after_cursor(cursor_key, SEARCH_SORT_FIELDS)}
+        )
+    pipeline += [
+        {"$sort": dict(SEARCH_SORT)},
+        {"$limit": limit + 1},
+    ]
+    return pipeline
+
+
+def _stem(word: str) -> str:
+    # Rough stand-in for the index's stemmer, for highlighting only
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def search_terms(text: str) -> List[str]:
+    """Stemmed words of a search string, without excluded (-word) ones."""
+    return [
+        _stem(term)
+        for token in text.lower().split()
+        if not token.startswith("-")
+        for term in TERM.findall(token)
+    ]
+
+
+def highlight_snippet(
+    text: str, terms: List[str], max_words: int = SNIPPET_WORDS
+) -> str:
+    """
+    Excerpt of `text` around the first matched term.
+
+    Args:
+        text: Summary of a search result
+        terms: See `search_terms`
+        max_words: Excerpt length
+
+    Returns:
+        str: HTML-escaped excerpt, matched words wrapped in `<mark>`
+    """
+    words = text.split()
+    terms = set(terms)
+
+    def matches(word: str) -> bool:
+        return _stem("".join(TERM.findall(word.lower()))) in terms
+
+    first = next((i for i, word in enumerate(words) if matches(word)), 0)
+    start = max(0, min(first - max_words // 3, len(words) - max_words))
+    excerpt = []
+    for word in words[start : start + max_words]:
+        if matches(word):
+            before, core, after = WORD_EDGES.match(word).groups()
+            excerpt.append(
+                f"{html.escape(before)}<mark>{html.escape(core)}</mark>"
+                f"{html.escape(after)}"
+            )
+        else:
+            excerpt.append(html.escape(word))
+    snippet = " ".join(excerpt)
+    if start > 0:
+        snippet = "…" + snippet
+    if start + max_words < len(words):
+        snippet += "…"
+    return snippet
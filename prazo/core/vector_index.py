@@ -0,0 +1,232 @@
+"""
+Story embeddings and the in-memory index serving semantic search.
+
+The dedup step embeds every item (`EMBEDDING_MODEL`), and the embedding is
+stored with its story as unit-length float16 bytes (`pack_embedding`, 3 KB
+for 1536 dimensions). The API keeps all of them in one NumPy matrix: a
+query is a matrix product and a partial sort, milliseconds for tens of
+thousands of stories, without a vector database.
+
+Embeddings are only set when a story is inserted, so the index catches up
+by loading documents with a newer `_id` whenever the feed version changes.
+
+Kept free of config imports so the API service can use it too.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pymongo
+from bson import Binary
+
+logger = logging.getLogger(__name__)
+
+# Shared by the agent (dedup) and the API (query embeddings): scores are
+# only meaningful within one model
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DTYPE = np.dtype("<f2")
+
+EMBEDDING_PROJECTION = {"embedding": 1}
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length (zero rows are left as they are)."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def pack_embedding(embedding: Optional[Sequence[float]]) -> Optional[Binary]:
+    """Stored form of an embedding: unit length, float16 bytes."""
+    if embedding is None or len(embedding) == 0:
+        return None
+    vector = normalize(np.asarray(embedding, dtype=np.float32))
+    return Binary(vector.astype(EMBEDDING_DTYPE).tobytes())
+
+
+def unpack_embedding(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=EMBEDDING_DTYPE).astype(np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    # Partial sort: only the k selected scores are fully sorted
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Embeddings of the stored stories, searched by cosine similarity.
+
+    Rows are appended in place (the matrix grows by doubling), so an
+    incremental refresh does not copy the index.
+    """
+
+    def __init__(self):
+        self.keys: List[Any] = []
+        self.positions: Dict[Any, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        # Newest `_id` loaded, refreshes read what came after it
+        self.last_id = None
+        self.version = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, keys: List[Any], vectors: np.ndarray):
+        """Add (or replace) the unit-length `vectors` of `keys`."""
+        if not keys:
+            return
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.empty(
+                    (max(len(keys), 1024), vectors.shape[1]), dtype=np.float32
+                )
+            for key, vector in zip(keys, vectors):
+                position = self.positions.get(key)
+                if position is None:
+                    position = len(self.keys)
+                    if position == len(self._matrix):
+                        grown = np.empty(
+                            (2 * len(self._matrix), self._matrix.shape[1]),
+                            dtype=np.float32,
+                        )
+                        grown[:position] = self._matrix
+                        self._matrix = grown
+                    self.keys.append(key)
+                    self.positions[key] = position
+                self._matrix[position] = vector
+
+    def add_documents(self, docs: Iterable[dict]) -> int:
+        """Add `{_id, embedding}` documents, in `_id` order."""
+        keys, vectors = [], []
+        for doc in docs:
+            self.last_id = doc["_id"]
+            embedding = doc.get("embedding")
+            if not embedding:
+                continue
+            vector = unpack_embedding(embedding)
+            if (
+                self._matrix is not None
+                and len(vector) != self._matrix.shape[1]
+            ):
+                logger.warning(
+                    f"Skipping embedding of {doc['_id']}: wrong size"
+                )
+                continue
+            keys.append(doc["_id"])
+            vectors.append(vector)
+        if keys:
+            self.add(keys, np.stack(vectors))
+        return len(keys)
+
+    def vector(self, key: Any) -> Optional[np.ndarray]:
+        with self._lock:
+            position = self.positions.get(key)
+            return None if position is None else self._matrix[position].copy()
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        exclude: Optional[Set[Any]] = None,
+    ) -> List[List[Tuple[Any, float]]]:
+        """
+        Most similar stories of each query.
+
+        Args:
+            queries: One unit-length query vector per row, scored together
+            k: Results per query
+            exclude: Keys never returned (e.g. the story itself)
+
+        Returns:
+            List[List[Tuple[Any, float]]]: (key, cosine similarity) pairs
+            per query, most similar first
+        """
+        with self._lock:
+            size = len(self.keys)
+            if not size:
+                return [[] for _ in queries]
+            # Appends go past `size` (or into a new matrix): a consistent view
+            matrix = self._matrix[:size]
+            keys = self.keys[:size]
+            excluded = [
+                self.positions[key]
+                for key in exclude or ()
+                if key in self.positions
+            ]
+
+        scores = np.atleast_2d(queries).astype(np.float32) @ matrix.T
+        if excluded:
+            scores[:, excluded] = -np.inf
+        results = []
+        for row in scores:
+            best = top_k(row, min(k, size - len(excluded)))
+            results.append([(keys[i], float(row[i])) for i in best])
+        return results
+
+    def _query(self) -> dict:
+        query = {"embedding": {"$exists": True}}
+        if self.last_id is not None:
+            query["_id"] = {"$gt": self.last_id}
+        return query
+
+    def refresh(self, collection: pymongo.collection.Collection, version: int):
+        """Load the embeddings stored since the last refresh."""
+        if version == self.version:
+            return
+        with self._refresh_lock:
+            if version == self.version:
+                return
+            try:
+                added = self.add_documents(
+                    collection.find(self._query(), EMBEDDING_PROJECTION).sort(
+                        "_id", pymongo.ASCENDING
+                    )
+                )
+                self.version = version
+                if added:
+                    logger.info(
+                        f"Vector index: {added} added, {len(self)} total"
+                    )
+            except Exception as e:
+                # Keep serving the stories already loaded
+                logger.error(f"Failed to refresh the vector index: {e}")
+
+
+class AsyncVectorIndex(VectorIndex):
+    """
+    `VectorIndex` loaded through an async collection (`AsyncMongoClient`),
+    use `arefresh` from the event loop.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._refresh_lock = asyncio.Lock()
+
+    async def arefresh(self, collection, version: int):
+        if version == self.version:
+            return
+        async with self._refresh_lock:
+            if version == self.version:
+                return
+            try:
+                cursor = collection.find(
+                    self._query(), EMBEDDING_PROJECTION
+                ).sort("_id", pymongo.ASCENDING)
+                added = self.add_documents(await cursor.to_list())
+                self.version = version
+                if added:
+                    logger.info(
+                        f"Vector index: {added} added, {len(self)} total"
+                    )
+            except Exception as e:
+                logger.error(f"Failed to refresh the vector index: {e}")
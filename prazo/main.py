@@ -1,6 +1,7 @@
 """Initiate Reactive Agent"""
 
 import asyncio
+from datetime import timedelta
 from typing import List, Literal
 
 import yaml
@@ -161,26 +162,52 @@ def route_to_next_topic(
         return Command(goto="parse_news_items", update=updates)
 
 
-def save_collections(state: MainNewsAgentState) -> MainNewsAgentState:
+async def save_collections(state: MainNewsAgentState) -> MainNewsAgentState:
     """Save the collected news items to database."""
-    from prazo.core.db import save_news_items
+    from prazo.core.async_db import asave_news_items
+    from prazo.core.db import save_feed_states
 
     # Save to MongoDB
-    saved_count = save_news_items(state.news_collections)
+    saved_count = await asave_news_items(state.news_collections)
     logger.info(f"Saved {saved_count} news items to database")
+    # Only now may the next poll of a feed skip what this crawl read
+    await asyncio.to_thread(save_feed_states, state.feed_states)
 
     return {"current_step": "collections_saved"}
 
 
-def parse_news_items(state: MainNewsAgentState) -> MainNewsAgentState:
+async def export_feed_snapshot(state: MainNewsAgentState) -> MainNewsAgentState:
+    """Write the static feed snapshot of the saved stories."""
+    if not config.FEED_EXPORT_DIR:
+        return {"current_step": "feed_export_skipped"}
+
+    from prazo.core.db import collection
+    from prazo.core.feed_export import export_feed
+
+    try:
+        await asyncio.to_thread(
+            export_feed,
+            collection,
+            config.FEED_EXPORT_DIR,
+            config.FEED_EXPORT_PAGES,
+            config.FEED_EXPORT_PAGE_SIZE,
+        )
+    except Exception as e:
+        # The API still serves the feed, readers only miss the snapshot
+        logger.error(f"Failed to export the feed snapshot: {e}")
+    return {"current_step": "feed_exported"}
+
+
+async def parse_news_items(state: MainNewsAgentState) -> MainNewsAgentState:
     """Parse the daily news items from news channels"""
     previous_news_items = state.news_collections
     source_service = SourceService()
-    daily_news_items = source_service.fetch_and_parse()
+    daily_news_items = await source_service.afetch_and_parse()
     all_news_items = previous_news_items + daily_news_items
     return {
         "current_step": "daily_news_items_parsed",
         "news_collections": all_news_items,
+        "feed_states": source_service.feed_states(),
     }
 
 
@@ -371,13 +398,15 @@ def create_main_news_agent():
     builder.add_node("parse_news_items", parse_news_items)
     builder.add_node("deduplicate_collections", deduplicate_collections)
     builder.add_node("save_collections", save_collections)
+    builder.add_node("export_feed_snapshot", export_feed_snapshot)
 
     builder.set_entry_point("load_topics")
     builder.add_edge("load_topics", "route_to_next_topic")
     builder.add_edge("process_topic", "route_to_next_topic")
     builder.add_edge("parse_news_items", "deduplicate_collections")
     builder.add_edge("deduplicate_collections", "save_collections")
-    builder.add_edge("save_collections", END)
+    builder.add_edge("save_collections", "export_feed_snapshot")
+    builder.add_edge("export_feed_snapshot", END)
 
     return builder
 
@@ -403,12 +432,19 @@ graph = (
 
 async def run_graph():
     # Initialize database (create indexes)
-    from prazo.core.db import initialize_database
+    from prazo.core.async_db import ainitialize_database
+    from prazo.core.db import load_url_filter, reconcile_news_stats
 
-    initialize_database()
+    await ainitialize_database()
+    # Answer most URL existence checks in-process
+    await asyncio.to_thread(load_url_filter)
 
     initial_state = {"messages": []}
     await graph.ainvoke(initial_state)
+    # Correct any drift of the stats counters once in a while
+    await asyncio.to_thread(
+        reconcile_news_stats, timedelta(hours=config.STATS_RECONCILE_HOURS)
+    )
     # logger.info(result)
 
 
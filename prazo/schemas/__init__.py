@@ -1,4 +1,11 @@
 from .article import Article
+from .feed_state import FeedState
 from .state import MainNewsAgentState, NewsCollectionOutput, NewsItem
 
-__all__ = ["Article", "MainNewsAgentState", "NewsCollectionOutput", "NewsItem"]
+__all__ = [
+    "Article",
+    "FeedState",
+    "MainNewsAgentState",
+    "NewsCollectionOutput",
+    "NewsItem",
+]
@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class FeedState(BaseModel):
+    """HTTP validators of a polled feed and the entries read from it"""
+
+    feed_url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    urls: List[str] = Field(
+        default_factory=list,
+        description="Canonical URLs of the entries read from the response",
+    )
+    complete: bool = Field(
+        default=True,
+        description="False when `max_articles` left entries of the feed out",
+    )
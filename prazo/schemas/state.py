@@ -3,9 +3,12 @@ from typing import Annotated, List, Optional, Sequence
 
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+from pydantic.json_schema import SkipJsonSchema
 
 from prazo.core.config import config
+from prazo.schemas.feed_state import FeedState
+from prazo.utils.urls import canonicalize_urls
 
 
 class NewsItem(BaseModel):
@@ -44,6 +47,17 @@ class NewsItem(BaseModel):
         description="Timestamp when the news item was last updated",
         default_factory=datetime.now,
     )
+    # Set by the dedup step and stored compactly with the story (see
+    # `prazo.core.vector_index`), not part of the LLM output schema
+    embedding: SkipJsonSchema[Optional[List[float]]] = Field(
+        default=None, exclude=True, repr=False
+    )
+
+    @field_validator("sources")
+    @classmethod
+    def canonicalize_sources(cls, sources: List[str]) -> List[str]:
+        """Store sources in canonical form, without duplicates."""
+        return canonicalize_urls(sources)
 
 
 class NewsCollectionOutput(BaseModel):
@@ -73,6 +87,10 @@ class MainNewsAgentState(BaseModel):
     news_collections: List[NewsItem] = Field(
         default_factory=list, description="News collections for each topic"
     )
+    feed_states: List[FeedState] = Field(
+        default_factory=list,
+        description="Feeds polled by the crawl, their validators are stored once the news items are saved",
+    )
     current_news_items: List[NewsItem] = Field(
         default_factory=list,
         description="Current topic news items from reactive agent",
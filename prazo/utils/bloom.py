@@ -0,0 +1,139 @@
+"""Bloom filter for fast, in-process set membership checks"""
+
+import hashlib
+import math
+import os
+import struct
+import time
+from typing import Iterable
+
+MAGIC = b"PBLM"
+VERSION = 1
+# magic, version, bit count, hash count, item count, capacity, synced_at
+HEADER = struct.Struct("<4sIQIQQd")
+
+
+class BloomFilter:
+    """
+    Probabilistic set: `item in bloom` is never a false negative and is a
+    false positive with probability ~`error_rate` while at most `capacity`
+    items have been added.
+
+    Args:
+        capacity: Number of items the filter is sized for
+        error_rate: Target false positive rate at capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        # Wall clock time the filter was last brought up to date (epoch secs)
+        self.synced_at = 0.0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        new = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        """Approximate number of distinct items added."""
+        return self.count
+
+    @property
+    def is_full(self) -> bool:
+        """Past capacity the false positive rate exceeds `error_rate`."""
+        return self.count >= self.capacity
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.num_bits,
+            self.num_hashes,
+            self.count,
+            self.capacity,
+            self.synced_at,
+        )
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """
+        Rebuild a filter serialized by `to_bytes`.
+
+        Raises:
+            ValueError: If the data is not a (complete) serialized filter
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("Truncated bloom filter")
+        magic, version, num_bits, num_hashes, count, capacity, synced_at = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a bloom filter")
+        bits = bytearray(data[HEADER.size :])
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError("Truncated bloom filter")
+
+        bloom = cls.__new__(cls)
+        bloom.capacity = capacity
+        bloom.num_bits = num_bits
+        bloom.num_hashes = num_hashes
+        bloom.bits = bits
+        bloom.count = count
+        bloom.synced_at = synced_at
+        return bloom
+
+    def save(self, path: str) -> None:
+        """Write the filter to `path` atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self.to_bytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        """
+        Read a filter written by `save`.
+
+        Raises:
+            ValueError: If the file is not a (complete) saved filter
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        try:
+            return cls.from_bytes(data)
+        except ValueError as e:
+            raise ValueError(f"{e}: {path}") from e
+
+    def mark_synced(self) -> None:
+        self.synced_at = time.time()
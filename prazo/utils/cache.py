@@ -0,0 +1,224 @@
+"""In-memory response cache with version invalidation and single-flight"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+HIT = "HIT"
+MISS = "MISS"
+# Waited for a concurrent miss of the same key instead of computing it
+COALESCED = "COALESCED"
+
+
+@dataclass
+class _Entry:
+    value: Any
+    version: int
+    expires_at: float
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """
+    LRU cache of computed values (e.g. serialized responses).
+
+    An entry is served while it is younger than `ttl` and was computed
+    from the current data `version`. Concurrent misses of the same key are
+    collapsed: one caller computes, the others wait for its result. Use
+    `get_or_compute` from threads and `aget_or_compute` from an event loop.
+
+    Args:
+        max_entries: Entries kept, least recently used ones are evicted
+        ttl: Seconds an entry is served, whatever the version
+        clock: Monotonic clock, in seconds
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: dict = {}
+        self._async_flights: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._seconds = {HIT: 0.0, MISS: 0.0, COALESCED: 0.0}
+
+    def get_or_compute(
+        self, key: Hashable, version: int, compute: Callable[[], Any]
+    ) -> Tuple[Any, str]:
+        """
+        Cached value of `key` at `version`, computed if needed.
+
+        Errors raised by `compute` are passed to every waiting caller and
+        nothing is cached.
+
+        Returns:
+            Tuple[Any, str]: Value and how it was served (`HIT`, `MISS` or
+            `COALESCED`)
+        """
+        started = time.perf_counter()
+        with self._lock:
+            value = self._lookup(key, version, started)
+            if value is not None:
+                return value[0], HIT
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+            self._count_miss(leader)
+
+        if not leader:
+            flight.done.wait()
+            self._record(COALESCED, started)
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, COALESCED
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            self._store(key, version, flight.value)
+        finally:
+            with self._lock:
+                del self._flights[(key, version)]
+            flight.done.set()
+            self._record(MISS, started)
+        return flight.value, MISS
+
+    async def aget_or_compute(
+        self,
+        key: Hashable,
+        version: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, str]:
+        """Async version of `get_or_compute`, for callers on one event loop."""
+        started = time.perf_counter()
+        with self._lock:
+            value = self._lookup(key, version, started)
+            if value is not None:
+                return value[0], HIT
+            flight = self._async_flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = asyncio.get_running_loop().create_future()
+                self._async_flights[(key, version)] = flight
+            self._count_miss(leader)
+
+        if not leader:
+            try:
+                # Shielded: a waiter giving up must not cancel the leader
+                return await asyncio.shield(flight), COALESCED
+            finally:
+                self._record(COALESCED, started)
+
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Retrieved, so an error nobody waited for is not reported
+            flight.exception()
+            raise
+        else:
+            self._store(key, version, value)
+            flight.set_result(value)
+        finally:
+            with self._lock:
+                del self._async_flights[(key, version)]
+            self._record(MISS, started)
+        return value, MISS
+
+    def _lookup(
+        self, key: Hashable, version: int, started: float
+    ) -> Optional[Tuple[Any]]:
+        # Caller holds the lock; a hit is returned in a tuple, values may
+        # be None
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or entry.version != version
+            or entry.expires_at <= self.clock()
+        ):
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._seconds[HIT] += time.perf_counter() - started
+        return (entry.value,)
+
+    def _count_miss(self, leader: bool):
+        # Caller holds the lock
+        if leader:
+            self.misses += 1
+        else:
+            self.coalesced += 1
+
+    def _store(self, key: Hashable, version: int, value: Any):
+        with self._lock:
+            self._entries[key] = _Entry(value, version, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _record(self, status: str, started: float):
+        with self._lock:
+            self._seconds[status] += time.perf_counter() - started
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit ratio, counters and mean latency (ms) per way of serving."""
+        with self._lock:
+            counts = {
+                HIT: self.hits,
+                MISS: self.misses,
+                COALESCED: self.coalesced,
+            }
+            requests = sum(counts.values())
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "requests": requests,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                # Coalesced requests were served without a query of their own
+                "hit_ratio": (
+                    (self.hits + self.coalesced) / requests if requests else 0.0
+                ),
+                "mean_latency_ms": {
+                    status.lower(): (
+                        self._seconds[status] / counts[status] * 1000
+                        if counts[status]
+                        else 0.0
+                    )
+                    for status in counts
+                },
+            }
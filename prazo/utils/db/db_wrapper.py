@@ -4,8 +4,16 @@ from typing import List, Set
 
 from pydantic import BaseModel
 
+from prazo.core.async_db import acheck_urls_exist
 from prazo.core.db import check_urls_exist
 from prazo.core.logger import logger
+from prazo.utils.urls import canonicalize_urls
+
+NO_URLS_RESULT = {
+    "existing_urls": [],
+    "new_urls": [],
+    "message": "No URLs provided to check",
+}
 
 
 class DatabaseAPIWrapper(BaseModel):
@@ -14,27 +22,8 @@ class DatabaseAPIWrapper(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
-    def check_urls(self, urls: List[str]) -> dict:
-        """
-        Check which URLs from the provided list already exist in the database.
-
-        Args:
-            urls: List of URLs to check against the database
-
-        Returns:
-            dict: Contains 'existing_urls', 'new_urls', and 'message'
-        """
-        if not urls:
-            return {
-                "existing_urls": [],
-                "new_urls": [],
-                "message": "No URLs provided to check",
-            }
-
-        logger.info(f"Checking {len(urls)} URLs against database")
-
-        # Get URLs that exist in database
-        existing_urls: Set[str] = check_urls_exist(urls)
+    @staticmethod
+    def _build_result(urls: List[str], existing_urls: Set[str]) -> dict:
         existing_urls_list = list(existing_urls)
 
         # Get URLs that don't exist (new URLs)
@@ -49,22 +38,44 @@ class DatabaseAPIWrapper(BaseModel):
             "message": message,
         }
 
-    def run(self, query: str) -> str:
+    def check_urls(self, urls: List[str]) -> dict:
         """
-        Run the database check for URLs provided in the query.
+        Check which URLs from the provided list already exist in the database.
+
+        URLs are canonicalized first, so spellings of the same article are
+        reported (and later saved) once.
 
         Args:
-            query: Comma-separated list of URLs or single URL
+            urls: List of URLs to check against the database
 
         Returns:
-            str: Formatted result message
+            dict: Contains 'existing_urls', 'new_urls', and 'message'
         """
-        # Parse URLs from query (comma-separated)
-        urls = [url.strip() for url in query.split(",") if url.strip()]
+        urls = canonicalize_urls(urls)
+        if not urls:
+            return dict(NO_URLS_RESULT)
+
+        logger.info(f"Checking {len(urls)} URLs against database")
+
+        # Get URLs that exist in database
+        return self._build_result(urls, check_urls_exist(urls))
+
+    async def acheck_urls(self, urls: List[str]) -> dict:
+        """Async version of `check_urls`, does not block the event loop."""
+        urls = canonicalize_urls(urls)
+        if not urls:
+            return dict(NO_URLS_RESULT)
 
-        result = self.check_urls(urls)
+        logger.info(f"Checking {len(urls)} URLs against database")
+        return self._build_result(urls, await acheck_urls_exist(urls))
+
+    @staticmethod
+    def _parse_query(query: str) -> List[str]:
+        # Parse URLs from query (comma-separated)
+        return [url.strip() for url in query.split(",") if url.strip()]
 
-        # Format response
+    @staticmethod
+    def _format_result(result: dict) -> str:
         response = f"{result['message']}\n"
         if result["existing_urls"]:
             response += f"\nExisting URLs (skip these):\n"
@@ -77,3 +88,21 @@ class DatabaseAPIWrapper(BaseModel):
                 response += f"  - {url}\n"
 
         return response.strip()
+
+    def run(self, query: str) -> str:
+        """
+        Run the database check for URLs provided in the query.
+
+        Args:
+            query: Comma-separated list of URLs or single URL
+
+        Returns:
+            str: Formatted result message
+        """
+        return self._format_result(self.check_urls(self._parse_query(query)))
+
+    async def arun(self, query: str) -> str:
+        """Async version of `run`."""
+        return self._format_result(
+            await self.acheck_urls(self._parse_query(query))
+        )
@@ -4,13 +4,14 @@ from typing import List
 import numpy as np
 
 from prazo.core.logger import logger
+from prazo.core.vector_index import EMBEDDING_MODEL
 from prazo.schemas import NewsItem
 from prazo.utils.chat_models import ChatModel, EmbeddingModel
 
 
 def get_embeddings(combined_articles: List[str]) -> List[List[float]]:
     embedding_model = EmbeddingModel(
-        provider="openai", model_name="text-embedding-3-small"
+        provider="openai", model_name=EMBEDDING_MODEL
     ).get_model()
     embeddings = embedding_model.embed_documents(combined_articles)
     return embeddings
@@ -102,8 +103,9 @@ def merge_two_articles(article1: NewsItem, article2: NewsItem) -> NewsItem:
                 # Continue building summary if it spans multiple lines
                 merged_summary += " " + line
 
-        # Combine sources from both items and remove duplicates
-        all_sources = list(set(article1.sources + article2.sources))
+        # Combine sources from both items and remove duplicates, keeping the
+        # order so the primary (first) source stays stable for the story key
+        all_sources = list(dict.fromkeys(article1.sources + article2.sources))
 
         # Combine topics and tool_sources from both items and remove duplicates
         all_topics = list(set(article1.topic + article2.topic))
@@ -149,7 +151,7 @@ def merge_two_articles(article1: NewsItem, article2: NewsItem) -> NewsItem:
         return NewsItem(
             title=article1.title,  # Use first article's title as fallback
             summary=f"{article1.summary}\n\n{article2.summary}",
-            sources=list(set(article1.sources + article2.sources)),
+            sources=list(dict.fromkeys(article1.sources + article2.sources)),
             published_date=article1.published_date or article2.published_date,
             topic=list(set(article1.topic + article2.topic)),
             groups=list(set(article1.groups + article2.groups)),
@@ -216,7 +218,7 @@ def deduplicate(articles: List[NewsItem]) -> List[NewsItem]:
     logger.info(f"Starting deduplication for {len(articles)} articles")
 
     # If no articles, return empty list
-    if len(articles) == 0 or len(articles) == 1:
+    if len(articles) == 0:
         logger.info(f"No articles to deduplicate")
         return articles
 
@@ -225,14 +227,22 @@ def deduplicate(articles: List[NewsItem]) -> List[NewsItem]:
         combine_article(article) for article in articles
     ]
 
-    # Generate embeddings
+    # Generate embeddings, also stored with each story for semantic search
     embeddings: List[List[float]] = get_embeddings(combined_articles)
+    for article, embedding in zip(articles, embeddings):
+        article.embedding = embedding
 
     # Compare embeddings to find similar articles
     similar_articles: List[List[int]] = compare_embeddings(embeddings)
 
     # Merge similar articles
     deduplicated_articles = merge_similar_articles(articles, similar_articles)
+    for article, indices in zip(deduplicated_articles, similar_articles):
+        if len(indices) > 1:
+            # A merged story stands for all of its articles
+            article.embedding = np.mean(
+                [embeddings[i] for i in indices], axis=0
+            ).tolist()
 
     # Return merged articles in form of NewsItem
     logger.info(
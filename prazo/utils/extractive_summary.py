@@ -0,0 +1,127 @@
+"""Extractive (TextRank) summarisation - no LLM calls"""
+
+import re
+from typing import List
+
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[]?[A-Z0-9])")
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+MIN_SENTENCE_WORDS = 5
+
+_STOPWORDS = """
+    a about above after again against all also am an and any are as at be
+    because been before being below between both but by can could did do does
+    doing down during each few for from further had has have having he her here
+    hers herself him himself his how i if in into is it its itself just me more
+    most my myself no nor not now of off on once only or other our ours
+    ourselves out over own said same she should so some such than that the
+    their theirs them themselves then there these they this those through to
+    too under until up very was we were what when where which while who whom
+    why will with would you your yours yourself yourselves
+    """
+STOPWORDS = frozenset(_STOPWORDS.split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, dropping fragments that are too short."""
+    sentences = []
+    for paragraph in text.split("\n"):
+        for sentence in SENTENCE_BOUNDARY.split(paragraph.strip()):
+            sentence = sentence.strip()
+            if len(sentence.split()) >= MIN_SENTENCE_WORDS:
+                sentences.append(sentence)
+    return sentences
+
+
+def sentence_vectors(sentences: List[str]) -> np.ndarray:
+    """L2-normalised TF-IDF vectors, one row per sentence."""
+    tokens = [
+        [w for w in WORD.findall(s.lower()) if w not in STOPWORDS]
+        for s in sentences
+    ]
+    vocab = {}
+    for words in tokens:
+        for word in words:
+            vocab.setdefault(word, len(vocab))
+
+    tf = np.zeros((len(sentences), max(len(vocab), 1)))
+    for row, words in enumerate(tokens):
+        for word in words:
+            tf[row, vocab[word]] += 1
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def textrank_scores(
+    vectors: np.ndarray,
+    damping: float = 0.85,
+    max_iter: int = 50,
+    tol: float = 1e-6,
+) -> np.ndarray:
+    """
+    PageRank over the sentence similarity graph.
+
+    The teleport vector is biased towards early sentences, news articles
+    put the key facts first.
+    """
+    n = vectors.shape[0]
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no words with any other sentence jump uniformly
+    transition = np.where(
+        row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1), 1 / n
+    )
+
+    teleport = 1 / np.arange(1, n + 1)
+    teleport /= teleport.sum()
+
+    scores = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        updated = (1 - damping) * teleport + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def textrank_summary(text: str, max_words: int = 150) -> str:
+    """
+    Build a summary from the highest ranked sentences of `text`.
+
+    Args:
+        text: Article text (e.g. trafilatura output)
+        max_words: Approximate length of the summary
+
+    Returns:
+        str: Selected sentences in their original order
+    """
+    if not text:
+        return ""
+    sentences = split_sentences(text)
+    if not sentences:
+        return " ".join(text.split()[:max_words])
+    if len(sentences) <= 2:
+        return " ".join(" ".join(sentences).split()[:max_words])
+
+    scores = textrank_scores(sentence_vectors(sentences))
+
+    selected = []
+    words = 0
+    for idx in np.argsort(-scores, kind="stable"):
+        length = len(sentences[idx].split())
+        if selected and words + length > max_words:
+            continue
+        selected.append(idx)
+        words += length
+        if words >= max_words:
+            break
+
+    return " ".join(sentences[idx] for idx in sorted(selected))
@@ -0,0 +1,195 @@
+"""
+Pre-encoded HTTP response bodies: strong ETag, Last-Modified and the body
+compressed once per supported content coding, so cached responses are
+served (or answered with 304) without re-serializing or re-compressing.
+
+Brotli is used when the `brotli` package is installed, gzip otherwise.
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as is, compression would not pay off
+MIN_COMPRESS_SIZE = 1024
+
+# Preferred coding first
+ENCODINGS = (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+@dataclass
+class EncodedBody:
+    """
+    Response body with its validators and compressed variants.
+
+    Args:
+        body: Uncompressed body
+        etag: Opaque tag of the uncompressed body (without quotes)
+        last_modified: When the data behind the body last changed
+        encoded: Compressed body per content coding
+    """
+
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        return self.body if encoding is None else self.encoded[encoding]
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """Quoted strong ETag; each content coding gets its own."""
+        if encoding is None:
+            return f'"{self.etag}"'
+        return f'"{self.etag}-{encoding}"'
+
+
+def encode_body(
+    body: bytes, last_modified: Optional[datetime] = None
+) -> EncodedBody:
+    """Tag `body` by its content and compress it for every coding."""
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    encoded = {}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoded = {
+            encoding: _compress(body, encoding) for encoding in ENCODINGS
+        }
+    return EncodedBody(body, etag, last_modified, encoded)
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str], available: List[str]
+) -> Optional[str]:
+    """
+    Content coding to send, given the request's `Accept-Encoding`.
+
+    Args:
+        accept_encoding: Header value (`None` if absent)
+        available: Codings the body exists in, preferred first
+
+    Returns:
+        Optional[str]: Chosen coding, `None` for the uncompressed body
+    """
+    if not accept_encoding or not available:
+        return None
+
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    def quality(encoding: str) -> float:
+        return qualities.get(encoding, qualities.get("*", 0.0))
+
+    best = max(available, key=quality)
+    return best if quality(best) > 0 else None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an `If-None-Match` header matches a body tagged `etag`, in any
+    of its content codings (weak comparison, as the header requires).
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == etag or tag.rsplit("-", 1)[0] == etag:
+            return True
+    return False
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Aware UTC datetime. Naive values are taken as UTC, which is how pymongo
+    returns stored datetimes, aware ones are converted.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        date = parsedate_to_datetime(value) if value else None
+    except (TypeError, ValueError):
+        return None
+    return as_utc(date) if date is not None else None
+
+
+def conditional_response(
+    page: EncodedBody, request_headers: Mapping[str, str]
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Answer a request for `page`: 304 if the client already has it (ETag,
+    or else Last-Modified), compressed if the client accepts it.
+
+    Args:
+        page: Body to send
+        request_headers: Request headers (case-insensitive mapping)
+
+    Returns:
+        Tuple[int, Dict[str, str], bytes]: Status, headers and body
+    """
+    encoding = negotiate_encoding(
+        request_headers.get("Accept-Encoding"), list(page.encoded)
+    )
+    headers = {
+        "ETag": page.variant_etag(encoding),
+        "Vary": "Accept-Encoding",
+        # Clients may keep the body but must revalidate it
+        "Cache-Control": "no-cache",
+    }
+    last_modified = None
+    if page.last_modified is not None:
+        last_modified = as_utc(page.last_modified).replace(microsecond=0)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if "If-None-Match" in request_headers:
+        # Takes precedence over If-Modified-Since
+        not_modified = etag_matches(request_headers["If-None-Match"], page.etag)
+    else:
+        if_modified_since = _parse_http_date(
+            request_headers.get("If-Modified-Since")
+        )
+        not_modified = (
+            last_modified is not None
+            and if_modified_since is not None
+            and last_modified <= if_modified_since
+        )
+    if not_modified:
+        return 304, headers, b""
+
+    headers["Content-Type"] = "application/json"
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return 200, headers, page.variant(encoding)
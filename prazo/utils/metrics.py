@@ -0,0 +1,330 @@
+"""
+In-process metrics exposed in the Prometheus text format (`/api/metrics`).
+
+Counters, gauges and histograms are plain numbers behind a lock, updated
+inline by the code they measure: an update costs a dict lookup and a
+bisect, without a client library. `MongoMetrics` is a pymongo event
+listener timing every command and tracking the connection pool; the
+commands run while serving a request are also added to that request's
+`RequestStats` (a context variable, so per thread in Flask and per task in
+aiohttp).
+
+Every series carries the `Registry`'s constant labels, e.g. the worker
+process, so the series of workers sharing a port do not mix.
+"""
+
+import bisect
+import contextvars
+import math
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; requests are mostly served from memory, in milliseconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+class Metric:
+    """A named family of series, one per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """(name suffix, labels, value) of every series."""
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield "", self._labels(labels), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def add(self, amount: float, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Histogram(Metric):
+    """
+    Counts of observations per bucket (upper bound), with their sum.
+
+    Args:
+        buckets: Increasing upper bounds, `+Inf` is added
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str):
+        # Index of the first bound >= value, past the last one for +Inf
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][position] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._values.items()
+            ]
+        for labels, counts, total in values:
+            names = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket = {**names, "le": _format_value(bound)}
+                yield "_bucket", bucket, cumulative
+            yield "_sum", names, total
+            yield "_count", names, cumulative
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(v))}"' for name, v in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """
+    Metrics of a process, rendered for a scrape.
+
+    Args:
+        const_labels: Labels added to every series
+    """
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self.const_labels = const_labels or {}
+        self.metrics: List[Metric] = []
+        self.collectors: Dict[str, Callable[[], Iterable[Metric]]] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def set_collector(
+        self, name: str, collector: Callable[[], Iterable[Metric]]
+    ):
+        """Add (or replace) metrics built at each scrape, e.g. from a
+        component's own counters."""
+        self.collectors[name] = collector
+
+    def render(self) -> bytes:
+        """All series in the Prometheus text exposition format."""
+        metrics = list(self.metrics)
+        for collector in self.collectors.values():
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                labels = _format_labels({**self.const_labels, **labels})
+                lines.append(
+                    f"{metric.name}{suffix}{labels} {_format_value(value)}"
+                )
+        return ("\n".join(lines) + "\n").encode()
+
+
+@dataclass
+class RequestStats:
+    """MongoDB work done while serving one request"""
+
+    db_seconds: float = 0.0
+    db_queries: int = 0
+    documents_returned: int = 0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = (
+    contextvars.ContextVar("request_stats", default=None)
+)
+
+
+def start_request() -> RequestStats:
+    """Count the MongoDB commands of the current request (thread or task)."""
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def returned_documents(reply: dict) -> int:
+    """Documents in the cursor batch of a command reply (find, aggregate)."""
+    cursor = reply.get("cursor")
+    if not isinstance(cursor, dict):
+        return 0
+    return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+
+
+class MongoMetrics(
+    monitoring.CommandListener, monitoring.ConnectionPoolListener
+):
+    """
+    pymongo listener (`event_listeners=[...]`) recording command latency
+    and connection pool usage into a registry.
+    """
+
+    def __init__(self, registry: Registry, prefix: str):
+        self.commands = registry.register(
+            Histogram(
+                f"{prefix}_mongodb_command_duration_seconds",
+                "MongoDB command latency",
+                ["command"],
+            )
+        )
+        self.command_failures = registry.register(
+            Counter(
+                f"{prefix}_mongodb_command_failures_total",
+                "MongoDB commands that failed",
+                ["command"],
+            )
+        )
+        self.connections = registry.register(
+            Gauge(
+                f"{prefix}_mongodb_pool_connections",
+                "Connections of the MongoDB pool, open and checked out",
+                ["state"],
+            )
+        )
+        self.checkout_wait = registry.register(
+            Histogram(
+                f"{prefix}_mongodb_pool_checkout_seconds",
+                "Time waited for a pooled connection",
+            )
+        )
+        self.checkout_failures = registry.register(
+            Counter(
+                f"{prefix}_mongodb_pool_checkout_failures_total",
+                "Connection checkouts that failed (e.g. wait queue timeout)",
+                ["reason"],
+            )
+        )
+        self.connections.set(0, "open")
+        self.connections.set(0, "in_use")
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1e6
+        self.commands.observe(seconds, event.command_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_seconds += seconds
+            stats.db_queries += 1
+            stats.documents_returned += returned_documents(event.reply)
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1e6
+        self.commands.observe(seconds, event.command_name)
+        self.command_failures.inc(event.command_name)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_seconds += seconds
+            stats.db_queries += 1
+
+    def connection_created(self, event):
+        self.connections.add(1, "open")
+
+    def connection_closed(self, event):
+        self.connections.add(-1, "open")
+
+    def connection_checked_out(self, event):
+        self.connections.add(1, "in_use")
+        self.checkout_wait.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        self.connections.add(-1, "in_use")
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures.inc(str(event.reason))
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
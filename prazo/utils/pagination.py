@@ -0,0 +1,105 @@
+"""
+Keyset (cursor) pagination over the feed order `FEED_SORT`.
+
+A cursor is an opaque token holding the sort key of the last document of a
+page, and the next page is a range query from that key on the feed index.
+Every page costs the same, however deep, unlike `skip`. Other orders
+(e.g. search relevance) pass their own, all descending, sort fields.
+
+Duplicates are marked at write time, so a page is a single query and the
+cursor is all the state a client needs: the API keeps none and can run
+several workers/replicas.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from bson import ObjectId
+
+from prazo.core.indexes import FEED_SORT
+
+FEED_SORT_FIELDS = [name for name, _ in FEED_SORT]
+
+
+class InvalidCursor(ValueError):
+    """Cursor token that was not produced by `encode_cursor`"""
+
+
+def _encode_value(value: Any) -> list:
+    if isinstance(value, datetime):
+        return ["d", value.isoformat()]
+    if isinstance(value, ObjectId):
+        return ["o", str(value)]
+    return ["v", value]
+
+
+def _decode_value(tagged: list) -> Any:
+    tag, value = tagged
+    if tag == "d":
+        return datetime.fromisoformat(value)
+    if tag == "o":
+        return ObjectId(value)
+    return value
+
+
+def encode_cursor(doc: dict, fields: List[str] = FEED_SORT_FIELDS) -> str:
+    """Opaque cursor pointing just after `doc` in the order of `fields`."""
+    key = [_encode_value(doc.get(name)) for name in fields]
+    payload = json.dumps(key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    token: str, fields: List[str] = FEED_SORT_FIELDS
+) -> List[Any]:
+    """
+    Sort key stored in a cursor.
+
+    Raises:
+        InvalidCursor: If the token is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        key = [_decode_value(tagged) for tagged in json.loads(payload)]
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {token}") from e
+    if len(key) != len(fields):
+        raise InvalidCursor(f"Invalid cursor: {token}")
+    return key
+
+
+def after_cursor(key: List[Any], fields: List[str] = FEED_SORT_FIELDS) -> dict:
+    """
+    Filter for documents after `key` in the (all descending) order of
+    `fields`.
+
+    Each `$or` branch is a range on a prefix of the feed index, so the
+    planner merges index scans instead of sorting.
+    """
+    branches = []
+    for i, (name, value) in enumerate(zip(fields, key)):
+        equal = dict(zip(fields[:i], key[:i]))
+        if value is None:
+            # Nothing sorts below null/missing
+            continue
+        branches.append({**equal, name: {"$lt": value}})
+        if i < len(fields) - 1:
+            # Null/missing values sort after every dated document, and a
+            # $lt on a date does not match them
+            branches.append({**equal, name: None})
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}
+
+
+def page_filter(
+    query_filter: dict,
+    cursor_key: Optional[List[Any]],
+    fields: List[str] = FEED_SORT_FIELDS,
+) -> dict:
+    """Combine a feed filter with the position of a cursor."""
+    if cursor_key is None:
+        return query_filter
+    if not query_filter:
+        return after_cursor(cursor_key, fields)
+    return {"$and": [query_filter, after_cursor(cursor_key, fields)]}
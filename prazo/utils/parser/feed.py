@@ -0,0 +1,133 @@
+"""Streaming RSS 2.0 / Atom feed reader"""
+
+import html
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import IO, Iterator, List, Optional
+
+CONTENT_NS = "{http://purl.org/rss/1.0/modules/content/}"
+TAG = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class FeedEntry:
+    """A single feed item/entry"""
+
+    url: str
+    title: str = ""
+    description: str = ""
+    published_date: Optional[datetime] = None
+    categories: List[str] = field(default_factory=list)
+
+
+def local_name(tag: str) -> str:
+    """Tag name without its XML namespace."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def html_to_text(value: Optional[str]) -> str:
+    """Strip markup and entities from a feed description."""
+    if not value:
+        return ""
+    text = html.unescape(TAG.sub(" ", value))
+    return " ".join(text.split())
+
+
+def parse_feed_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse RFC 822 (RSS) or ISO 8601 (Atom) dates."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _child_text(element: ET.Element, *names: str) -> Optional[str]:
+    for child in element:
+        if local_name(child.tag) in names and child.text:
+            return child.text
+    return None
+
+
+def _atom_link(entry: ET.Element) -> Optional[str]:
+    for child in entry:
+        if local_name(child.tag) != "link":
+            continue
+        if child.get("rel", "alternate") == "alternate" and child.get("href"):
+            return child.get("href")
+    return None
+
+
+def _parse_rss_item(item: ET.Element) -> Optional[FeedEntry]:
+    url = _child_text(item, "link") or _child_text(item, "guid")
+    if not url:
+        return None
+    encoded = item.find(f"{CONTENT_NS}encoded")
+    description = _child_text(item, "description")
+    # Prefer the longer of description / content:encoded
+    if encoded is not None and encoded.text:
+        if len(encoded.text) > len(description or ""):
+            description = encoded.text
+    return FeedEntry(
+        url=url.strip(),
+        title=html_to_text(_child_text(item, "title")),
+        description=html_to_text(description),
+        published_date=parse_feed_date(_child_text(item, "pubDate", "date")),
+        categories=[
+            child.text.strip()
+            for child in item
+            if local_name(child.tag) == "category" and child.text
+        ],
+    )
+
+
+def _parse_atom_entry(entry: ET.Element) -> Optional[FeedEntry]:
+    url = _atom_link(entry)
+    if not url:
+        return None
+    summary = _child_text(entry, "summary")
+    content = _child_text(entry, "content")
+    if content and len(content) > len(summary or ""):
+        summary = content
+    return FeedEntry(
+        url=url.strip(),
+        title=html_to_text(_child_text(entry, "title")),
+        description=html_to_text(summary),
+        published_date=parse_feed_date(
+            _child_text(entry, "published", "updated")
+        ),
+        categories=[
+            child.get("term")
+            for child in entry
+            if local_name(child.tag) == "category" and child.get("term")
+        ],
+    )
+
+
+def iter_feed_entries(stream: IO[bytes]) -> Iterator[FeedEntry]:
+    """
+    Yield entries while the feed is being read.
+
+    Elements are cleared once parsed, so memory stays flat even for very
+    large feeds, and the caller can stop early (e.g. at `max_articles`).
+    """
+    for _, element in ET.iterparse(stream, events=("end",)):
+        name = local_name(element.tag)
+        if name == "item":
+            entry = _parse_rss_item(element)
+        elif name == "entry":
+            entry = _parse_atom_entry(element)
+        else:
+            continue
+        element.clear()
+        if entry is not None:
+            yield entry
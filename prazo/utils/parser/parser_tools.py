@@ -1,31 +1,62 @@
 import html
 import re
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Optional, Tuple
+from urllib.parse import urlparse
 
 import advertools as adv
 import pandas as pd
 import requests
-import yaml
 from trafilatura import extract, fetch_url
 from trafilatura.settings import use_config
 
-from prazo.core.config import config
-from prazo.core.db import check_urls_exist
+from prazo.core.db import check_urls_exist, get_feed_state
 from prazo.core.logger import logger
-from prazo.schemas import NewsItem
+from prazo.schemas import FeedState, NewsItem
 from prazo.schemas.article import Article
-from prazo.utils.chat_models import ChatModel
+from prazo.utils.parser.feed import iter_feed_entries
+from prazo.utils.parser.helper import get_latest_sitemap
+from prazo.utils.summarisation import ArticleSummariser, SummaryMode
+from prazo.utils.urls import canonicalize_url
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
-class BaseParserTool(ABC):
-    def __init__(self, sitemap_url: str):
-        self.sitemap_url = sitemap_url
 
-    def load_source_yaml(self, source_yaml: str = config.SOURCES_FILE) -> dict:
-        with open(source_yaml, "r") as file:
-            return yaml.safe_load(file)
+class BaseParserTool(ABC):
+    """
+    Crawl a single source declared in sources.yaml.
+
+    The crawl is split into stages so that `SourceService` can run them as a
+    pipeline across all sources: discover -> remove existing -> fetch ->
+    summarise -> build news items. `parse` runs the same stages serially for
+    this source only.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        options: dict,
+        summariser: Optional[ArticleSummariser] = None,
+    ):
+        self.source = source
+        self.options = options
+        self.name = options.get("name", source)
+        # Minimum seconds between two article fetches from this source
+        self.fetch_interval = float(options.get("rate_limit", 1.0))
+        # Shared per crawl so that all sources draw from one token budget
+        self.summariser = summariser
+        # Feeds polled by the last `discover`, see `db.save_feed_states`
+        self.feed_states: list[FeedState] = []
+        self._fetch_lock = threading.Lock()
+        self._last_fetch = 0.0
+
+    def get_summariser(self) -> ArticleSummariser:
+        if self.summariser is None:
+            self.summariser = ArticleSummariser()
+        return self.summariser
 
     def extract_text(self, url: str) -> str:
         try:
@@ -46,9 +77,7 @@ class BaseParserTool(ABC):
                 )
 
             # Fallback to requests library with custom settings
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
+            headers = {"User-Agent": USER_AGENT}
             response = requests.get(
                 url,
                 headers=headers,
@@ -76,59 +105,249 @@ class BaseParserTool(ABC):
             logger.error(f"Text extraction failed: {str(e)} for url: {url}")
             return None
 
+    def wait_for_rate_limit(self) -> None:
+        """Space out fetches to this source, safe across fetch workers."""
+        with self._fetch_lock:
+            elapsed = time.monotonic() - self._last_fetch
+            if elapsed < self.fetch_interval:
+                time.sleep(self.fetch_interval - elapsed)
+            self._last_fetch = time.monotonic()
+
     @abstractmethod
-    def filter_urls(self, url_df: pd.DataFrame, **kwargs) -> list[str]:
+    def discover(self, **filter_kwargs) -> list[Article]:
+        """List candidate articles of the source, without content."""
         pass
 
     @abstractmethod
-    def parse(self, **filter_kwargs) -> list[Article]:
-        url_df = adv.sitemap_to_df(self.sitemap_url)
-        return url_df
+    def to_news_item(self, article: Article) -> NewsItem:
+        pass
+
+    def summariser_options(self) -> dict:
+        """The `summariser` options of the source, ValueError if invalid."""
+        options = self.options.get("summariser", {})
+        llm_top_k = options.get("llm_top_k", 0)
+        if not isinstance(llm_top_k, int) or llm_top_k < 0:
+            raise ValueError(
+                f"llm_top_k must be a non-negative integer, got {llm_top_k!r}"
+            )
+        return {
+            "mode": SummaryMode(options.get("mode", SummaryMode.LLM)),
+            "llm_top_k": llm_top_k,
+        }
+
+    @staticmethod
+    def listing_top_k(positions: list[int], top_k: int) -> int:
+        """
+        Hybrid mode: how many of the articles to summarise are within the
+        first `top_k` of the source listing.
+
+        Args:
+            positions: Listing positions of the articles, in order. Already
+                stored articles keep their place in the listing, so the serial
+                and pipelined crawls pick the same articles for the LLM.
+            top_k: The source's `llm_top_k`
+        """
+        return sum(1 for position in positions if position < top_k)
+
+    def remove_existing(self, articles: list[Article]) -> list[Article]:
+        existing_urls = check_urls_exist([article.url for article in articles])
+        for url in existing_urls:
+            logger.info(f"Skipping existing URL: {url}")
+        return [
+            article for article in articles if article.url not in existing_urls
+        ]
+
+    def fetch(self, article: Article) -> Article:
+        self.wait_for_rate_limit()
+        article.content = self.extract_text(article.url) or ""
+        return article
+
+    def summarise_article(
+        self, content: str, mode: SummaryMode = SummaryMode.LLM
+    ) -> str:
+        return self.summarise_articles([content], mode=mode, llm_top_k=1)[0]
+
+    def summarise_articles(
+        self,
+        contents: list[str | None],
+        mode: SummaryMode = SummaryMode.LLM,
+        llm_top_k: int = 0,
+    ) -> list[str]:
+        return self.get_summariser().summarise(
+            contents, mode=mode, llm_top_k=llm_top_k
+        )
+
+    @staticmethod
+    def contents_to_summarise(articles: list[Article]) -> list[str | None]:
+        """Article contents, `None` for articles that already have a summary."""
+        return [
+            None if article.summary else article.content for article in articles
+        ]
+
+    def build_news_items(
+        self, articles: list[Article], summaries: list[str]
+    ) -> list[NewsItem]:
+        news_items = []
+        for article, summary in zip(articles, summaries):
+            if summary:
+                article.summary = summary
+            elif article.summary:
+                pass  # Filled in before summarisation (e.g. feed description)
+            elif not article.content:
+                article.summary = "No content found"
+            else:
+                # Budget exhausted or LLM failure in LLM mode - not saved, so
+                # the URL is picked up again by the next crawl
+                logger.info(f"Skipping unsummarised URL: {article.url}")
+                continue
+            news_items.append(self.to_news_item(article))
+        return news_items
 
+    def parse(self, **filter_kwargs) -> list[NewsItem]:
+        listing = self.discover(**filter_kwargs)
+        positions = {article.url: i for i, article in enumerate(listing)}
+        articles = self.remove_existing(listing)
+        fetched = []
+        for article in articles:
+            try:
+                fetched.append(self.fetch(article))
+            except Exception as e:
+                logger.error(f"Failed to fetch article {article.url}: {e}")
 
-class BBCParserTool(BaseParserTool):
-    def __init__(self, sitemap_url: str):
-        super().__init__(sitemap_url)
+        options = self.summariser_options()
+        options["llm_top_k"] = self.listing_top_k(
+            [positions[article.url] for article in fetched],
+            options["llm_top_k"],
+        )
+        summaries = self.summarise_articles(
+            self.contents_to_summarise(fetched), **options
+        )
+        news_items = self.build_news_items(fetched, summaries)
+        logger.info(
+            f"Successfully parsed {len(news_items)} articles from {self.name}"
+        )
+        return news_items
+
+
+class SitemapParserTool(BaseParserTool):
+    """
+    Generic sitemap crawler, configured by its sources.yaml entry:
+
+    - sitemap_url: sitemap or sitemap index
+    - latest_sitemap: use the most recently modified child of the index
+    - include: first URL path segments (sections) to keep
+    - include_patterns / exclude_patterns: regexes matched against the URL
+    - max_age_hours: skip URLs last modified before this
+    - max_articles: cap on the number of articles per crawl
+    """
+
+    def resolve_sitemap_url(self) -> str:
+        """Resolved when the crawl starts, never at import time."""
+        sitemap_url = self.options["sitemap_url"]
+        if self.options.get("latest_sitemap", False):
+            sitemap_url = get_latest_sitemap(sitemap_url)
+            logger.info(f"Using latest sitemap {sitemap_url} for {self.name}")
+        return sitemap_url
+
+    def load_sitemap(self) -> pd.DataFrame:
+        return adv.sitemap_to_df(self.resolve_sitemap_url())
+
+    @staticmethod
+    def get_section(url: str) -> str:
+        path = urlparse(url).path.strip("/")
+        return path.split("/")[0] if path else ""
+
+    def filter_urls(self, url_df: pd.DataFrame, **kwargs) -> pd.DataFrame:
+        urls = url_df["loc"].astype(str)
+        mask = pd.Series(True, index=url_df.index)
+
+        include = self.options.get("include")
+        if include:
+            mask &= urls.apply(lambda url: self.get_section(url) in include)
+        include_patterns = self.options.get("include_patterns")
+        if include_patterns:
+            mask &= urls.str.contains("|".join(include_patterns), regex=True)
+        exclude_patterns = self.options.get("exclude_patterns")
+        if exclude_patterns:
+            mask &= ~urls.str.contains("|".join(exclude_patterns), regex=True)
+        max_age_hours = self.options.get("max_age_hours")
+        if max_age_hours and "lastmod" in url_df:
+            lastmod = pd.to_datetime(
+                url_df["lastmod"], errors="coerce", utc=True
+            )
+            cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(
+                hours=max_age_hours
+            )
+            mask &= lastmod >= cutoff
 
-    def filter_urls(self, url_df: pd.DataFrame, **kwargs) -> list[str]:
-        return url_df["loc"].tolist()
+        filtered_df = url_df[mask]
+        max_articles = self.options.get("max_articles")
+        if max_articles:
+            filtered_df = filtered_df.head(max_articles)
+        return filtered_df
 
-    def parse(self, **filter_kwargs) -> list[Article]:
-        url_df = super().parse(**filter_kwargs)
+    def get_title(self, row: pd.Series, url: str) -> str | None:
+        news_title = row.get("news_title")
+        if isinstance(news_title, str) and news_title.strip():
+            return news_title.strip()
+        slug = urlparse(url).path.rstrip("/").split("/")[-1]
+        # Drop file extensions and trailing numeric ids from the slug
+        slug = re.sub(r"(\.\w+$)|(-\d+$)", "", slug)
+        return slug.replace("-", " ").replace("_", " ").title() or None
+
+    def get_published_date(self, row: pd.Series) -> Optional[datetime]:
+        for column in ["news_publication_date", "lastmod"]:
+            value = pd.to_datetime(row.get(column), errors="coerce", utc=True)
+            if not pd.isna(value):
+                return value.to_pydatetime()
+        return None
+
+    def discover(self, **filter_kwargs) -> list[Article]:
+        url_df = self.filter_urls(self.load_sitemap(), **filter_kwargs)
         articles = []
+        seen_urls = set()
         for _, row in url_df.iterrows():
-            url = row["loc"]
-            source = "BBC"
-            published_date = row["lastmod"]
-            assert isinstance(
-                published_date, datetime
-            ), "Published date in BBC sitemap is not a datetime object"
-            content = self.extract_text(url)
-            # summary = SummaryService().summarise(content) # Generate summary after deduplication
-            articles.append(
-                Article(
-                    url=url,
-                    content=content,
-                    source=source,
-                    published_date=published_date,
-                    updated_date=datetime.now(),
+            url = canonicalize_url(row["loc"])
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            try:
+                articles.append(
+                    Article(
+                        url=url,
+                        title=self.get_title(row, url) or "Untitled",
+                        content="",
+                        source=self.source,
+                        published_date=self.get_published_date(row)
+                        or datetime.now(),
+                    )
                 )
-            )
+            except Exception as e:
+                logger.error(f"Failed to parse article from {url}: {str(e)}")
+                continue
         return articles
 
+    def to_news_item(self, article: Article) -> NewsItem:
+        topic = [self.name]
+        section = self.get_section(article.url)
+        if section:
+            topic.append(section)
+        return NewsItem(
+            title=article.title,
+            summary=article.summary,
+            sources=[article.url],
+            published_date=article.published_date,
+            topic=self.options.get("topic", topic),
+            groups=self.options.get("groups", [self.name]),
+            tool_source=["daily_news"],
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
 
-class NDTVProfitParserTool(BaseParserTool):
-    def __init__(self, sitemap_url: str):
-        super().__init__(sitemap_url)
 
-    def filter_urls(self, url_df: pd.DataFrame, **kwargs) -> list[str]:
-        source_data = self.load_source_yaml()
-        include = source_data["ndtv_profit"]["include"]
-        filtered_df = url_df[
-            url_df["loc"].apply(lambda x: x.split("/")[3] in include)
-        ]
-        return filtered_df
-    
+class NDTVProfitParserTool(SitemapParserTool):
+    """NDTV Profit sitemap: titles from the URL slug or the image caption"""
+
     def get_title_from_url(self, url):
         try:
             title = url.split("/")[-1].replace("-", " ").title()
@@ -136,7 +355,7 @@ class NDTVProfitParserTool(BaseParserTool):
         except Exception as e:
             logger.error(f"Error getting title: {e} for url: {url}")
             return None
-    
+
     def get_title_from_image_caption(self, html_text: str) -> str | None:
         try:
             matches = re.findall(
@@ -157,94 +376,134 @@ class NDTVProfitParserTool(BaseParserTool):
             logger.error(f"Error getting title: {e} for html_text: {html_text}")
             return None
 
-    def get_title(self, html_text: str, url: str) -> str | None:
+    def get_title(self, row: pd.Series, url: str) -> str | None:
         try:
             title = self.get_title_from_url(url)
             if title is None:
-                title = self.get_title_from_image_caption(html_text)
+                title = self.get_title_from_image_caption(row["image_caption"])
             return title
         except Exception as e:
             logger.error(f"Error getting title: {e} for url: {url}")
             return None
 
-    def summarise_article(self, content: str) -> str:
-        llm = ChatModel(provider="openai", model_name="gpt-4o-mini").llm()
-        prompt = f"""
-        You are a summariser.
-        Summarise the following content in 1-2 paragraphs about 100-150 words:
-        {content}
-        Return your response in this exact format:
-        SUMMARY: [summary]
-        """
-        response = llm.invoke(prompt)
-        content = response.content.strip()
-        lines = content.split("\n")
-        summary = ""
-        for line in lines:
-            line = line.strip()
-            if line.startswith("SUMMARY:"):
-                summary = line.replace("SUMMARY:", "").strip()
-        return summary
 
-    def parse(self, **filter_kwargs) -> list[NewsItem]:
-        url_df = super().parse(**filter_kwargs)
-        url_df = self.filter_urls(url_df, **filter_kwargs)
-        articles = []
-        for _, row in url_df.iterrows():
-            url = row["loc"]
-            try:
-                title = self.get_title(row["image_caption"], url)
-                if title is None:
-                    title = "Untitled"
-                published_date = row["lastmod"]
-                assert isinstance(
-                    published_date, datetime
-                ), "Published date in NDTV Profit sitemap is not a datetime object"
-
-                # Check if URL already exists before extracting content
-                existing_urls = check_urls_exist([url])
-                if len(existing_urls) > 0:
-                    logger.info(f"Skipping existing URL: {url}")
-                    continue
+class FeedParserTool(BaseParserTool):
+    """
+    RSS/Atom feed crawler, a cheaper alternative to sitemap + full page
+    fetches. Options in sources.yaml:
 
-                content = self.extract_text(url)
+    - feed_url / feed_urls: one or more feeds
+    - min_description_words: below this the full page is fetched
+    - max_summary_words: descriptions up to this length are used as the
+      summary as they are, longer ones are summarised (without a page fetch)
+    - max_articles: cap on the number of entries per feed and crawl
+    """
 
-                articles.append(
-                    NewsItem(
-                        title=title,
-                        summary=(
-                            self.summarise_article(content)
-                            if content is not None
-                            else "No content found"
-                        ),
-                        sources=[url],
-                        published_date=published_date,
-                        topic=["NDTV Profit", url.split("/")[3]],
-                        groups=["NDTV Profit"],
-                        tool_source=["daily_news"],
-                        created_at=datetime.now(),
-                        updated_at=datetime.now(),
-                    )
-                )
-                time.sleep(1)
+    def feed_urls(self) -> list[str]:
+        return self.options.get("feed_urls") or [self.options["feed_url"]]
 
-            except Exception as e:
-                logger.error(f"Failed to parse article from {url}: {str(e)}")
-                continue
+    def open_feed(
+        self, feed_url: str
+    ) -> Optional[Tuple[requests.Response, FeedState]]:
+        """
+        Conditional GET, `None` when the feed did not change.
 
-        logger.info(
-            f"Successfully parsed {len(articles)} articles from NDTV Profit"
+        The validators of the response are returned with it rather than
+        stored: they are saved once the entries are (`db.save_feed_states`),
+        otherwise the next poll would get a 304 and never read them again.
+        """
+        state = get_feed_state(feed_url)
+        headers = {"User-Agent": USER_AGENT}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        response = requests.get(
+            feed_url, headers=headers, timeout=30, stream=True
+        )
+        if response.status_code == 304:
+            logger.info(f"Feed not modified since last poll: {feed_url}")
+            response.close()
+            return None
+        response.raise_for_status()
+        return response, FeedState(
+            feed_url=feed_url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
         )
-        return articles
 
+    def discover(self, **filter_kwargs) -> list[Article]:
+        max_articles = self.options.get("max_articles")
+        articles = []
+        seen_urls = set()
+        self.feed_states = []
+        for feed_url in self.feed_urls():
+            try:
+                polled = self.open_feed(feed_url)
+                if polled is None:
+                    continue
+                response, feed_state = polled
+                with response:
+                    response.raw.decode_content = True
+                    for count, entry in enumerate(
+                        iter_feed_entries(response.raw)
+                    ):
+                        if max_articles and count >= max_articles:
+                            feed_state.complete = False
+                            break
+                        url = canonicalize_url(entry.url)
+                        feed_state.urls.append(url)
+                        if url in seen_urls:
+                            continue
+                        seen_urls.add(url)
+                        articles.append(
+                            Article(
+                                url=url,
+                                title=entry.title or "Untitled",
+                                # Replaced if the full page gets fetched
+                                content=entry.description,
+                                source=self.source,
+                                published_date=entry.published_date
+                                or datetime.now(),
+                            )
+                        )
+                self.feed_states.append(feed_state)
+            except Exception as e:
+                logger.error(f"Failed to read feed {feed_url}: {e}")
+        return articles
 
-class NYTimesParserTool(BaseParserTool):
-    def __init__(self, sitemap_url: str):
-        super().__init__(sitemap_url)
+    def fetch(self, article: Article) -> Article:
+        description = article.content
+        words = len(description.split())
+        if words >= self.options.get("min_description_words", 40):
+            if words <= self.options.get("max_summary_words", 250):
+                article.summary = description
+            return article
+
+        # Description too short to summarise, fall back to the full page
+        super().fetch(article)
+        if not article.content:
+            article.content = description
+        return article
+
+    def to_news_item(self, article: Article) -> NewsItem:
+        return NewsItem(
+            title=article.title,
+            summary=article.summary,
+            sources=[article.url],
+            published_date=article.published_date,
+            topic=self.options.get("topic", [self.name]),
+            groups=self.options.get("groups", [self.name]),
+            tool_source=["daily_news"],
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+        )
 
-    def filter_urls(self, url_df: pd.DataFrame, **kwargs) -> list[str]:
-        return url_df["loc"].tolist()
 
-    def parse(self, **filter_kwargs) -> list[Article]:
-        url_df = super().parse(**filter_kwargs)
-        return self.filter_urls(url_df, **filter_kwargs)
+# Parser implementations selectable with `parser:` in sources.yaml
+PARSER_TYPES: dict[str, type[BaseParserTool]] = {
+    "sitemap": SitemapParserTool,
+    "ndtv_profit": NDTVProfitParserTool,
+    "feed": FeedParserTool,
+}
@@ -0,0 +1,241 @@
+"""
+Staged producer/consumer pipeline
+
+Stages are connected by bounded queues. Each stage has its own worker count,
+a full downstream queue blocks the upstream workers (backpressure). Stage
+functions may be sync (run in a thread pool) or async, take one item (or a
+list of items when `batch_size > 1`) and return:
+
+- a single item, passed downstream
+- a list of items, each passed downstream (fan-out)
+- `None`, the item is dropped
+"""
+
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional
+
+from prazo.core.logger import logger
+
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    """Throughput and latency counters of a single stage"""
+
+    name: str
+    workers: int
+    processed: int = 0  # Calls made (items, or batches)
+    items_in: int = 0
+    items_out: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_latency: float = 0.0
+    max_queue_depth: int = 0
+    first_start: Optional[float] = None
+    last_end: Optional[float] = None
+
+    def record(self, started: float, items_in: int, items_out: int) -> None:
+        ended = time.perf_counter()
+        latency = ended - started
+        self.processed += 1
+        self.items_in += items_in
+        self.items_out += items_out
+        self.busy_seconds += latency
+        self.max_latency = max(self.max_latency, latency)
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        self.last_end = ended
+
+    @property
+    def avg_latency(self) -> float:
+        return self.busy_seconds / self.processed if self.processed else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Input items per second over the active period of the stage."""
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        elapsed = self.last_end - self.first_start
+        return self.items_in / elapsed if elapsed > 0 else float(self.items_in)
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "failed": self.failed,
+            "avg_latency_s": round(self.avg_latency, 4),
+            "max_latency_s": round(self.max_latency, 4),
+            "throughput_per_s": round(self.throughput, 2),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class Stage:
+    """A pipeline step with its own workers and input queue"""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        queue_size: int = 100,
+        batch_size: int = 1,
+        batch_timeout: float = 0.5,
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.is_async = inspect.iscoroutinefunction(fn)
+        self.stats = StageStats(name=name, workers=workers)
+
+
+@dataclass
+class Pipeline:
+    """Run items through a list of stages, stages working concurrently"""
+
+    stages: List[Stage]
+    results: List[Any] = field(default_factory=list)
+
+    async def _call(
+        self, stage: Stage, payload: Any, executor: ThreadPoolExecutor
+    ) -> Any:
+        if stage.is_async:
+            return await stage.fn(payload)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, stage.fn, payload)
+
+    async def _next_batch(self, stage: Stage, queue: asyncio.Queue):
+        """Collect up to `batch_size` items, returns (batch, stop_seen)."""
+        item = await queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + stage.batch_timeout
+        while len(batch) < stage.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _worker(
+        self,
+        stage: Stage,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        executor: ThreadPoolExecutor,
+    ) -> None:
+        stop = False
+        while not stop:
+            stage.stats.max_queue_depth = max(
+                stage.stats.max_queue_depth, inbox.qsize()
+            )
+            if stage.batch_size > 1:
+                batch, stop = await self._next_batch(stage, inbox)
+                if not batch:
+                    continue
+                payload, items_in = batch, len(batch)
+            else:
+                payload = await inbox.get()
+                if payload is _STOP:
+                    break
+                items_in = 1
+
+            started = time.perf_counter()
+            try:
+                output = await self._call(stage, payload, executor)
+            except Exception as e:
+                stage.stats.failed += items_in
+                logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+                continue
+
+            if output is None:
+                outputs = []
+            elif isinstance(output, list):
+                outputs = output
+            else:
+                outputs = [output]
+            stage.stats.record(started, items_in, len(outputs))
+
+            for item in outputs:
+                if outbox is None:
+                    self.results.append(item)
+                else:
+                    await outbox.put(item)  # Blocks when downstream is full
+
+    async def arun(self, inputs: Iterable[Any]) -> List[Any]:
+        """Feed `inputs` into the first stage and collect the last outputs."""
+        self.results = []
+        queues = [
+            asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages
+        ]
+        sync_workers = sum(s.workers for s in self.stages if not s.is_async)
+
+        with ThreadPoolExecutor(max_workers=max(sync_workers, 1)) as executor:
+
+            async def feed():
+                for item in inputs:
+                    await queues[0].put(item)
+
+            upstream = [asyncio.create_task(feed())]
+            all_tasks = list(upstream)
+            for idx, stage in enumerate(self.stages):
+                outbox = queues[idx + 1] if idx + 1 < len(queues) else None
+                workers = [
+                    asyncio.create_task(
+                        self._worker(stage, queues[idx], outbox, executor)
+                    )
+                    for _ in range(stage.workers)
+                ]
+                all_tasks.extend(workers)
+                # Once upstream is finished, tell each worker of this stage
+                all_tasks.append(
+                    asyncio.create_task(
+                        self._close(upstream, queues[idx], stage.workers)
+                    )
+                )
+                upstream = workers
+
+            await asyncio.gather(*all_tasks)
+        return self.results
+
+    @staticmethod
+    async def _close(
+        upstream: List[asyncio.Task], queue: asyncio.Queue, workers: int
+    ) -> None:
+        await asyncio.gather(*upstream)
+        for _ in range(workers):
+            await queue.put(_STOP)
+
+    def run(self, inputs: Iterable[Any]) -> List[Any]:
+        """Blocking wrapper around `arun`."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.arun(inputs))
+        # Called from inside an event loop (e.g. a LangGraph node)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.arun(inputs)).result()
+
+    def stats(self) -> List[dict]:
+        return [stage.stats.as_dict() for stage in self.stages]
+
+    def log_stats(self) -> None:
+        for stats in self.stats():
+            logger.info(f"Pipeline stage stats: {stats}")
@@ -1,64 +1,66 @@
-from enum import Enum
+from typing import Dict, Optional
 
-from prazo.utils.parser.helper import get_latest_sitemap
+import yaml
 
-from .parser_tools import BaseParserTool, NDTVProfitParserTool
+from prazo.core.config import config
+from prazo.core.logger import logger
+from prazo.utils.summarisation import ArticleSummariser
 
-
-class Source(Enum):
-    """
-    Mapping between source name and its identifier
-    """
-
-    BBC = "bbc"
-    NDTV_PROFIT = "ndtv_profit"
-    NY_TIMES = "ny_times"
+from .parser_tools import PARSER_TYPES, BaseParserTool
 
 
 class SourceConfig:
-    """Mapping between source name and its configuration"""
+    """A source declared in sources.yaml and the parser that crawls it"""
 
-    source: Source
-    sitemap_url: str
+    source: str
+    options: dict
     parser_tool: BaseParserTool
-    filter_kwargs: dict
 
-    def __init__(
-        self,
-        source: Source,
-        sitemap_url: str,
-        parser_tool: BaseParserTool,
-        filter_kwargs: dict,
-    ):
+    def __init__(self, source: str, options: dict):
+        parser_type = options.get("parser", "sitemap")
+        if parser_type not in PARSER_TYPES:
+            raise ValueError(
+                f"Unknown parser '{parser_type}' for source '{source}', "
+                f"expected one of {list(PARSER_TYPES)}"
+            )
         self.source = source
-        self.sitemap_url = sitemap_url
-        self.parser_tool = parser_tool(sitemap_url)
-        self.filter_kwargs = filter_kwargs
+        self.options = options
+        # Building the parser is cheap, sitemaps/feeds are resolved in parse()
+        self.parser_tool = PARSER_TYPES[parser_type](source, options)
+        # Fail at load time rather than in the middle of a crawl
+        self.parser_tool.summariser_options()
+
+    def parse(
+        self, summariser: Optional[ArticleSummariser] = None
+    ) -> list[str]:
+        if summariser is not None:
+            self.parser_tool.summariser = summariser
+        return self.parser_tool.parse()
 
-    def parse(self) -> list[str]:
-        return self.parser_tool.parse(**self.filter_kwargs)
 
+def load_source_configs(
+    sources_file: str = config.SOURCES_FILE,
+) -> Dict[str, SourceConfig]:
+    """
+    Build the source registry from sources.yaml.
+
+    Called when a crawl starts, so adding or disabling a source only needs a
+    config change and importing the parser package never touches the network.
+
+    Returns:
+        Dict[str, SourceConfig]: Enabled sources keyed by their name
+    """
+    with open(sources_file, "r") as file:
+        sources_data = yaml.safe_load(file) or {}
 
-# Source configuration map
-SOURCE_CONFIG_MAP = {
-    # Source.BBC: SourceConfig(
-    #     source=Source.BBC,
-    #     sitemap_url="https://www.bbc.com/sitemap.xml",
-    #     parser_tool=BBCParserTool,
-    #     filter_kwargs={},
-    # ),
-    Source.NDTV_PROFIT: SourceConfig(
-        source=Source.NDTV_PROFIT,
-        sitemap_url=get_latest_sitemap(
-            "https://www.ndtvprofit.com/sitemap.xml"
-        ),
-        parser_tool=NDTVProfitParserTool,
-        filter_kwargs={},
-    ),
-    # Source.NY_TIMES: SourceConfig(
-    #     source=Source.NY_TIMES,
-    #     sitemap_url="https://www.nytimes.com/sitemap.xml",
-    #     parser_tool=NYTimesParserTool,
-    #     filter_kwargs={},
-    # ),
-}
+    source_configs = {}
+    for source, options in sources_data.items():
+        options = options or {}
+        if not options.get("enabled", True):
+            continue
+        try:
+            source_configs[source] = SourceConfig(source, options)
+        except Exception as e:
+            logger.error(f"Invalid configuration for source {source}: {e}")
+    logger.info(f"Loaded {len(source_configs)} sources from {sources_file}")
+    return source_configs
@@ -1,16 +1,28 @@
-import traceback
-from typing import Dict
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List
 
 from langchain_core.tools import BaseTool
 from pydantic import Field
 
+from prazo.core.async_db import acheck_urls_exist
 from prazo.core.logger import logger
+from prazo.schemas import FeedState, NewsItem
 from prazo.schemas.article import Article
-from prazo.utils.parser.source_config import (
-    SOURCE_CONFIG_MAP,
-    Source,
-    SourceConfig,
-)
+from prazo.utils.parser.pipeline import Pipeline, Stage
+from prazo.utils.parser.source_config import SourceConfig, load_source_configs
+from prazo.utils.summarisation import ArticleSummariser
+
+
+@dataclass
+class CrawlItem:
+    """Article travelling through the ingestion pipeline"""
+
+    source_config: SourceConfig
+    article: Article
+    # Position in the source listing (before removing stored articles), the
+    # same for every batch the source's articles end up in
+    position: int
 
 
 class SourceService(BaseTool):
@@ -21,12 +33,36 @@ class SourceService(BaseTool):
         "Service for fetching news articles from different news channels like BBC, NDTV Profit, NY Times etc. Tool ensures that the news articles are latest and not already processed."
     )
 
-    # Define source_config_map as a Pydantic field
-    source_config_map: Dict[Source, SourceConfig] = Field(
-        default_factory=lambda: SOURCE_CONFIG_MAP,
+    # Define source_config_map as a Pydantic field, loaded from sources.yaml
+    # when the service is created (i.e. when a crawl starts)
+    source_config_map: Dict[str, SourceConfig] = Field(
+        default_factory=load_source_configs,
         description="Mapping of sources to their configurations",
     )
 
+    # Pipeline sizing, one worker pool per stage
+    discover_workers: int = Field(
+        default=4, description="Sources whose listing is fetched in parallel"
+    )
+    check_workers: int = Field(
+        default=2, description="Workers checking URLs against the database"
+    )
+    check_batch_size: int = Field(
+        default=50, description="URLs checked per database query"
+    )
+    fetch_workers: int = Field(
+        default=8, description="Workers downloading and extracting articles"
+    )
+    summarise_workers: int = Field(
+        default=2, description="Workers summarising batches of articles"
+    )
+    summarise_batch_size: int = Field(
+        default=16, description="Articles handed to the summariser at once"
+    )
+    queue_size: int = Field(
+        default=200, description="Capacity of the queue in front of a stage"
+    )
+
     class Config:
         """Pydantic configuration"""
 
@@ -35,18 +71,120 @@ class SourceService(BaseTool):
     def summarise(self, articles: list[Article]) -> list[Article]:
         return articles
 
-    def fetch_and_parse(self) -> list[Article]:
-        articles = []
-        for _, source_config in self.source_config_map.items():
-            try:
-                source_articles = source_config.parse()
-                articles.extend(source_articles)
-            except Exception as e:
-                logger.error(
-                    f"Error fetching and parsing {source_config.source}: {e}"
+    def build_pipeline(self, summariser: ArticleSummariser) -> Pipeline:
+        """Build the discover -> check -> fetch -> summarise pipeline."""
+
+        def discover(source_config: SourceConfig) -> List[CrawlItem]:
+            source_config.parser_tool.summariser = summariser
+            articles = source_config.parser_tool.discover()
+            logger.info(
+                f"Discovered {len(articles)} articles from {source_config.source}"
+            )
+            return [
+                CrawlItem(source_config, article, position)
+                for position, article in enumerate(articles)
+            ]
+
+        async def remove_existing(items: List[CrawlItem]) -> List[CrawlItem]:
+            existing_urls = await acheck_urls_exist(
+                [i.article.url for i in items]
+            )
+            return [i for i in items if i.article.url not in existing_urls]
+
+        def fetch(item: CrawlItem) -> CrawlItem:
+            item.source_config.parser_tool.fetch(item.article)
+            return item
+
+        async def summarise(items: List[CrawlItem]) -> List[NewsItem]:
+            by_source: Dict[str, List[CrawlItem]] = {}
+            for item in items:
+                by_source.setdefault(item.source_config.source, []).append(item)
+            results = await asyncio.gather(
+                *(
+                    self._summarise_source(summariser, source_items)
+                    for source_items in by_source.values()
                 )
-                traceback.print_exc()
-        return articles
+            )
+            return [news_item for result in results for news_item in result]
+
+        return Pipeline(
+            stages=[
+                Stage("discover", discover, workers=self.discover_workers),
+                Stage(
+                    "remove_existing",
+                    remove_existing,
+                    workers=self.check_workers,
+                    queue_size=self.queue_size,
+                    batch_size=self.check_batch_size,
+                ),
+                Stage(
+                    "fetch",
+                    fetch,
+                    workers=self.fetch_workers,
+                    queue_size=self.queue_size,
+                ),
+                Stage(
+                    "summarise",
+                    summarise,
+                    workers=self.summarise_workers,
+                    queue_size=self.queue_size,
+                    batch_size=self.summarise_batch_size,
+                ),
+            ]
+        )
+
+    @staticmethod
+    async def _summarise_source(
+        summariser: ArticleSummariser, items: List[CrawlItem]
+    ) -> List[NewsItem]:
+        items = sorted(items, key=lambda item: item.position)
+        parser_tool = items[0].source_config.parser_tool
+        options = parser_tool.summariser_options()
+        # Hybrid mode: only articles within the source's top-k use the LLM
+        llm_top_k = parser_tool.listing_top_k(
+            [item.position for item in items], options["llm_top_k"]
+        )
+        articles = [item.article for item in items]
+        summaries = await summariser.asummarise(
+            parser_tool.contents_to_summarise(articles),
+            mode=options["mode"],
+            llm_top_k=llm_top_k,
+        )
+        return parser_tool.build_news_items(articles, summaries)
 
-    def _run(self, **kwargs) -> list[Article]:
+    def fetch_and_parse(self) -> list[NewsItem]:
+        # One summariser per crawl: shared client and token budget
+        summariser = ArticleSummariser()
+        pipeline = self.build_pipeline(summariser)
+        news_items = pipeline.run(self.source_config_map.values())
+        return self._log_crawl(pipeline, news_items)
+
+    async def afetch_and_parse(self) -> list[NewsItem]:
+        """Run the crawl on the caller's event loop."""
+        summariser = ArticleSummariser()
+        pipeline = self.build_pipeline(summariser)
+        news_items = await pipeline.arun(self.source_config_map.values())
+        return self._log_crawl(pipeline, news_items)
+
+    def feed_states(self) -> list[FeedState]:
+        """Feeds polled by the last crawl, see `db.save_feed_states`."""
+        return [
+            feed_state
+            for source_config in self.source_config_map.values()
+            for feed_state in source_config.parser_tool.feed_states
+        ]
+
+    def _log_crawl(
+        self, pipeline: Pipeline, news_items: list[NewsItem]
+    ) -> list[NewsItem]:
+        pipeline.log_stats()
+        logger.info(
+            f"Parsed {len(news_items)} news items from {len(self.source_config_map)} sources"
+        )
+        return news_items
+
+    def _run(self, **kwargs) -> list[NewsItem]:
         return self.fetch_and_parse()
+
+    async def _arun(self, **kwargs) -> list[NewsItem]:
+        return await self.afetch_and_parse()
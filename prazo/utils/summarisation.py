@@ -0,0 +1,288 @@
+"""Batched, concurrent summarisation of crawled articles"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from prazo.core.config import config
+from prazo.core.logger import logger
+from prazo.utils.chat_models import ChatModel
+from prazo.utils.extractive_summary import textrank_summary
+
+SUMMARY_PROMPT = """
+        You are a summariser.
+        Summarise the following content in 1-2 paragraphs about 100-150 words:
+        {content}
+        Return your response in this exact format:
+        SUMMARY: [summary]
+        """
+
+PACKED_SUMMARY_PROMPT = """You are a summariser.
+Below are {count} independent news articles. Each one starts with a line `### ARTICLE <id>`.
+Summarise every article separately in 1-2 paragraphs about 100-150 words.
+Never mix information between articles. Return exactly one summary per article id.
+
+{articles}"""
+
+# Output tokens reserved per summary before the call is made
+SUMMARY_OUTPUT_TOKENS = 250
+# Hard cap on the content sent for a single article
+MAX_CONTENT_CHARS = 12000
+
+
+class SummaryMode(str, Enum):
+    """How the articles of a source are summarised"""
+
+    LLM = "llm"  # Abstractive summary for every article
+    EXTRACTIVE = "extractive"  # Local TextRank only, no API calls
+    HYBRID = "hybrid"  # LLM for the first `llm_top_k` articles, TextRank rest
+
+
+class ArticleSummary(BaseModel):
+    """Summary of one article inside a packed prompt."""
+
+    id: int = Field(description="Id of the summarised article")
+    summary: str = Field(description="Article summary (100-150 words)")
+
+
+class PackedSummaries(BaseModel):
+    """Structured output of a packed summarisation prompt."""
+
+    summaries: List[ArticleSummary] = Field(
+        description="One summary per article id"
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def parse_summary(text: str) -> str:
+    """Extract the summary from a `SUMMARY: ...` formatted response."""
+    summary = ""
+    in_summary = False
+    for line in text.strip().split("\n"):
+        line = line.strip()
+        if line.startswith("SUMMARY:"):
+            summary = line.replace("SUMMARY:", "").strip()
+            in_summary = True
+        elif line and in_summary:
+            # Continue building summary if it spans multiple lines
+            summary += " " + line
+    return summary
+
+
+def used_tokens(message, default: int) -> int:
+    """Total tokens reported by the provider, or `default` if unavailable."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens", default)
+
+
+class TokenBudget:
+    """Token allowance shared by all summarisation calls of a single crawl."""
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens
+        self.used = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_tokens is not None and self.used >= self.max_tokens
+
+    def reserve(self, tokens: int) -> bool:
+        """Reserve an estimated amount of tokens. False if it does not fit."""
+        if self.max_tokens is not None and self.used + tokens > self.max_tokens:
+            return False
+        self.used += tokens
+        return True
+
+    def settle(self, reserved: int, actual: int) -> None:
+        """Replace a reservation by the tokens actually consumed."""
+        self.used += actual - reserved
+
+
+class ArticleSummariser:
+    """
+    Summarise many articles with bounded async concurrency.
+
+    Short articles are packed several per prompt and summarised with
+    structured output, long ones get a prompt of their own. Every call is
+    charged against a per-crawl token budget; once it runs out the remaining
+    articles are left unsummarised (empty string), unless the mode allows an
+    extractive fallback.
+    """
+
+    def __init__(
+        self,
+        provider: str = "openai",
+        model_name: str = config.SUMMARY_MODEL,
+        max_concurrency: int = config.SUMMARY_MAX_CONCURRENCY,
+        pack_size: int = config.SUMMARY_PACK_SIZE,
+        pack_max_chars: int = config.SUMMARY_PACK_MAX_CHARS,
+        token_budget: Optional[int] = config.SUMMARY_TOKEN_BUDGET,
+    ):
+        self.llm = ChatModel(provider=provider, model_name=model_name).llm()
+        self.packed_llm = self.llm.with_structured_output(
+            PackedSummaries, include_raw=True
+        )
+        self.max_concurrency = max_concurrency
+        self.pack_size = pack_size
+        self.pack_max_chars = pack_max_chars
+        self.budget = TokenBudget(token_budget)
+
+    async def _summarise_one(
+        self, content: str, semaphore: asyncio.Semaphore
+    ) -> str:
+        prompt = SUMMARY_PROMPT.format(content=content[:MAX_CONTENT_CHARS])
+        reserved = estimate_tokens(prompt) + SUMMARY_OUTPUT_TOKENS
+        if not self.budget.reserve(reserved):
+            return ""
+
+        async with semaphore:
+            try:
+                response = await self.llm.ainvoke(prompt)
+            except Exception as e:
+                logger.error(f"Error summarising article: {e}")
+                self.budget.settle(reserved, 0)
+                return ""
+
+        self.budget.settle(reserved, used_tokens(response, reserved))
+        return parse_summary(response.content)
+
+    async def _summarise_pack(
+        self, pack: Dict[int, str], semaphore: asyncio.Semaphore
+    ) -> Dict[int, str]:
+        articles = "\n\n".join(
+            f"### ARTICLE {idx}\n{content}" for idx, content in pack.items()
+        )
+        prompt = PACKED_SUMMARY_PROMPT.format(
+            count=len(pack), articles=articles
+        )
+        reserved = estimate_tokens(prompt) + SUMMARY_OUTPUT_TOKENS * len(pack)
+        if not self.budget.reserve(reserved):
+            return {}
+
+        async with semaphore:
+            try:
+                result = await self.packed_llm.ainvoke(prompt)
+            except Exception as e:
+                logger.error(f"Error summarising packed articles: {e}")
+                self.budget.settle(reserved, 0)
+                return {}
+
+        self.budget.settle(reserved, used_tokens(result["raw"], reserved))
+        parsed: Optional[PackedSummaries] = result["parsed"]
+        if parsed is None:
+            logger.warning(
+                f"Could not parse packed summaries: {result['parsing_error']}"
+            )
+            return {}
+        return {
+            item.id: item.summary.strip()
+            for item in parsed.summaries
+            if item.id in pack
+        }
+
+    async def asummarise(
+        self,
+        contents: List[Optional[str]],
+        mode: SummaryMode = SummaryMode.LLM,
+        llm_top_k: int = 0,
+    ) -> List[str]:
+        """
+        Summarise a list of article contents.
+
+        Args:
+            contents: Article texts, `None` entries are skipped
+            mode: LLM, extractive or hybrid summarisation
+            llm_top_k: In hybrid mode, number of leading articles (by
+                position) that get an LLM summary
+
+        Returns:
+            List[str]: Summaries aligned with `contents`. Empty string when the
+            article had no content, or in LLM mode, failed or did not fit in
+            the budget.
+        """
+        mode = SummaryMode(mode)
+        if mode == SummaryMode.LLM:
+            llm_contents = contents
+        elif mode == SummaryMode.HYBRID:
+            llm_contents = [
+                content if idx < llm_top_k else None
+                for idx, content in enumerate(contents)
+            ]
+        else:
+            llm_contents = [None] * len(contents)
+
+        summaries = await self._asummarise_llm(llm_contents)
+
+        if mode != SummaryMode.LLM:
+            # Everything the LLM did not cover (incl. budget exhaustion)
+            for idx, content in enumerate(contents):
+                if content and not summaries[idx]:
+                    summaries[idx] = textrank_summary(content)
+        return summaries
+
+    async def _asummarise_llm(self, contents: List[Optional[str]]) -> List[str]:
+        summaries = [""] * len(contents)
+        if not any(contents):
+            return summaries
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Jobs are created in article order so that earlier (newer) articles
+        # get the budget first
+        jobs = []
+        pack: Dict[int, str] = {}
+        for idx, content in enumerate(contents):
+            if not content:
+                continue
+            if self.pack_size > 1 and len(content) <= self.pack_max_chars:
+                pack[idx] = content
+                if len(pack) == self.pack_size:
+                    jobs.append(self._summarise_pack(pack, semaphore))
+                    pack = {}
+            else:
+                jobs.append(self._run_single(idx, content, semaphore))
+        if len(pack) > 1:
+            jobs.append(self._summarise_pack(pack, semaphore))
+        elif pack:
+            idx, content = next(iter(pack.items()))
+            jobs.append(self._run_single(idx, content, semaphore))
+
+        for result in await asyncio.gather(*jobs):
+            for idx, summary in result.items():
+                summaries[idx] = summary
+
+        summarised = sum(1 for summary in summaries if summary)
+        logger.info(
+            f"LLM summarised {summarised}/{sum(1 for c in contents if c)} "
+            f"articles ({self.budget.used} tokens used)"
+        )
+        if self.budget.exhausted:
+            logger.warning("Summary token budget exhausted for this crawl")
+        return summaries
+
+    async def _run_single(
+        self, idx: int, content: str, semaphore: asyncio.Semaphore
+    ) -> Dict[int, str]:
+        return {idx: await self._summarise_one(content, semaphore)}
+
+    def summarise(
+        self,
+        contents: List[Optional[str]],
+        mode: SummaryMode = SummaryMode.LLM,
+        llm_top_k: int = 0,
+    ) -> List[str]:
+        """Blocking wrapper around `asummarise`."""
+        coroutine = self.asummarise(contents, mode=mode, llm_top_k=llm_top_k)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # Called from inside an event loop (e.g. a LangGraph node)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
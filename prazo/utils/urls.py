@@ -0,0 +1,166 @@
+"""
+URL canonicalization and story keys.
+
+Every URL entering the system (parser listings, agent results, database
+lookups, API dedup) goes through `canonicalize_url`, so the same article
+seen with tracking parameters, an AMP path, `http` or a mobile subdomain
+is stored and looked up under a single spelling.
+
+Kept free of config/database imports so the API service can use it too.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Host prefixes of mobile/AMP mirrors (and `www.`), dropped from the host
+MIRROR_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# Query parameters that never change the article being served
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "pk_")
+TRACKING_PARAMS = {
+    "amp",
+    "cmp",
+    "cmpid",
+    "fbclid",
+    "gclid",
+    "igshid",
+    "mkt_tok",
+    "msclkid",
+    "ncid",
+    "outputtype",
+    "ref",
+    "ref_src",
+    "smid",
+    "yclid",
+}
+
+# AMP spellings of an article path: /amp/..., .../amp, ....amp(.html)
+AMP_PATH_PATTERNS = (
+    re.compile(r"^/amp(?=/)"),
+    re.compile(r"/amp$"),
+    re.compile(r"\.amp(?=(\.html?)?$)"),
+)
+
+
+@dataclass(frozen=True)
+class DomainRule:
+    """Site specific canonicalization on top of the generic rules"""
+
+    # Canonical host the site's mirrors are mapped to
+    host: Optional[str] = None
+    # Only these query parameters identify an article; others are dropped
+    # (empty = every non-tracking parameter is kept)
+    keep_params: Tuple[str, ...] = ()
+    # Drop the whole query string (articles are identified by path only)
+    drop_query: bool = False
+    # Extra (pattern, replacement) rewrites applied to the path
+    path_rewrites: Tuple[Tuple[re.Pattern, str], ...] = field(default=())
+
+
+# Keyed by host without mirror prefixes
+DOMAIN_RULES: Dict[str, DomainRule] = {
+    "ndtvprofit.com": DomainRule(drop_query=True),
+    "bbc.com": DomainRule(drop_query=True),
+    "bbc.co.uk": DomainRule(host="bbc.com", drop_query=True),
+    "nytimes.com": DomainRule(drop_query=True),
+    "youtube.com": DomainRule(keep_params=("v",)),
+    "reddit.com": DomainRule(
+        path_rewrites=((re.compile(r"^(/r/[^/]+/comments/[^/]+)/.*$"), r"\1"),)
+    ),
+    "arxiv.org": DomainRule(
+        # /pdf/2401.01234v2(.pdf) and /abs/2401.01234v1 -> /abs/2401.01234
+        path_rewrites=(
+            (re.compile(r"^/pdf/"), "/abs/"),
+            (re.compile(r"(v\d+)?(\.pdf)?$"), ""),
+        )
+    ),
+}
+
+
+def strip_mirror_prefix(host: str) -> str:
+    """Host without its `www.`/mobile/AMP subdomain."""
+    for prefix in MIRROR_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            return host[len(prefix) :]
+    return host
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def strip_amp_path(path: str) -> str:
+    for pattern in AMP_PATH_PATTERNS:
+        path = pattern.sub("", path)
+    return path
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that spellings of the same article compare equal.
+
+    Upgrades `http` to `https`, lowercases the host and drops mirror
+    subdomains (`www.`, `m.`, `amp.`), default ports, AMP path markers,
+    tracking parameters, fragments and the trailing slash. Remaining query
+    parameters are sorted. `DOMAIN_RULES` adds site specific rules.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = strip_mirror_prefix(parts.hostname.lower().rstrip("."))
+    rule = DOMAIN_RULES.get(host, DomainRule())
+    host = rule.host or host
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = strip_amp_path(parts.path.rstrip("/"))
+    for pattern, replacement in rule.path_rewrites:
+        path = pattern.sub(replacement, path)
+    path = re.sub(r"/{2,}", "/", path).rstrip("/")
+
+    query = ""
+    if not rule.drop_query:
+        params = [
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not is_tracking_param(name)
+            and (not rule.keep_params or name in rule.keep_params)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def canonicalize_urls(urls: Iterable[str]) -> List[str]:
+    """Canonical URLs in their original order, without duplicates."""
+    return list(dict.fromkeys(canonicalize_url(url) for url in urls if url))
+
+
+def story_key(sources: List[str], title: Optional[str] = None) -> Optional[str]:
+    """
+    Unique key of a story: hash of its canonical primary (first) source URL.
+    Items without sources fall back to their normalized title.
+
+    Returns:
+        Optional[str]: Hex digest, `None` if there is nothing to key on
+    """
+    if sources:
+        identity = canonicalize_url(sources[0])
+    elif title:
+        identity = "title:" + " ".join(title.lower().split())
+    else:
+        return None
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
@@ -1,21 +1,18 @@
 """
 Simple Flask API to serve news items from MongoDB
-"""
-
-import os
-from datetime import datetime
-from typing import List
 
-from dotenv import load_dotenv
-
-load_dotenv()
+For production, prefer the async server (`async_api.py`), which serves the
+same routes.
+"""
 
 # Import config from prazo
+import queue
 import sys
+import time
 from pathlib import Path
 
 import pymongo
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 
 # Add parent directory to path to import prazo
@@ -23,19 +20,70 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 import logging
 
+from prazo.core.change_feed import (
+    HEARTBEAT_INTERVAL,
+    SSE_HEARTBEAT,
+    ChangeFeed,
+)
+from prazo.core.feed_version import FeedVersion
+from prazo.core.indexes import (
+    FEED_SORT,
+    META_COLLECTION,
+    feed_query,
+    in_category,
+)
+from prazo.core.stats import STATS_COLLECTION, read_facets, read_stats
+from prazo.core.text_search import search_filter, search_pipeline
+from prazo.core.vector_index import VectorIndex
+from prazo.utils.cache import ResponseCache
+from prazo.utils.http_body import (
+    EncodedBody,
+    conditional_response,
+    encode_body,
+)
+from prazo.utils.metrics import CONTENT_TYPE, start_request
+from prazo.utils.pagination import InvalidCursor, page_filter
+from service.common import (
+    FEED_VERSION_POLL,
+    MONGODB_COLLECTION,
+    MONGODB_DB,
+    MONGODB_URI,
+    NEWS_CACHE_MAX_ENTRIES,
+    NEWS_CACHE_TTL,
+    NEWS_ITEM_PROJECTION,
+    SIMILAR_CANDIDATES,
+    PageRequest,
+    SearchRequest,
+    SimilarRequest,
+    dumps,
+    embedding_model,
+    encode_story,
+    ensure_database,
+    last_event_id,
+    metrics,
+    mongo_metrics,
+    news_page,
+    parse_page_request,
+    parse_search_request,
+    parse_semantic_request,
+    parse_similar_request,
+    query_vector,
+    record_request,
+    search_page,
+    server_metrics,
+    similar_filter,
+    similar_page,
+)
+
 logger = logging.getLogger(__name__)
 
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-MONGODB_URI = os.getenv("MONGODB_URI")
-MONGODB_DB = os.getenv("MONGODB_DB")
-MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION")
-
 # Initialize MongoDB connection
 try:
-    client = pymongo.MongoClient(MONGODB_URI)
+    client = pymongo.MongoClient(MONGODB_URI, event_listeners=[mongo_metrics])
     db = client[MONGODB_DB]
     collection = db[MONGODB_COLLECTION]
     logger.info("Connected to MongoDB successfully")
@@ -45,67 +93,138 @@ except Exception as e:
     db = None
     collection = None
 
-# Global cache to track seen URLs for deduplication across pagination
-# This gets reset when the server restarts or can be manually cleared
-seen_urls_cache = set()
-
-
-def serialize_news_item(item: dict) -> dict:
-    """Serialize a news item for JSON response"""
-    # Convert datetime objects to ISO format strings
-    if isinstance(item.get("published_date"), datetime):
-        item["published_date"] = item["published_date"].isoformat()
-    if isinstance(item.get("created_at"), datetime):
-        item["created_at"] = item["created_at"].isoformat()
-    if isinstance(item.get("updated_at"), datetime):
-        item["updated_at"] = item["updated_at"].isoformat()
-
-    # Remove MongoDB _id field
-    if "_id" in item:
-        del item["_id"]
-
-    return item
+if db is not None:
+    ensure_database(db)
+
+news_cache = ResponseCache(
+    max_entries=NEWS_CACHE_MAX_ENTRIES, ttl=NEWS_CACHE_TTL
+)
+feed_version = (
+    FeedVersion(db[META_COLLECTION], poll_interval=FEED_VERSION_POLL)
+    if db is not None
+    else None
+)
+# Embeddings of all stories, for similarity searches; loaded now and
+# topped up whenever the feed version changes
+vector_index = VectorIndex()
+if collection is not None:
+    vector_index.refresh(collection, feed_version.current())
+# Newly saved stories, pushed to `/api/news/stream` clients by one reader
+change_feed = (
+    ChangeFeed(collection, feed_version, NEWS_ITEM_PROJECTION, encode_story)
+    if collection is not None
+    else None
+)
+
+
+metrics.set_collector(
+    "server",
+    lambda: server_metrics(
+        news_cache, change_feed.subscriber_count if change_feed else 0
+    ),
+)
+
+
+@app.before_request
+def start_metrics():
+    g.started = time.perf_counter()
+    g.request_stats = start_request()
+
+
+@app.after_request
+def record_metrics(response: Response) -> Response:
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    streamed = response.is_streamed
+    record_request(
+        route,
+        request.method,
+        response.status_code,
+        None if streamed else time.perf_counter() - g.started,
+        None if streamed else response.calculate_content_length(),
+        g.request_stats,
+    )
+    return response
 
 
-def deduplicate_by_sources(news_items: List[dict]) -> List[dict]:
+def send_encoded(page: EncodedBody, cache_status: str) -> Response:
+    """
+    Send a pre-encoded body: 304 if the client already has it (`ETag` /
+    `Last-Modified`), compressed if the client accepts it.
     """
-    Deduplicate news items based on source URLs.
-    If two news items share any source URL, keep only the most recent one.
+    status, headers, body = conditional_response(page, request.headers)
+    headers["X-Cache"] = cache_status
+    return Response(body, status=status, headers=headers)
 
-    Args:
-        news_items: List of news item dictionaries (already sorted by date)
 
-    Returns:
-        List of unique news items
-    """
-    if not news_items:
-        return []
+@app.route("/api/news", methods=["GET"])
+def get_news():
+    """Get paginated news items from the database, sorted by time; duplicates are excluded at write time"""
+    try:
+        if collection is None:
+            return (
+                jsonify(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    }
+                ),
+                500,
+            )
 
-    seen_urls = set()
-    unique_items = []
+        try:
+            page_request = parse_page_request(request.args)
+        except InvalidCursor as e:
+            return jsonify({"error": str(e), "news_items": []}), 400
 
-    for item in news_items:
-        sources = item.get("sources", [])
+        page, cache_status = news_cache.get_or_compute(
+            page_request.cache_key,
+            feed_version.current(),
+            lambda: build_news_page(page_request),
+        )
+        return send_encoded(page, cache_status)
 
-        # Check if any source URL has been seen before
-        has_duplicate = any(url in seen_urls for url in sources)
+    except Exception as e:
+        logger.error(f"Error fetching news items: {e}")
+        return jsonify({"error": str(e), "news_items": []}), 500
 
-        if not has_duplicate:
-            # This is a unique item, add all its sources to seen_urls
-            seen_urls.update(sources)
-            unique_items.append(item)
 
-    logger.info(
-        f"Deduplicated {len(news_items)} items to {len(unique_items)} unique items"
+def build_news_page(page_request: PageRequest) -> EncodedBody:
+    """Query a feed page and encode the response body"""
+    # Build query filter based on category: 'daily' is news channel
+    # crawls, 'topics' everything that is NOT daily_news (including
+    # empty or missing tool_source); `topic` / `group` read that feed from
+    # its own index. Duplicate stories are marked when saved and filtered
+    # out by the query itself.
+    query = feed_query(
+        page_request.category, page_request.topic, page_request.group
     )
-    return unique_items
 
+    # One page after the cursor position (most recent first), plus one
+    # row to know whether more remain
+    news_items = list(
+        collection.find(
+            page_filter(query.filter, page_request.cursor_key),
+            NEWS_ITEM_PROJECTION,
+        )
+        .sort(FEED_SORT)
+        .hint(query.hint)
+        .limit(page_request.limit + 1)
+    )
+    # Total count for the category, only computed for the first page
+    total = (
+        collection.count_documents(query.filter)
+        if page_request.cursor_key is None
+        else None
+    )
+    return encode_body(
+        dumps(news_page(news_items, page_request, total)),
+        feed_version.updated_at,
+    )
 
-@app.route("/api/news", methods=["GET"])
-def get_news():
-    """Get paginated news items from the database, sorted by time and deduplicated"""
-    global seen_urls_cache
 
+@app.route("/api/news/search", methods=["GET"])
+def search_news():
+    """Search titles and summaries, most relevant first"""
     try:
         if collection is None:
             return (
@@ -118,111 +237,179 @@ def get_news():
                 500,
             )
 
-        # Get pagination parameters
-        from flask import request
-
-        limit = request.args.get("limit", 50, type=int)
-        offset = request.args.get("offset", 0, type=int)
-        reset_cache = request.args.get("reset", "false").lower() == "true"
-        category = request.args.get(
-            "category", "all"
-        )  # 'all', 'daily', or 'topics'
-
-        # Limit max items per request to prevent abuse
-        limit = min(limit, 100)
-
-        # Reset cache if requested (e.g., on page refresh)
-        if reset_cache or offset == 0:
-            seen_urls_cache = set()
-            logger.info("Reset deduplication cache")
-
-        # To handle deduplication properly with pagination, we need to:
-        # 1. Fetch more items than requested to account for duplicates
-        # 2. Deduplicate them against global seen URLs
-        # 3. Return only the requested number
-
-        # Fetch extra items to account for potential duplicates
-        # We'll fetch up to 3x the limit to ensure we get enough unique items
-        fetch_limit = limit * 3
-        unique_items = []
-        current_offset = offset
-
-        # Build query filter based on category
-        query_filter = {}
-        if category == "daily":
-            # Daily news typically comes from Tavily or other general news sources
-            query_filter = {"tool_source": {"$in": ["daily_news"]}}
-        elif category == "topics":
-            # Topics/followed sources: everything that is NOT daily_news
-            # This includes empty tool_source, missing tool_source, and any other sources
-            query_filter = {"tool_source": {"$nin": ["daily_news"]}}
-
-        # Keep fetching until we have enough unique items or run out of data
-        while len(unique_items) < limit:
-            # Fetch a batch of news items sorted by published_date (most recent first)
-            news_items = list(
-                collection.find(query_filter)
-                .sort(
-                    [
-                        ("published_date", pymongo.DESCENDING),
-                        ("created_at", pymongo.DESCENDING),  # Fallback sort
-                    ]
-                )
-                .skip(current_offset)
-                .limit(fetch_limit)
-            )
+        try:
+            search = parse_search_request(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e), "news_items": []}), 400
 
-            if not news_items:
-                # No more items in database
-                break
+        page, cache_status = news_cache.get_or_compute(
+            search.cache_key,
+            feed_version.current(),
+            lambda: build_search_page(search),
+        )
+        return send_encoded(page, cache_status)
 
-            # Filter out items that we've already seen
-            for item in news_items:
-                sources = item.get("sources", [])
+    except Exception as e:
+        logger.error(f"Error searching news items: {e}")
+        return jsonify({"error": str(e), "news_items": []}), 500
 
-                # Check if any source URL has been seen before
-                has_duplicate = any(url in seen_urls_cache for url in sources)
 
-                if not has_duplicate and len(unique_items) < limit:
-                    # This is a unique item, add it and track its sources
-                    seen_urls_cache.update(sources)
-                    unique_items.append(item)
+def build_search_page(search: SearchRequest) -> EncodedBody:
+    """Run a search on the text index and encode the response body"""
+    results = list(
+        collection.aggregate(
+            search_pipeline(
+                search.text,
+                search_filter(
+                    search.category, search.topic, search.since, search.until
+                ),
+                NEWS_ITEM_PROJECTION,
+                search.cursor_key,
+                search.limit,
+            )
+        )
+    )
+    return encode_body(
+        dumps(search_page(results, search)), feed_version.updated_at
+    )
+
+
+@app.route("/api/news/stream", methods=["GET"])
+def stream_news():
+    """Server-sent events: one `story` event per newly saved story"""
+    if collection is None:
+        return jsonify({"error": "Database connection not available"}), 500
+
+    category = request.args.get("category", "all")
+    replay_after = last_event_id(request.headers)
+    subscriber = change_feed.subscribe()
+
+    def events():
+        try:
+            if replay_after is not None:
+                # Reconnected: what was saved since the last event received
+                for event in change_feed.missed(replay_after):
+                    if in_category(event.tool_source, category):
+                        yield event.sse()
+            while True:
+                try:
+                    event = subscriber.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield SSE_HEARTBEAT
+                    continue
+                if event is None:
+                    return
+                if in_category(event.tool_source, category):
+                    yield event.sse()
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-            # If we didn't get any new unique items, try fetching more from next batch
-            if len(unique_items) < limit and len(news_items) == fetch_limit:
-                current_offset += fetch_limit
-            else:
-                break
 
-        # Serialize and prepare response
-        serialized_items = [serialize_news_item(item) for item in unique_items]
+@app.route("/api/news/similar", methods=["GET"])
+def similar_news():
+    """Stories closest in meaning to a given one ("more like this")"""
+    try:
+        if collection is None:
+            return (
+                jsonify(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    }
+                ),
+                500,
+            )
 
-        # Get total count for the category
-        total_count = collection.count_documents(query_filter)
+        try:
+            similar = parse_similar_request(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e), "news_items": []}), 400
 
-        # Calculate if there are more items
-        has_more = current_offset + len(news_items) < total_count
+        version = feed_version.current()
+        vector_index.refresh(collection, version)
+        story_vector = vector_index.vector(similar.story_id)
+        if story_vector is None:
+            return (
+                jsonify(
+                    {
+                        "error": f"No embedding stored for story {similar.story_id}",
+                        "news_items": [],
+                    }
+                ),
+                404,
+            )
 
-        logger.info(
-            f"Retrieved {len(serialized_items)} unique news items (offset: {offset}, limit: {limit}, cached URLs: {len(seen_urls_cache)})"
+        page, cache_status = news_cache.get_or_compute(
+            similar.cache_key,
+            version,
+            lambda: build_similar_page(similar, story_vector),
         )
+        return send_encoded(page, cache_status)
 
-        return jsonify(
-            {
-                "count": len(serialized_items),
-                "total": total_count,
-                "offset": offset,
-                "limit": limit,
-                "has_more": has_more,
-                "news_items": serialized_items,
-            }
+    except Exception as e:
+        logger.error(f"Error fetching similar news items: {e}")
+        return jsonify({"error": str(e), "news_items": []}), 500
+
+
+@app.route("/api/news/semantic-search", methods=["GET"])
+def semantic_search():
+    """Stories closest in meaning to a free-text query"""
+    try:
+        if collection is None:
+            return (
+                jsonify(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    }
+                ),
+                500,
+            )
+
+        try:
+            similar = parse_semantic_request(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e), "news_items": []}), 400
+
+        version = feed_version.current()
+        vector_index.refresh(collection, version)
+        # The query is only embedded on a cache miss
+        page, cache_status = news_cache.get_or_compute(
+            similar.cache_key,
+            version,
+            lambda: build_similar_page(
+                similar,
+                query_vector(embedding_model().embed_query(similar.text)),
+            ),
         )
+        return send_encoded(page, cache_status)
 
     except Exception as e:
-        logger.error(f"Error fetching news items: {e}")
+        logger.error(f"Error in semantic search: {e}")
         return jsonify({"error": str(e), "news_items": []}), 500
 
 
+def build_similar_page(similar: SimilarRequest, vector) -> EncodedBody:
+    """Rank stories by similarity to `vector` and encode the response body"""
+    ranked = vector_index.search(
+        vector,
+        similar.limit * SIMILAR_CANDIDATES,
+        exclude={similar.story_id} if similar.story_id else None,
+    )[0]
+    docs = list(
+        collection.find(similar_filter(similar, ranked), NEWS_ITEM_PROJECTION)
+    )
+    return encode_body(
+        dumps(similar_page(docs, ranked, similar)), feed_version.updated_at
+    )
+
+
 @app.route("/api/news/stats", methods=["GET"])
 def get_stats():
     """Get statistics about the news collection"""
@@ -230,63 +417,74 @@ def get_stats():
         if collection is None:
             return jsonify({"error": "Database connection not available"}), 500
 
-        total_items = collection.count_documents({})
-
-        # Get counts by tool source
-        tool_sources = collection.aggregate(
-            [
-                {"$unwind": "$tool_source"},
-                {"$group": {"_id": "$tool_source", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-            ]
+        page, cache_status = news_cache.get_or_compute(
+            ("stats",), feed_version.current(), build_stats
         )
+        return send_encoded(page, cache_status)
 
-        # Get counts by topic
-        topics = collection.aggregate(
-            [
-                {"$unwind": "$topic"},
-                {"$group": {"_id": "$topic", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}},
-                {"$limit": 10},
-            ]
-        )
+    except Exception as e:
+        logger.error(f"Error fetching stats: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
+def build_stats() -> EncodedBody:
+    """Read the stats counters kept by the agent and encode the response body"""
+    # A handful of small counter documents, whatever the collection size
+    return encode_body(
+        dumps(read_stats(db[STATS_COLLECTION])),
+        feed_version.updated_at,
+    )
 
-        return jsonify(
-            {
-                "total_items": total_items,
-                "by_tool_source": list(tool_sources),
-                "top_topics": list(topics),
-            }
+
+@app.route("/api/news/facets", methods=["GET"])
+def get_facets():
+    """Topics and groups the feed can be filtered on, with story counts"""
+    try:
+        if collection is None:
+            return jsonify({"error": "Database connection not available"}), 500
+
+        page, cache_status = news_cache.get_or_compute(
+            ("facets",), feed_version.current(), build_facets
         )
+        return send_encoded(page, cache_status)
 
     except Exception as e:
-        logger.error(f"Error fetching stats: {e}")
+        logger.error(f"Error fetching facets: {e}")
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/health", methods=["GET"])
-def health_check():
-    """Health check endpoint"""
-    db_status = "connected" if collection is not None else "disconnected"
+def build_facets() -> EncodedBody:
+    """Read the topic and group counters and encode the response body"""
+    return encode_body(
+        dumps(read_facets(db[STATS_COLLECTION])),
+        feed_version.updated_at,
+    )
+
+
+@app.route("/api/cache/stats", methods=["GET"])
+def get_cache_stats():
+    """Hit ratio and latency of the news page cache"""
     return jsonify(
         {
-            "status": "ok",
-            "database": db_status,
-            "cached_urls": len(seen_urls_cache),
+            "feed_version": (
+                feed_version.current() if feed_version is not None else None
+            ),
+            **news_cache.stats(),
         }
     )
 
 
-@app.route("/api/news/clear-cache", methods=["POST"])
-def clear_cache():
-    """Clear the deduplication cache"""
-    global seen_urls_cache
-    old_size = len(seen_urls_cache)
-    seen_urls_cache = set()
-    logger.info(f"Cleared deduplication cache (was {old_size} URLs)")
-    return jsonify(
-        {"status": "ok", "message": f"Cache cleared ({old_size} URLs removed)"}
-    )
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """Request, MongoDB and cache metrics in the Prometheus text format"""
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+@app.route("/api/health", methods=["GET"])
+def health_check():
+    """Health check endpoint"""
+    db_status = "connected" if collection is not None else "disconnected"
+    return jsonify({"status": "ok", "database": db_status})
 
 
 if __name__ == "__main__":
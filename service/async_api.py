@@ -0,0 +1,594 @@
+"""
+Async server for the news API: the same routes and JSON contract as the
+Flask app (`api.py`), on aiohttp with a pooled async MongoDB client, so a
+worker keeps serving other clients while a request waits on the database.
+
+Several worker processes share the port (SO_REUSEPORT), each with its own
+connection pool and page cache.
+
+Usage: python service/async_api.py
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pymongo
+from aiohttp import web
+from pymongo import AsyncMongoClient
+
+# Add parent directory to path to import prazo
+sys.path.append(str(Path(__file__).parent.parent))
+
+from prazo.core.change_feed import (
+    HEARTBEAT_INTERVAL,
+    SSE_HEARTBEAT,
+    AsyncChangeFeed,
+)
+from prazo.core.feed_version import AsyncFeedVersion
+from prazo.core.indexes import (
+    FEED_SORT,
+    META_COLLECTION,
+    feed_query,
+    in_category,
+)
+from prazo.core.stats import STATS_COLLECTION, aread_facets, aread_stats
+from prazo.core.text_search import search_filter, search_pipeline
+from prazo.core.vector_index import AsyncVectorIndex
+from prazo.utils.cache import ResponseCache
+from prazo.utils.http_body import (
+    EncodedBody,
+    conditional_response,
+    encode_body,
+)
+from prazo.utils.metrics import CONTENT_TYPE, start_request
+from prazo.utils.pagination import InvalidCursor, page_filter
+from service.common import (
+    FEED_VERSION_POLL,
+    MONGODB_COLLECTION,
+    MONGODB_DB,
+    MONGODB_MAX_IDLE_TIME_MS,
+    MONGODB_MAX_POOL_SIZE,
+    MONGODB_MIN_POOL_SIZE,
+    MONGODB_URI,
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+    NEWS_CACHE_MAX_ENTRIES,
+    NEWS_CACHE_TTL,
+    NEWS_ITEM_PROJECTION,
+    SIMILAR_CANDIDATES,
+    PageRequest,
+    SearchRequest,
+    SimilarRequest,
+    dumps,
+    embedding_model,
+    encode_story,
+    ensure_database,
+    last_event_id,
+    metrics,
+    mongo_metrics,
+    news_page,
+    parse_page_request,
+    parse_search_request,
+    parse_semantic_request,
+    parse_similar_request,
+    query_vector,
+    record_request,
+    search_page,
+    server_metrics,
+    similar_filter,
+    similar_page,
+)
+
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+# Worker processes; one event loop each serves thousands of open requests
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 2))
+
+
+class NewsAPI:
+    """Route handlers of one worker process, with its client and cache"""
+
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self.collection = None
+        self.feed_version = None
+        self.vector_index = AsyncVectorIndex()
+        self.change_feed = None
+        self.news_cache = ResponseCache(
+            max_entries=NEWS_CACHE_MAX_ENTRIES, ttl=NEWS_CACHE_TTL
+        )
+
+    async def connect(self, app: web.Application):
+        # Created on the worker's event loop, which the client is bound to
+        try:
+            self.client = AsyncMongoClient(
+                MONGODB_URI,
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                event_listeners=[mongo_metrics],
+            )
+            self.db = self.client[MONGODB_DB]
+            self.collection = self.db[MONGODB_COLLECTION]
+            self.feed_version = AsyncFeedVersion(
+                self.db[META_COLLECTION], poll_interval=FEED_VERSION_POLL
+            )
+            logger.info("Connected to MongoDB successfully")
+        except Exception as e:
+            logger.error(f"Failed to connect to MongoDB: {e}")
+            return
+        # Embeddings of all stories, topped up when the feed version changes
+        await self.vector_index.arefresh(
+            self.collection, await self.feed_version.acurrent()
+        )
+        # Newly saved stories, pushed to `/api/news/stream` clients
+        self.change_feed = AsyncChangeFeed(
+            self.collection,
+            self.feed_version,
+            NEWS_ITEM_PROJECTION,
+            encode_story,
+        )
+        self.change_feed.start()
+
+    async def end_streams(self, app: web.Application):
+        # Open streams would otherwise hold the shutdown
+        if self.change_feed is not None:
+            self.change_feed.close_subscribers()
+
+    async def close(self, app: web.Application):
+        if self.change_feed is not None:
+            await self.change_feed.stop()
+        if self.client is not None:
+            await self.client.close()
+
+    @staticmethod
+    def send_encoded(
+        request: web.Request, page: EncodedBody, cache_status: str
+    ) -> web.Response:
+        """Send a pre-encoded body, see `api.send_encoded`"""
+        status, headers, body = conditional_response(page, request.headers)
+        headers["X-Cache"] = cache_status
+        return web.Response(body=body or None, status=status, headers=headers)
+
+    async def get_news(self, request: web.Request) -> web.Response:
+        """Get paginated news items, see `api.get_news`"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    },
+                    status=500,
+                )
+
+            try:
+                page_request = parse_page_request(request.query)
+            except InvalidCursor as e:
+                return web.json_response(
+                    {"error": str(e), "news_items": []}, status=400
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                page_request.cache_key,
+                await self.feed_version.acurrent(),
+                lambda: self.build_news_page(page_request),
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error fetching news items: {e}")
+            return web.json_response(
+                {"error": str(e), "news_items": []}, status=500
+            )
+
+    async def build_news_page(self, page_request: PageRequest) -> EncodedBody:
+        """Query a feed page and encode the response body"""
+        query = feed_query(
+            page_request.category, page_request.topic, page_request.group
+        )
+        news_items = (
+            await self.collection.find(
+                page_filter(query.filter, page_request.cursor_key),
+                NEWS_ITEM_PROJECTION,
+            )
+            .sort(FEED_SORT)
+            .hint(query.hint)
+            .limit(page_request.limit + 1)
+            .to_list()
+        )
+        total = (
+            await self.collection.count_documents(query.filter)
+            if page_request.cursor_key is None
+            else None
+        )
+        return encode_body(
+            dumps(news_page(news_items, page_request, total)),
+            self.feed_version.updated_at,
+        )
+
+    async def search_news(self, request: web.Request) -> web.Response:
+        """Search titles and summaries, see `api.search_news`"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    },
+                    status=500,
+                )
+
+            try:
+                search = parse_search_request(request.query)
+            except ValueError as e:
+                return web.json_response(
+                    {"error": str(e), "news_items": []}, status=400
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                search.cache_key,
+                await self.feed_version.acurrent(),
+                lambda: self.build_search_page(search),
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error searching news items: {e}")
+            return web.json_response(
+                {"error": str(e), "news_items": []}, status=500
+            )
+
+    async def build_search_page(self, search: SearchRequest) -> EncodedBody:
+        """Run a search on the text index and encode the response body"""
+        cursor = await self.collection.aggregate(
+            search_pipeline(
+                search.text,
+                search_filter(
+                    search.category, search.topic, search.since, search.until
+                ),
+                NEWS_ITEM_PROJECTION,
+                search.cursor_key,
+                search.limit,
+            )
+        )
+        return encode_body(
+            dumps(search_page(await cursor.to_list(), search)),
+            self.feed_version.updated_at,
+        )
+
+    async def stream_news(self, request: web.Request) -> web.StreamResponse:
+        """Server-sent events, see `api.stream_news`"""
+        if self.change_feed is None:
+            return web.json_response(
+                {"error": "Database connection not available"}, status=500
+            )
+
+        category = request.query.get("category", "all")
+        replay_after = last_event_id(request.headers)
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            }
+        )
+        await response.prepare(request)
+        subscriber = self.change_feed.subscribe()
+        try:
+            if replay_after is not None:
+                # Reconnected: what was saved since the last event received
+                for event in await self.change_feed.amissed(replay_after):
+                    if in_category(event.tool_source, category):
+                        await response.write(event.sse())
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscriber.get(), HEARTBEAT_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    await response.write(SSE_HEARTBEAT)
+                    continue
+                if event is None:
+                    break
+                if in_category(event.tool_source, category):
+                    await response.write(event.sse())
+        except ConnectionResetError:
+            # Client went away
+            pass
+        finally:
+            self.change_feed.unsubscribe(subscriber)
+        return response
+
+    async def similar_news(self, request: web.Request) -> web.Response:
+        """Stories closest in meaning to a given one, see `api.similar_news`"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    },
+                    status=500,
+                )
+
+            try:
+                similar = parse_similar_request(request.query)
+            except ValueError as e:
+                return web.json_response(
+                    {"error": str(e), "news_items": []}, status=400
+                )
+
+            version = await self.feed_version.acurrent()
+            await self.vector_index.arefresh(self.collection, version)
+            story_vector = self.vector_index.vector(similar.story_id)
+            if story_vector is None:
+                return web.json_response(
+                    {
+                        "error": f"No embedding stored for story {similar.story_id}",
+                        "news_items": [],
+                    },
+                    status=404,
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                similar.cache_key,
+                version,
+                lambda: self.build_similar_page(similar, story_vector),
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error fetching similar news items: {e}")
+            return web.json_response(
+                {"error": str(e), "news_items": []}, status=500
+            )
+
+    async def semantic_search(self, request: web.Request) -> web.Response:
+        """Stories closest in meaning to a free-text query"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {
+                        "error": "Database connection not available",
+                        "news_items": [],
+                    },
+                    status=500,
+                )
+
+            try:
+                similar = parse_semantic_request(request.query)
+            except ValueError as e:
+                return web.json_response(
+                    {"error": str(e), "news_items": []}, status=400
+                )
+
+            version = await self.feed_version.acurrent()
+            await self.vector_index.arefresh(self.collection, version)
+
+            async def build():
+                # The query is only embedded on a cache miss
+                embedding = await embedding_model().aembed_query(similar.text)
+                return await self.build_similar_page(
+                    similar, query_vector(embedding)
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                similar.cache_key, version, build
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error in semantic search: {e}")
+            return web.json_response(
+                {"error": str(e), "news_items": []}, status=500
+            )
+
+    async def build_similar_page(
+        self, similar: SimilarRequest, vector
+    ) -> EncodedBody:
+        """Rank stories by similarity to `vector` and encode the response body"""
+        ranked = self.vector_index.search(
+            vector,
+            similar.limit * SIMILAR_CANDIDATES,
+            exclude={similar.story_id} if similar.story_id else None,
+        )[0]
+        docs = await self.collection.find(
+            similar_filter(similar, ranked), NEWS_ITEM_PROJECTION
+        ).to_list()
+        return encode_body(
+            dumps(similar_page(docs, ranked, similar)),
+            self.feed_version.updated_at,
+        )
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        """Get statistics about the news collection"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {"error": "Database connection not available"}, status=500
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                ("stats",), await self.feed_version.acurrent(), self.build_stats
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error fetching stats: {e}")
+            return web.json_response({"error": str(e)}, status=500)
+
+    async def build_stats(self) -> EncodedBody:
+        return encode_body(
+            dumps(await aread_stats(self.db[STATS_COLLECTION])),
+            self.feed_version.updated_at,
+        )
+
+    async def get_facets(self, request: web.Request) -> web.Response:
+        """Topics and groups the feed can be filtered on, with story counts"""
+        try:
+            if self.collection is None:
+                return web.json_response(
+                    {"error": "Database connection not available"}, status=500
+                )
+
+            page, cache_status = await self.news_cache.aget_or_compute(
+                ("facets",),
+                await self.feed_version.acurrent(),
+                self.build_facets,
+            )
+            return self.send_encoded(request, page, cache_status)
+
+        except Exception as e:
+            logger.error(f"Error fetching facets: {e}")
+            return web.json_response({"error": str(e)}, status=500)
+
+    async def build_facets(self) -> EncodedBody:
+        return encode_body(
+            dumps(await aread_facets(self.db[STATS_COLLECTION])),
+            self.feed_version.updated_at,
+        )
+
+    async def get_cache_stats(self, request: web.Request) -> web.Response:
+        """Hit ratio and latency of the news page cache"""
+        return web.json_response(
+            {
+                "feed_version": (
+                    await self.feed_version.acurrent()
+                    if self.feed_version is not None
+                    else None
+                ),
+                **self.news_cache.stats(),
+            }
+        )
+
+    async def get_metrics(self, request: web.Request) -> web.Response:
+        """Metrics of this worker, see `api.get_metrics`"""
+        return web.Response(
+            body=metrics.render(), headers={"Content-Type": CONTENT_TYPE}
+        )
+
+    def server_metrics(self) -> list:
+        subscribers = (
+            self.change_feed.subscriber_count if self.change_feed else 0
+        )
+        return server_metrics(self.news_cache, subscribers)
+
+    async def health_check(self, request: web.Request) -> web.Response:
+        """Health check endpoint"""
+        db_status = (
+            "connected" if self.collection is not None else "disconnected"
+        )
+        return web.json_response({"status": "ok", "database": db_status})
+
+
+@web.middleware
+async def record_metrics(request: web.Request, handler) -> web.StreamResponse:
+    started = time.perf_counter()
+    stats = start_request()
+    response = None
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        # Streams are counted, their duration is the connection's
+        timed = isinstance(response, web.Response)
+        record_request(
+            resource.canonical if resource is not None else "unmatched",
+            request.method,
+            status,
+            time.perf_counter() - started if timed else None,
+            response.content_length if timed else None,
+            stats,
+        )
+
+
+async def allow_cors(request: web.Request, response: web.StreamResponse):
+    # Same as flask_cors defaults: any origin
+    if "Origin" in request.headers:
+        response.headers["Access-Control-Allow-Origin"] = "*"
+
+
+def create_app() -> web.Application:
+    api = NewsAPI()
+    app = web.Application(middlewares=[record_metrics])
+    metrics.set_collector("server", api.server_metrics)
+    app.on_startup.append(api.connect)
+    app.on_shutdown.append(api.end_streams)
+    app.on_cleanup.append(api.close)
+    app.on_response_prepare.append(allow_cors)
+    app.router.add_get("/api/news", api.get_news)
+    app.router.add_get("/api/news/search", api.search_news)
+    app.router.add_get("/api/news/stream", api.stream_news)
+    app.router.add_get("/api/news/similar", api.similar_news)
+    app.router.add_get("/api/news/semantic-search", api.semantic_search)
+    app.router.add_get("/api/news/stats", api.get_stats)
+    app.router.add_get("/api/news/facets", api.get_facets)
+    app.router.add_get("/api/cache/stats", api.get_cache_stats)
+    app.router.add_get("/api/metrics", api.get_metrics)
+    app.router.add_get("/api/health", api.health_check)
+    return app
+
+
+def run_worker():
+    web.run_app(
+        create_app(),
+        host=HOST,
+        port=PORT,
+        reuse_port=WEB_WORKERS > 1,
+        access_log=None,
+        print=None,
+    )
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    # Once for all workers
+    client = pymongo.MongoClient(MONGODB_URI)
+    ensure_database(client[MONGODB_DB])
+    client.close()
+
+    print(f"API will be available at: http://localhost:{PORT}")
+    print(f"Database: {MONGODB_DB}, Collection: {MONGODB_COLLECTION}")
+    if WEB_WORKERS <= 1:
+        run_worker()
+        return
+
+    # Spawned, not forked: MongoDB clients must not cross a fork
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker, name=f"news-api-{i}")
+        for i in range(WEB_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def stop(signum, frame):
+        # Each worker shuts down gracefully on SIGTERM
+        for worker in workers:
+            worker.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+"""
+Settings and helpers shared by the Flask API (`api.py`) and the async
+server (`async_api.py`), which serve the same routes and JSON contract.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Union
+
+import numpy as np
+import orjson
+from bson import ObjectId
+from bson.errors import InvalidId
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+
+load_dotenv()
+
+from prazo.core.indexes import (
+    META_COLLECTION,
+    NEWS_ITEM_PROJECTION,
+    ensure_indexes,
+    feed_query,
+    log_index_report,
+)
+from prazo.core.stats import STATS_COLLECTION, ensure_stats_indexes
+from prazo.core.text_search import (
+    SEARCH_SORT_FIELDS,
+    highlight_snippet,
+    parse_date_bound,
+    search_terms,
+)
+from prazo.core.vector_index import EMBEDDING_MODEL, normalize
+from prazo.utils.cache import ResponseCache
+from prazo.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MongoMetrics,
+    Registry,
+    RequestStats,
+)
+from prazo.utils.pagination import (
+    FEED_SORT_FIELDS,
+    decode_cursor,
+    encode_cursor,
+)
+
+logger = logging.getLogger(__name__)
+
+# Served at `/api/metrics`, one registry per worker process
+metrics = Registry({"worker": str(os.getpid())})
+request_count = metrics.register(
+    Counter(
+        "news_api_requests_total",
+        "Requests served, by route and status",
+        ["route", "method", "status"],
+    )
+)
+request_latency = metrics.register(
+    Histogram(
+        "news_api_request_duration_seconds",
+        "Time to serve a request (streams excluded)",
+        ["route"],
+    )
+)
+response_size = metrics.register(
+    Histogram(
+        "news_api_response_size_bytes",
+        "Response body size as sent (compressed or not)",
+        ["route"],
+        buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+    )
+)
+request_mongodb_seconds = metrics.register(
+    Histogram(
+        "news_api_request_mongodb_seconds",
+        "MongoDB time spent per request",
+        ["route"],
+    )
+)
+request_mongodb_queries = metrics.register(
+    Histogram(
+        "news_api_request_mongodb_queries",
+        "MongoDB commands run per request (0 when served from the cache)",
+        ["route"],
+        buckets=(0, 1, 2, 3, 5, 10),
+    )
+)
+request_documents = metrics.register(
+    Histogram(
+        "news_api_request_documents_returned",
+        "Documents MongoDB returned per request",
+        ["route"],
+        buckets=(0, 1, 10, 50, 100, 250, 500, 1000),
+    )
+)
+# Passed to the MongoDB clients as an event listener
+mongo_metrics = MongoMetrics(metrics, "news_api")
+
+MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_DB = os.getenv("MONGODB_DB")
+MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION")
+# Feed pages (and stats) are served from memory until the agent saves (bumps
+# the feed version, checked at most every FEED_VERSION_POLL seconds) or they
+# expire
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", 60))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", 1024))
+FEED_VERSION_POLL = float(os.getenv("FEED_VERSION_POLL", 1))
+
+# Connection pool of the async server, per worker process. Most requests
+# are answered from the page cache, so a small pool serves many clients.
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 50))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 5))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 60000))
+# Fail a request (500) instead of queueing it forever when the pool is busy
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(
+    os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 2000)
+)
+
+DEFAULT_LIMIT = 50
+# Limit max items per request to prevent abuse
+MAX_LIMIT = 100
+MAX_SEARCH_LENGTH = 200
+SIMILAR_LIMIT = 10
+# Nearest stories fetched per result wanted, the rest make up for
+# duplicates and category filters
+SIMILAR_CANDIDATES = 4
+
+# Summary length of list views (`compact=1`), the full text is in the
+# non-compact response
+COMPACT_SUMMARY_WORDS = 40
+
+
+@dataclass
+class PageRequest:
+    """Parameters of a `/api/news` request"""
+
+    category: str
+    cursor: Optional[str]
+    cursor_key: Optional[List[Any]]
+    limit: int
+    compact: bool = False
+    topic: Optional[str] = None
+    group: Optional[str] = None
+
+    @property
+    def cache_key(self) -> tuple:
+        return (
+            self.category,
+            self.topic,
+            self.group,
+            self.cursor,
+            self.limit,
+            self.compact,
+        )
+
+
+@dataclass
+class SearchRequest:
+    """Parameters of a `/api/news/search` request"""
+
+    text: str
+    category: str
+    topic: Optional[str]
+    since: Optional[datetime]
+    until: Optional[datetime]
+    cursor: Optional[str]
+    cursor_key: Optional[List[Any]]
+    limit: int
+    compact: bool = False
+    highlight: bool = False
+
+    @property
+    def cache_key(self) -> tuple:
+        return (
+            "search",
+            self.text,
+            self.category,
+            self.topic,
+            self.since,
+            self.until,
+            self.cursor,
+            self.limit,
+            self.compact,
+            self.highlight,
+        )
+
+
+@dataclass
+class SimilarRequest:
+    """
+    Parameters of a `/api/news/similar` (`story_id`) or
+    `/api/news/semantic-search` (`text`) request
+    """
+
+    story_id: Optional[ObjectId]
+    text: Optional[str]
+    category: str
+    limit: int
+    compact: bool = False
+
+    @property
+    def cache_key(self) -> tuple:
+        return (
+            "similar",
+            self.story_id,
+            self.text,
+            self.category,
+            self.limit,
+            self.compact,
+        )
+
+
+def parse_limit(args: Mapping[str, str], default: int = DEFAULT_LIMIT) -> int:
+    try:
+        limit = int(args.get("limit", default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def parse_flag(args: Mapping[str, str], name: str) -> bool:
+    return args.get(name, "").lower() in ("1", "true")
+
+
+def parse_page_request(args: Mapping[str, str]) -> PageRequest:
+    """
+    Read the `/api/news` query parameters.
+
+    Args:
+        args: Query parameters (`limit`, `cursor`, `category`: 'all',
+            'daily' or 'topics', `topic` / `group`: only that topic's or
+            group's stories, and `compact`: truncated summaries)
+
+    Raises:
+        InvalidCursor: If the cursor was not produced by this API
+    """
+    cursor = args.get("cursor") or None
+    return PageRequest(
+        category=args.get("category", "all"),
+        cursor=cursor,
+        cursor_key=decode_cursor(cursor) if cursor else None,
+        limit=parse_limit(args),
+        compact=parse_flag(args, "compact"),
+        topic=args.get("topic") or None,
+        group=args.get("group") or None,
+    )
+
+
+def parse_search_request(args: Mapping[str, str]) -> SearchRequest:
+    """
+    Read the `/api/news/search` query parameters.
+
+    Args:
+        args: Query parameters: `q` (words, "phrases" and -excluded words),
+            `category`, `topic`, `since` / `until` (ISO dates, inclusive),
+            `limit`, `cursor`, `compact` and `highlight` (add a `snippet`
+            of the summary with the matched words in `<mark>`)
+
+    Raises:
+        ValueError: If the search string is missing or too long, a date is
+            malformed or the cursor was not produced by this API
+    """
+    text = parse_search_text(args)
+    try:
+        since = parse_date_bound(args.get("since"))
+        until = parse_date_bound(args.get("until"), end=True)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {e}") from e
+    cursor = args.get("cursor") or None
+    return SearchRequest(
+        text=text,
+        category=args.get("category", "all"),
+        topic=args.get("topic") or None,
+        since=since,
+        until=until,
+        cursor=cursor,
+        cursor_key=(
+            decode_cursor(cursor, SEARCH_SORT_FIELDS) if cursor else None
+        ),
+        limit=parse_limit(args),
+        compact=parse_flag(args, "compact"),
+        highlight=parse_flag(args, "highlight"),
+    )
+
+
+def parse_search_text(args: Mapping[str, str]) -> str:
+    text = args.get("q", "").strip()
+    if not text:
+        raise ValueError("Missing search query: q")
+    if len(text) > MAX_SEARCH_LENGTH:
+        raise ValueError(
+            f"Search query longer than {MAX_SEARCH_LENGTH} characters"
+        )
+    return text
+
+
+def parse_similar_request(args: Mapping[str, str]) -> SimilarRequest:
+    """
+    Read the `/api/news/similar` query parameters.
+
+    Args:
+        args: Query parameters: `id` (of a news item), `category`, `limit`
+            (default 10) and `compact`
+
+    Raises:
+        ValueError: If the story id is missing or malformed
+    """
+    try:
+        story_id = ObjectId(args.get("id", ""))
+    except (InvalidId, TypeError) as e:
+        raise ValueError(f"Invalid story id: {args.get('id')}") from e
+    return SimilarRequest(
+        story_id=story_id,
+        text=None,
+        category=args.get("category", "all"),
+        limit=parse_limit(args, SIMILAR_LIMIT),
+        compact=parse_flag(args, "compact"),
+    )
+
+
+def parse_semantic_request(args: Mapping[str, str]) -> SimilarRequest:
+    """
+    Read the `/api/news/semantic-search` query parameters.
+
+    Args:
+        args: Query parameters: `q` (free text, matched by meaning),
+            `category`, `limit` (default 10) and `compact`
+
+    Raises:
+        ValueError: If the search string is missing or too long
+    """
+    return SimilarRequest(
+        story_id=None,
+        text=parse_search_text(args),
+        category=args.get("category", "all"),
+        limit=parse_limit(args, SIMILAR_LIMIT),
+        compact=parse_flag(args, "compact"),
+    )
+
+
+@lru_cache(maxsize=1)
+def embedding_model() -> OpenAIEmbeddings:
+    """Embeds semantic search queries, with the model of the stored stories"""
+    # Created on first use: only semantic search needs an OpenAI key
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL)
+
+
+def query_vector(embedding: List[float]) -> np.ndarray:
+    return normalize(np.asarray(embedding, dtype=np.float32))
+
+
+def similar_filter(similar: SimilarRequest, ranked: list) -> dict:
+    """Filter fetching the canonical stories among the nearest ones"""
+    return {
+        "_id": {"$in": [key for key, _ in ranked]},
+        **feed_query(similar.category).filter,
+    }
+
+
+def similar_page(
+    docs: List[dict], ranked: list, similar: SimilarRequest
+) -> dict:
+    """
+    Response of a similarity search.
+
+    Args:
+        docs: Stories fetched with `similar_filter`
+        ranked: (`_id`, cosine similarity) pairs, most similar first
+        similar: Request parameters
+    """
+    by_id = {doc["_id"]: doc for doc in docs}
+    items = []
+    for key, score in ranked:
+        doc = by_id.get(key)
+        if doc is None:
+            # Duplicate, or filtered out by the category
+            continue
+        doc["score"] = score
+        items.append(serialize_news_item(doc, similar.compact))
+        if len(items) == similar.limit:
+            break
+    return {"count": len(items), "limit": similar.limit, "news_items": items}
+
+
+def truncate_words(text: str, max_words: int) -> str:
+    """Cut `text` after `max_words` words, marking the cut with an ellipsis"""
+    if not text:
+        return ""
+    words = text.split(maxsplit=max_words)
+    if len(words) <= max_words:
+        return text
+    return " ".join(words[:max_words]) + "…"
+
+
+def serialize_news_item(item: dict, compact: bool = False) -> dict:
+    """Prepare a projected news item for `dumps`, which encodes dates"""
+    # MongoDB _id (an ObjectId) as a string id, for `/api/news/similar`
+    if "_id" in item:
+        item["id"] = str(item.pop("_id"))
+    if compact and item.get("summary"):
+        item["summary"] = truncate_words(item["summary"], COMPACT_SUMMARY_WORDS)
+    return item
+
+
+def news_page(
+    news_items: List[dict],
+    page: Union[PageRequest, SearchRequest],
+    total: Optional[int],
+    cursor_fields: List[str] = FEED_SORT_FIELDS,
+) -> dict:
+    """
+    Response of a feed (or search) page.
+
+    Args:
+        news_items: Up to `limit + 1` documents after the cursor, the extra
+            one only tells whether more remain
+        page: Request parameters
+        total: Items in the category, sent with the first page only
+        cursor_fields: Sort order of the page
+    """
+    has_more = len(news_items) > page.limit
+    news_items = news_items[: page.limit]
+
+    # Taken before serializing the last item (replaces `_id`)
+    next_cursor = (
+        encode_cursor(news_items[-1], cursor_fields)
+        if has_more and news_items
+        else None
+    )
+
+    # Serialize and prepare response
+    serialized_items = [
+        serialize_news_item(item, page.compact) for item in news_items
+    ]
+
+    response = {
+        "count": len(serialized_items),
+        "limit": page.limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "news_items": serialized_items,
+    }
+    if total is not None:
+        response["total"] = total
+
+    logger.info(
+        f"Retrieved {len(serialized_items)} unique news items (limit: {page.limit})"
+    )
+    return response
+
+
+def search_page(results: List[dict], search: SearchRequest) -> dict:
+    """Response of a search page, see `news_page`"""
+    if search.highlight:
+        terms = search_terms(search.text)
+        for item in results[: search.limit]:
+            item["snippet"] = highlight_snippet(
+                item.get("summary") or "", terms
+            )
+    return news_page(results, search, None, SEARCH_SORT_FIELDS)
+
+
+def dumps(response: dict) -> bytes:
+    """Compact JSON, datetimes as ISO 8601 strings (encoded by orjson)"""
+    return orjson.dumps(response)
+
+
+def encode_story(doc: dict) -> bytes:
+    """Payload of a `/api/news/stream` event: one item, as in `/api/news`"""
+    return dumps(serialize_news_item(doc))
+
+
+def last_event_id(headers: Mapping[str, str]) -> Optional[ObjectId]:
+    """Last story a reconnecting stream client received, if valid"""
+    try:
+        return ObjectId(headers.get("Last-Event-ID", ""))
+    except (InvalidId, TypeError):
+        return None
+
+
+def record_request(
+    route: str,
+    method: str,
+    status: int,
+    seconds: Optional[float],
+    size: Optional[int],
+    stats: RequestStats,
+):
+    """
+    Add a served request to the metrics.
+
+    Args:
+        route: Route pattern (not the path, which would add a series per
+            URL)
+        seconds: Time to serve it, `None` for a stream
+        size: Body bytes sent, `None` if unknown (streams)
+        stats: MongoDB work done for it
+    """
+    request_count.inc(route, method, str(status))
+    if seconds is None:
+        return
+    request_latency.observe(seconds, route)
+    if size is not None:
+        response_size.observe(size, route)
+    request_mongodb_seconds.observe(stats.db_seconds, route)
+    request_mongodb_queries.observe(stats.db_queries, route)
+    request_documents.observe(stats.documents_returned, route)
+
+
+def server_metrics(cache: ResponseCache, stream_subscribers: int) -> list:
+    """Metrics read from the page cache and change feed at scrape time."""
+    stats = cache.stats()
+    requests = Counter(
+        "news_api_cache_requests_total",
+        "Page cache lookups, by how they were served",
+        ["status"],
+    )
+    for status in ("hits", "misses", "coalesced"):
+        requests.inc(status, amount=stats[status])
+    evictions = Counter(
+        "news_api_cache_evictions_total", "Pages evicted from the cache"
+    )
+    evictions.inc(amount=stats["evictions"])
+    entries = Gauge("news_api_cache_entries", "Pages held in the cache")
+    entries.set(stats["entries"])
+    subscribers = Gauge(
+        "news_api_stream_subscribers", "Open `/api/news/stream` connections"
+    )
+    subscribers.set(stream_subscribers)
+    return [requests, evictions, entries, subscribers]
+
+
+def ensure_database(db):
+    """Feed queries rely on the declared indexes, create any missing ones."""
+    try:
+        collection = db[MONGODB_COLLECTION]
+        ensure_indexes(collection, db[META_COLLECTION])
+        ensure_stats_indexes(db[STATS_COLLECTION])
+        log_index_report(collection)
+    except Exception as e:
+        logger.error(f"Failed to ensure database indexes: {e}")
@@ -0,0 +1,507 @@
+"""
+Load test of the news API on a generated dataset.
+
+`seed` fills a MongoDB database (by default `news_agent_loadtest`, never the
+agent's) with synthetic stories shaped like the agent's: canonical stories
+plus duplicates sharing a source with them, marked as the save path marks
+them, skewed topics and tool sources. Indexes, stats counters and the feed
+version are set up as the agent would.
+
+`run` drives a running API (`/api/news` first pages, deep keyset
+pagination, `/api/news/stats`) with a fixed number of concurrent clients
+and reports latency percentiles, throughput and page cache hits. Given the
+MongoDB URI, it also reports the documents and index keys MongoDB examined
+per request (server-wide counters: use a dedicated local server).
+
+Usage:
+    python service/loadtest.py seed --docs 100000 --drop
+    MONGODB_DB=news_agent_loadtest python service/async_api.py
+    python service/loadtest.py run --concurrency 32 --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import aiohttp
+import numpy as np
+import pymongo
+from bson import ObjectId
+
+# Add parent directory to path to import from prazo
+sys.path.append(str(Path(__file__).parent.parent))
+
+from prazo.core.feed_version import bump_feed_version
+from prazo.core.indexes import META_COLLECTION, ensure_indexes
+from prazo.core.stats import (
+    STATS_COLLECTION,
+    ensure_stats_indexes,
+    reconcile_stats,
+)
+from prazo.utils.urls import story_key
+
+LOADTEST_DB = "news_agent_loadtest"
+CATEGORIES = ["all", "daily", "topics"]
+
+TOPICS = [
+    "AI, OpenAI, Anthropic, Gemini",
+    "Reinforcement Learning, Deep Learning",
+    "US Politics, Elections",
+    "Apple, Google, Microsoft",
+    "Markets, Economy",
+    "Climate, Energy",
+    "Space, NASA",
+    "Health, Medicine",
+    "Cricket, Football",
+    "India, Startups",
+]
+GROUPS = ["Technology", "AI", "Politics", "Business", "Science", "Health"]
+# Share of stories per tool, daily news channel crawls dominate
+TOOL_SOURCES = {
+    "daily_news": 0.55,
+    "tavily": 0.2,
+    "arxiv": 0.1,
+    "reddit": 0.1,
+    "wikipedia": 0.05,
+}
+DOMAINS = [f"news{i}.example.com" for i in range(200)]
+WORDS = (
+    "market model release policy court launch study report growth rate "
+    "team season vote energy climate chip data cloud health vaccine "
+    "startup funding deal space mission rocket league match index bank"
+).split()
+
+# Requests per scenario, out of the mix
+SCENARIO_WEIGHTS = {"feed": 0.7, "deep": 0.2, "stats": 0.1}
+
+
+def _zipf_weights(n: int) -> List[float]:
+    # A few topics hold most stories, like the real feed
+    return [1 / (rank + 1) for rank in range(n)]
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def _url(rng: random.Random, n: int) -> str:
+    return f"https://{rng.choice(DOMAINS)}/story/{n}"
+
+
+def _object_id(created_at: datetime, seed: int, n: int) -> ObjectId:
+    # Reproducible, and ordered like the saves (the feed breaks ties on it)
+    return ObjectId(
+        int(created_at.timestamp()).to_bytes(4, "big")
+        + (seed % 2**24).to_bytes(3, "big")
+        + n.to_bytes(5, "big")
+    )
+
+
+def generate_stories(
+    count: int,
+    duplicate_rate: float = 0.15,
+    days: int = 90,
+    seed: int = 0,
+    end: Optional[datetime] = None,
+) -> Iterator[dict]:
+    """
+    Synthetic news items, in save order.
+
+    Args:
+        count: Documents generated
+        duplicate_rate: Share of documents that are duplicates: they share
+            a source URL with an earlier canonical story and are marked
+            `duplicate_of` it, as the agent's save path does
+        days: Period the publication dates spread over
+        seed: Random seed, the same seed generates the same corpus
+        end: Newest creation date (default: now)
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now()
+    start = end - timedelta(days=days)
+    step = (end - start) / max(count, 1)
+    topic_weights = _zipf_weights(len(TOPICS))
+    tools, tool_weights = zip(*TOOL_SOURCES.items())
+    # Duplicates are found again soon after the original story
+    recent: List[dict] = []
+
+    for n in range(count):
+        created_at = start + step * n
+        doc = {
+            "_id": _object_id(created_at, seed, n),
+            "title": _sentence(rng, 6, 12),
+            "summary": " ".join(
+                _sentence(rng, 10, 20) + "." for _ in range(rng.randint(3, 6))
+            ),
+            "sources": [_url(rng, n)],
+            "published_date": created_at - timedelta(hours=rng.randint(0, 48)),
+            "created_at": created_at,
+            "topic": [rng.choices(TOPICS, topic_weights)[0]],
+            "groups": rng.sample(GROUPS, rng.randint(1, 2)),
+            "tool_source": [rng.choices(tools, tool_weights)[0]],
+        }
+        if recent and rng.random() < duplicate_rate:
+            original = rng.choice(recent)
+            # Own primary URL (so its own story key), plus the shared one
+            doc["sources"].append(original["sources"][0])
+            doc["topic"] = original["topic"]
+            doc["duplicate_of"] = original["_id"]
+        else:
+            if rng.random() < 0.3:
+                doc["sources"].append(_url(rng, count + n))
+            recent = (recent + [doc])[-1000:]
+        doc["story_key"] = story_key(doc["sources"])
+        yield doc
+
+
+def seed_database(
+    db: pymongo.database.Database,
+    collection_name: str,
+    count: int,
+    duplicate_rate: float,
+    batch_size: int = 5000,
+    drop: bool = False,
+    seed: int = 0,
+):
+    """Insert the corpus, then build what the API reads next to it."""
+    collection = db[collection_name]
+    if drop:
+        collection.drop()
+        db[STATS_COLLECTION].drop()
+        db[META_COLLECTION].drop()
+
+    started = time.perf_counter()
+    batch = []
+    for doc in generate_stories(count, duplicate_rate, seed=seed):
+        batch.append(doc)
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+            print(f"\rInserted {collection.estimated_document_count()}", end="")
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    print(f"\rInserted {count} stories in {time.perf_counter() - started:.1f}s")
+
+    # Indexes after the bulk load, built once instead of maintained per row
+    ensure_indexes(collection, db[META_COLLECTION])
+    ensure_stats_indexes(db[STATS_COLLECTION])
+    reconcile_stats(collection, db[STATS_COLLECTION])
+    bump_feed_version(db[META_COLLECTION])
+    print(f"Seeded {db.name}.{collection_name}")
+
+
+@dataclass
+class Sample:
+    """One API request"""
+
+    name: str
+    status: int
+    latency: float
+    cache: Optional[str] = None
+    depth: Optional[int] = None
+
+
+@dataclass
+class LoadTest:
+    """
+    Concurrent clients driving the API.
+
+    Args:
+        url: API root, e.g. http://localhost:8000
+        concurrency: Clients sending requests back to back
+        duration: Seconds measured
+        warmup: Seconds of requests before measuring (fills the caches)
+        depth: Pages a deep pagination walk follows `next_cursor` for
+        limit: Items per page
+        vary_limit: A random `limit` per request, which mostly misses the
+            API page cache and measures the database path
+        scenarios: Share of requests per scenario
+    """
+
+    url: str
+    concurrency: int = 32
+    duration: float = 30.0
+    warmup: float = 5.0
+    depth: int = 20
+    limit: int = 50
+    vary_limit: bool = False
+    scenarios: Dict[str, float] = field(
+        default_factory=lambda: dict(SCENARIO_WEIGHTS)
+    )
+    samples: List[Sample] = field(default_factory=list)
+
+    def _limit(self, rng: random.Random) -> int:
+        return rng.randint(10, 100) if self.vary_limit else self.limit
+
+    async def _get(
+        self,
+        session: aiohttp.ClientSession,
+        name: str,
+        path: str,
+        params: dict,
+        record: bool,
+        depth: Optional[int] = None,
+    ) -> Optional[dict]:
+        started = time.perf_counter()
+        try:
+            async with session.get(self.url + path, params=params) as response:
+                body = await response.read()
+                status, cache = response.status, response.headers.get("X-Cache")
+        except aiohttp.ClientError:
+            body, status, cache = b"", 0, None
+        if record:
+            latency = time.perf_counter() - started
+            self.samples.append(Sample(name, status, latency, cache, depth))
+        return json.loads(body) if status == 200 else None
+
+    async def _feed(self, session, rng, record):
+        params = {"category": rng.choice(CATEGORIES), "limit": self._limit(rng)}
+        await self._get(session, "feed", "/api/news", params, record)
+
+    async def _deep(self, session, rng, record):
+        params = {"category": rng.choice(CATEGORIES), "limit": self._limit(rng)}
+        for depth in range(1, self.depth + 1):
+            page = await self._get(
+                session, "deep", "/api/news", params, record, depth
+            )
+            if not page or not page.get("next_cursor"):
+                return
+            params["cursor"] = page["next_cursor"]
+
+    async def _stats(self, session, rng, record):
+        await self._get(session, "stats", "/api/news/stats", {}, record)
+
+    async def _client(self, session, seed: int, deadline: float, record):
+        rng = random.Random(seed)
+        scenarios = {
+            "feed": self._feed,
+            "deep": self._deep,
+            "stats": self._stats,
+        }
+        names, weights = zip(*self.scenarios.items())
+        while time.perf_counter() < deadline:
+            scenario = scenarios[rng.choices(names, weights)[0]]
+            await scenario(session, rng, record)
+
+    async def _phase(self, session, seconds: float, record: bool):
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(
+                # Other requests while warming up than while measuring
+                self._client(session, seed + record * 1000, deadline, record)
+                for seed in range(self.concurrency)
+            )
+        )
+
+    async def run(self, before_measure: Optional[Callable[[], None]] = None):
+        """
+        Warm up, then send measured requests for `duration` seconds.
+
+        Args:
+            before_measure: Called once the warmup is over
+
+        Returns:
+            float: Seconds measured (until the last client finished)
+        """
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as session:
+            if self.warmup:
+                await self._phase(session, self.warmup, record=False)
+            if before_measure is not None:
+                before_measure()
+            started = time.perf_counter()
+            await self._phase(session, self.duration, record=True)
+            return time.perf_counter() - started
+
+
+def latency_summary(latencies: List[float], seconds: float) -> dict:
+    """Throughput and latency percentiles (milliseconds) of a request set."""
+    if not latencies:
+        return {"requests": 0}
+    ms = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(ms),
+        "rps": round(len(ms) / seconds, 1),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def depth_bucket(depth: int) -> str:
+    """Page depths grouped by powers of two: 1, 2-3, 4-7, ..."""
+    low = 1 << (depth.bit_length() - 1)
+    high = 2 * low - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def summarize(samples: List[Sample], seconds: float) -> dict:
+    """Report of a run, per scenario and per pagination depth."""
+    by_name = defaultdict(list)
+    by_depth = defaultdict(list)
+    for sample in samples:
+        by_name[sample.name].append(sample)
+        if sample.depth is not None:
+            by_depth[sample.depth].append(sample.latency)
+
+    report = {"total": latency_summary([s.latency for s in samples], seconds)}
+    for name, group in sorted(by_name.items()):
+        summary = latency_summary([s.latency for s in group], seconds)
+        summary["errors"] = sum(s.status != 200 for s in group)
+        cached = [s for s in group if s.cache is not None]
+        if cached:
+            hits = sum(s.cache != "MISS" for s in cached)
+            summary["cache_hit_ratio"] = round(hits / len(cached), 3)
+        report[name] = summary
+
+    buckets = defaultdict(list)
+    for depth, latencies in by_depth.items():
+        buckets[(depth.bit_length(), depth_bucket(depth))] += latencies
+    report["depth"] = {
+        bucket: latency_summary(latencies, seconds)
+        for (_, bucket), latencies in sorted(buckets.items())
+    }
+    return report
+
+
+def _query_counters(client: pymongo.MongoClient) -> dict:
+    status = client.admin.command("serverStatus")
+    executor = status["metrics"]["queryExecutor"]
+    return {
+        "docs_examined": executor["scannedObjects"],
+        "keys_examined": executor["scanned"],
+        "docs_returned": status["metrics"]["document"]["returned"],
+        "queries": status["opcounters"]["query"],
+    }
+
+
+def database_work(before: dict, after: dict, requests: int) -> dict:
+    """MongoDB work per API request, from `serverStatus` counter deltas."""
+    return {
+        f"{name}_per_request": round(
+            (after[name] - before[name]) / max(requests, 1), 2
+        )
+        for name in before
+    }
+
+
+def print_report(report: dict):
+    columns = ["requests", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    print(f"{'':>12}" + "".join(f"{c:>10}" for c in columns))
+    rows = [(name, report[name]) for name in report if name != "depth"]
+    rows += [(f"page {k}", v) for k, v in report["depth"].items()]
+    for name, row in rows:
+        if not isinstance(row, dict) or "requests" not in row:
+            continue
+        print(
+            f"{name:>12}" + "".join(f"{row.get(c, '-'):>10}" for c in columns)
+        )
+    for name, row in report.items():
+        extras = {
+            k: v
+            for k, v in row.items()
+            if k in ("errors", "cache_hit_ratio") or k.endswith("_per_request")
+        }
+        if extras:
+            print(f"{name}: {extras}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Fill a database with stories")
+    seed.add_argument("--mongodb-uri", default="mongodb://localhost:27017/")
+    seed.add_argument("--db", default=LOADTEST_DB)
+    seed.add_argument("--collection", default="news_items")
+    seed.add_argument("--docs", type=int, default=10_000)
+    seed.add_argument("--duplicate-rate", type=float, default=0.15)
+    seed.add_argument("--batch-size", type=int, default=5000)
+    seed.add_argument("--seed", type=int, default=0)
+    seed.add_argument("--drop", action="store_true")
+
+    run = commands.add_parser("run", help="Load the API and report")
+    run.add_argument("--url", default="http://localhost:8000")
+    run.add_argument("--concurrency", type=int, default=32)
+    run.add_argument("--duration", type=float, default=30)
+    run.add_argument("--warmup", type=float, default=5)
+    run.add_argument("--depth", type=int, default=20)
+    run.add_argument("--limit", type=int, default=50)
+    run.add_argument("--vary-limit", action="store_true")
+    run.add_argument(
+        "--scenario",
+        choices=["mixed"] + list(SCENARIO_WEIGHTS),
+        default="mixed",
+    )
+    run.add_argument(
+        "--mongodb-uri",
+        help="Also report the MongoDB work per request (server-wide)",
+    )
+    run.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        client = pymongo.MongoClient(args.mongodb_uri)
+        seed_database(
+            client[args.db],
+            args.collection,
+            args.docs,
+            args.duplicate_rate,
+            args.batch_size,
+            args.drop,
+            args.seed,
+        )
+        return
+
+    load_test = LoadTest(
+        url=args.url.rstrip("/"),
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        depth=args.depth,
+        limit=args.limit,
+        vary_limit=args.vary_limit,
+        scenarios=(
+            dict(SCENARIO_WEIGHTS)
+            if args.scenario == "mixed"
+            else {args.scenario: 1.0}
+        ),
+    )
+    client = pymongo.MongoClient(args.mongodb_uri) if args.mongodb_uri else None
+    counters = {}
+
+    def before_measure():
+        if client is not None:
+            counters["before"] = _query_counters(client)
+
+    seconds = asyncio.run(load_test.run(before_measure))
+    report = summarize(load_test.samples, seconds)
+    if client is not None:
+        report["mongodb"] = database_work(
+            counters["before"],
+            _query_counters(client),
+            len(load_test.samples),
+        )
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
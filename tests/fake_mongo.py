@@ -0,0 +1,341 @@
+"""
+In-memory stand-in for the MongoDB collections the tests touch, with sync
+and async (`AsyncMongoClient`) interfaces over the same documents.
+
+Covers the query operators, update operators and cursor methods the save
+path and the API use; writes are logged in order so two runs can be
+compared.
+"""
+
+import copy
+import operator
+from datetime import timezone
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo import DeleteOne
+from pymongo.errors import OperationFailure
+
+COMPARISONS = {
+    "$lt": operator.lt,
+    "$lte": operator.le,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+}
+
+
+def _compare(values: list, op: str, bound) -> bool:
+    compare = COMPARISONS[op]
+    return any(
+        v is not None and type(v) is type(bound) and compare(v, bound)
+        for v in values
+    )
+
+
+def _matches_condition(doc: dict, field: str, condition) -> bool:
+    value = doc.get(field)
+    # A list field matches if any of its values does; null matches missing
+    values = value if isinstance(value, list) else [value]
+    if not (
+        isinstance(condition, dict)
+        and condition
+        and all(op.startswith("$") for op in condition)
+    ):
+        return condition in values or value == condition
+    for op, operand in condition.items():
+        if op == "$in":
+            if not any(v in values for v in operand):
+                return False
+        elif op == "$nin":
+            if any(v in values for v in operand):
+                return False
+        elif op == "$ne":
+            if operand in values:
+                return False
+        elif op == "$exists":
+            if (field in doc) != operand:
+                return False
+        elif op in COMPARISONS:
+            if not _compare(values, op, operand):
+                return False
+        else:
+            raise NotImplementedError(op)
+    return True
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif not _matches_condition(doc, field, condition):
+            return False
+    return True
+
+
+def _project(doc: dict, projection) -> dict:
+    if not projection:
+        return doc
+    included = {field for field, keep in projection.items() if keep}
+    if not included:
+        return {k: v for k, v in doc.items() if k not in projection}
+    if projection.get("_id", 1):
+        included.add("_id")
+    return {k: v for k, v in doc.items() if k in included}
+
+
+def _evaluate(doc: dict, expression):
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:])
+    if isinstance(expression, dict) and "$ifNull" in expression:
+        values = (_evaluate(doc, e) for e in expression["$ifNull"])
+        return next((v for v in values if v is not None), None)
+    if isinstance(expression, dict) and "$dateToString" in expression:
+        spec = expression["$dateToString"]
+        date = _evaluate(doc, spec["date"])
+        if date is None:
+            return None
+        # Stored in UTC, formatted in UTC by default
+        if date.tzinfo is not None:
+            date = date.astimezone(timezone.utc)
+        return date.strftime(spec["format"])
+    return expression
+
+
+def _group(docs: list, spec: dict) -> list:
+    # Only `$sum` accumulators
+    groups = {}
+    for doc in docs:
+        key = _evaluate(doc, spec["_id"])
+        group = groups.setdefault(key, {"_id": key})
+        for name, accumulator in spec.items():
+            if name != "_id":
+                amount = _evaluate(doc, accumulator["$sum"])
+                group[name] = group.get(name, 0) + amount
+    return list(groups.values())
+
+
+def _sort_key(value):
+    # Null and missing values sort first
+    return (value is not None, value)
+
+
+class FakeCursor:
+    """Result of `find`, sorted and limited when iterated"""
+
+    def __init__(self, docs: list, projection=None):
+        self.docs = docs
+        self.projection = projection
+        self._sort = []
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = key if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def hint(self, index):
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def __iter__(self):
+        docs = list(self.docs)
+        for field, direction in reversed(self._sort):
+            docs.sort(
+                key=lambda d: _sort_key(d.get(field)), reverse=direction < 0
+            )
+        if self._limit:
+            docs = docs[: self._limit]
+        return iter([_project(copy.deepcopy(d), self.projection) for d in docs])
+
+
+class FakeDatabase:
+    """Collections applying the update operators the save path uses"""
+
+    def __init__(self):
+        self.collections = {}
+        self.writes = []
+        self.inserted = 0
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(name, self)
+        return self.collections[name]
+
+    def contents(self) -> dict:
+        return {name: c.docs for name, c in self.collections.items()}
+
+
+class FakeCollection:
+    def __init__(self, name: str, database: FakeDatabase):
+        self.name = name
+        self.database = database
+        self.docs = []
+
+    def find(self, query=None, projection=None, **kwargs) -> FakeCursor:
+        return FakeCursor(
+            [d for d in self.docs if matches(d, query or {})], projection
+        )
+
+    def find_one(self, query=None, projection=None, sort=None):
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        return next(iter(cursor), None)
+
+    def count_documents(self, query) -> int:
+        return sum(1 for d in self.docs if matches(d, query))
+
+    def aggregate(self, pipeline, **kwargs) -> list:
+        docs = copy.deepcopy(self.docs)
+        for stage in pipeline:
+            ((name, spec),) = stage.items()
+            if name == "$match":
+                docs = [d for d in docs if matches(d, spec)]
+            elif name == "$unwind":
+                field = spec[1:]
+                docs = [
+                    d | {field: v} for d in docs for v in d.get(field) or []
+                ]
+            elif name == "$group":
+                docs = _group(docs, spec)
+            else:
+                raise NotImplementedError(name)
+        return docs
+
+    def watch(self, pipeline=None):
+        # Like a standalone server: no change streams
+        raise OperationFailure(
+            "The $changeStream stage is only supported on replica sets"
+        )
+
+    def update_one(self, query, update, upsert=False):
+        self.database.writes.append((self.name, query, update, upsert))
+        return self._apply(query, update, upsert)
+
+    def bulk_write(self, operations, ordered=True):
+        upserted_ids, modified = {}, 0
+        for index, op in enumerate(operations):
+            if isinstance(op, DeleteOne):
+                self.database.writes.append((self.name, op._filter))
+                self.docs = [d for d in self.docs if not matches(d, op._filter)]
+                continue
+            inserted_id = self.update_one(op._filter, op._doc, op._upsert)
+            if inserted_id is not None:
+                upserted_ids[index] = inserted_id
+            else:
+                modified += 1
+        return SimpleNamespace(
+            upserted_ids=upserted_ids,
+            upserted_count=len(upserted_ids),
+            modified_count=modified,
+        )
+
+    def _apply(self, query, update, upsert):
+        doc = next((d for d in self.docs if matches(d, query)), None)
+        inserted_id = None
+        if doc is None:
+            if not upsert:
+                return None
+            self.database.inserted += 1
+            inserted_id = ObjectId(f"{self.database.inserted:024x}")
+            doc = {"_id": inserted_id, **query}
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+        for field, values in update.get("$addToSet", {}).items():
+            current = doc.setdefault(field, [])
+            current += [v for v in values["$each"] if v not in current]
+        for field, value in update.get("$min", {}).items():
+            doc[field] = min(doc.get(field, value), value)
+        for field, value in update.get("$max", {}).items():
+            doc[field] = max(doc.get(field, value), value)
+        return inserted_id
+
+
+class FakeClient:
+    """`MongoClient` whose every database is `database`"""
+
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    def __getitem__(self, name):
+        return self.database
+
+    def close(self):
+        pass
+
+
+class AsyncFakeCursor:
+    def __init__(self, cursor: FakeCursor):
+        self.cursor = cursor
+
+    def sort(self, *args):
+        self.cursor.sort(*args)
+        return self
+
+    def hint(self, index):
+        return self
+
+    def limit(self, n: int):
+        self.cursor.limit(n)
+        return self
+
+    async def to_list(self):
+        return list(self.cursor)
+
+
+class AsyncFakeCollection:
+    """`FakeCollection` behind the `AsyncCollection` interface"""
+
+    def __init__(self, collection: FakeCollection):
+        self.collection = collection
+        self.database = AsyncFakeDatabase(collection.database)
+
+    def find(self, *args, **kwargs):
+        return AsyncFakeCursor(self.collection.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    async def count_documents(self, *args, **kwargs):
+        return self.collection.count_documents(*args, **kwargs)
+
+    async def watch(self, *args, **kwargs):
+        return self.collection.watch(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return self.collection.update_one(*args, **kwargs)
+
+    async def bulk_write(self, *args, **kwargs):
+        return self.collection.bulk_write(*args, **kwargs)
+
+
+class AsyncFakeDatabase:
+    def __init__(self, database: FakeDatabase):
+        self._database = database
+
+    def __getitem__(self, name):
+        return AsyncFakeCollection(self._database[name])
+
+
+class AsyncFakeClient:
+    """`AsyncMongoClient` whose every database is `database`"""
+
+    def __init__(self, database: FakeDatabase):
+        self.database = AsyncFakeDatabase(database)
+
+    def __getitem__(self, name):
+        return self.database
+
+    async def close(self):
+        pass
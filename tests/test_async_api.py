@@ -0,0 +1,209 @@
+"""Test that the aiohttp server answers like the Flask app."""
+
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from aiohttp.test_utils import TestClient, TestServer
+from bson import ObjectId
+from fake_mongo import AsyncFakeClient, FakeClient, FakeDatabase
+
+from prazo.core.feed_version import FEED_VERSION_ID, FeedVersion
+from prazo.core.indexes import META_COLLECTION
+from prazo.core.stats import DAY, STATS_COLLECTION, TOTAL_ID, counter_id
+from prazo.utils.cache import ResponseCache
+from service.common import (
+    MONGODB_COLLECTION,
+    NEWS_CACHE_MAX_ENTRIES,
+    NEWS_CACHE_TTL,
+)
+
+NOW = datetime(2025, 10, 22, 8)
+
+
+def _seed() -> FakeDatabase:
+    database = FakeDatabase()
+    stories = []
+    for n in range(5):
+        stories.append(
+            {
+                "_id": ObjectId(f"{n + 1:024x}"),
+                "story_key": f"k{n}",
+                "title": f"Story {n}",
+                # Long enough to be sent compressed
+                "summary": f"Summary of story {n}. " * 40,
+                "sources": [f"https://example.com/{n}"],
+                "topic": ["Markets"],
+                "groups": ["India"],
+                "tool_source": ["daily_news" if n % 2 else "tavily"],
+                "published_date": NOW - timedelta(hours=n),
+                "created_at": NOW,
+                "duplicate_of": None,
+            }
+        )
+    # Same publication time: the cursor falls back on `_id`
+    stories[3]["published_date"] = stories[2]["published_date"]
+    stories[4]["duplicate_of"] = "k0"
+    database[MONGODB_COLLECTION].docs = stories
+
+    counters = [
+        ("tool_source", "tavily", 2),
+        ("tool_source", "daily_news", 2),
+        ("topic", "Markets", 4),
+        ("groups", "India", 4),
+        (DAY, "2025-10-22", 4),
+    ]
+    database[STATS_COLLECTION].docs = [
+        {"_id": TOTAL_ID, "count": 4, "reconciled_at": NOW},
+        *(
+            {"_id": counter_id(dim, value), "dim": dim, "value": value}
+            | {"count": count}
+            for dim, value, count in counters
+        ),
+    ]
+    database[META_COLLECTION].docs = [
+        {"_id": FEED_VERSION_ID, "version": 3, "updated_at": NOW}
+    ]
+    return database
+
+
+def _body(headers, body: bytes):
+    if not body:
+        return None
+    if headers.get("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def _media_type(headers) -> str:
+    # aiohttp adds a charset to plain JSON responses
+    return headers["Content-Type"].split(";")[0]
+
+
+def _flask_responses(database: FakeDatabase, requests: list) -> list:
+    # The app connects on import, to an empty database replaced below
+    with (
+        patch(
+            "pymongo.MongoClient", lambda *a, **kw: FakeClient(FakeDatabase())
+        ),
+        patch("service.common.ensure_database"),
+    ):
+        from service import api
+    collection = database[MONGODB_COLLECTION]
+    feed_version = FeedVersion(database[META_COLLECTION])
+    cache = ResponseCache(
+        max_entries=NEWS_CACHE_MAX_ENTRIES, ttl=NEWS_CACHE_TTL
+    )
+    with (
+        patch.object(api, "db", database),
+        patch.object(api, "collection", collection),
+        patch.object(api, "feed_version", feed_version),
+        patch.object(api, "news_cache", cache),
+    ):
+        client = api.app.test_client()
+        responses = []
+        for path, headers in requests:
+            response = client.get(path, headers=headers)
+            headers = response.headers
+            responses.append(
+                (response.status_code, headers, _body(headers, response.data))
+            )
+        return responses
+
+
+def _aiohttp_responses(database: FakeDatabase, requests: list) -> list:
+    from service import async_api
+
+    async def run():
+        server = TestServer(async_api.create_app())
+        async with TestClient(server, auto_decompress=False) as client:
+            responses = []
+            for path, headers in requests:
+                response = await client.get(path, headers=headers)
+                headers = response.headers
+                body = _body(headers, await response.read())
+                responses.append((response.status, headers, body))
+            return responses
+
+    with patch.object(
+        async_api,
+        "AsyncMongoClient",
+        lambda *a, **kw: AsyncFakeClient(database),
+    ):
+        return asyncio.run(run())
+
+
+def _same_responses(requests: list) -> list:
+    # Both clients send the same headers (aiohttp asks for compression)
+    requests = [
+        (path, {"Accept-Encoding": "identity", **headers})
+        for path, headers in requests
+    ]
+    flask = _flask_responses(_seed(), requests)
+    aiohttp = _aiohttp_responses(_seed(), requests)
+    for (status, headers, body), (a_status, a_headers, a_body) in zip(
+        flask, aiohttp
+    ):
+        assert status == a_status and body == a_body
+        # Werkzeug strips representation headers from a 304
+        names = ["ETag", "X-Cache"]
+        if status == 200:
+            names += ["Last-Modified", "Content-Encoding"]
+            assert _media_type(headers) == _media_type(a_headers)
+        for name in names:
+            assert headers.get(name) == a_headers.get(name), name
+    return flask
+
+
+def test_news_pages_match():
+    responses = _same_responses(
+        [("/api/news?limit=2", {}), ("/api/news?limit=2&category=daily", {})]
+    )
+    page = responses[0][2]
+    assert [item["title"] for item in page["news_items"]] == [
+        "Story 0",
+        "Story 1",
+    ]
+    assert page["total"] == 4 and page["next_cursor"]
+    assert responses[0][1]["Last-Modified"] == "Wed, 22 Oct 2025 08:00:00 GMT"
+    assert [i["title"] for i in responses[1][2]["news_items"]] == [
+        "Story 1",
+        "Story 3",
+    ]
+
+    # Next page through the cursor, then a revalidation and a gzip request
+    cursor = page["next_cursor"]
+    etag = responses[0][1]["ETag"]
+    responses = _same_responses(
+        [
+            (f"/api/news?limit=2&cursor={cursor}", {}),
+            ("/api/news?limit=2", {"If-None-Match": etag}),
+            ("/api/news?limit=2", {"Accept-Encoding": "gzip"}),
+        ]
+    )
+    next_page = responses[0][2]
+    # Same publication time, newest `_id` first; Story 4 is a duplicate
+    assert [item["title"] for item in next_page["news_items"]] == [
+        "Story 3",
+        "Story 2",
+    ]
+    assert next_page["next_cursor"] is None
+    assert responses[1][0] == 304 and responses[1][2] is None
+    assert responses[2][1]["Content-Encoding"] == "gzip"
+    assert responses[2][2] == page
+
+
+def test_stats_and_health_match():
+    stats, health = _same_responses(
+        [("/api/news/stats", {}), ("/api/health", {})]
+    )
+    assert stats[2]["total_items"] == 4
+    assert stats[2]["top_topics"] == [{"_id": "Markets", "count": 4}]
+    assert health[2] == {"status": "ok", "database": "connected"}
+
+
+if __name__ == "__main__":
+    test_news_pages_match()
+    test_stats_and_health_match()
@@ -0,0 +1,141 @@
+"""Test that the async data layer writes what the sync one does."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from bson import ObjectId
+from fake_mongo import AsyncFakeCollection, FakeDatabase
+
+from prazo.core import async_db, db, indexes, stats
+from prazo.core.feed_version import LAST_STORY_FIELD
+from prazo.schemas import NewsItem
+
+NOW = datetime(2025, 10, 22, 8)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW.replace(tzinfo=tz)
+
+
+def _seed() -> FakeDatabase:
+    database = FakeDatabase()
+    database["news"].docs = [
+        {
+            "_id": ObjectId("0" * 23 + "a"),
+            "story_key": "k1",
+            "title": "Rates held",
+            "sources": ["https://example.com/rates"],
+            "topic": ["Economy"],
+            "groups": ["India"],
+            "tool_source": ["daily_news"],
+            "created_at": NOW - timedelta(days=1),
+        },
+        {
+            "_id": ObjectId("0" * 23 + "b"),
+            "story_key": "k2",
+            "title": "Central bank holds rates",
+            "sources": ["https://example.com/central-bank"],
+            "topic": ["Markets"],
+            "groups": ["India"],
+            "tool_source": ["tavily"],
+            "created_at": NOW - timedelta(hours=12),
+        },
+    ]
+    stats.reconcile_stats(database["news"], database[stats.STATS_COLLECTION])
+    return database
+
+
+def _items():
+    def item(title, sources, topic):
+        return NewsItem(
+            title=title,
+            summary=f"Summary of {title}",
+            sources=sources,
+            topic=topic,
+            groups=["India"],
+            tool_source=["daily_news"],
+            published_date=NOW,
+            created_at=NOW,
+            updated_at=NOW,
+        )
+
+    return [
+        # Links the two stored stories: the newer one becomes a duplicate
+        item(
+            "Rates unchanged",
+            ["https://example.com/rates", "https://example.com/central-bank"],
+            ["Economy", "Policy"],
+        ),
+        # A new story, found twice
+        item("Launch delayed", ["https://example.com/launch"], ["Space"]),
+        item("Launch slips", ["https://example.com/launch"], ["Science"]),
+        item("No sources", [], ["Space"]),
+    ]
+
+
+def _save_sync(database: FakeDatabase) -> int:
+    news = database["news"]
+    counters = database[stats.STATS_COLLECTION]
+    meta = database[indexes.META_COLLECTION]
+    with (
+        patch.object(db, "collection", news),
+        patch.object(db, "stats_collection", counters),
+        patch.object(db, "meta_collection", meta),
+    ):
+        return db.save_news_items(_items())
+
+
+def _save_async(database: FakeDatabase) -> int:
+    news = AsyncFakeCollection(database["news"])
+    with patch.object(async_db, "get_collection", lambda: news):
+        return asyncio.run(async_db.asave_news_items(_items()))
+
+
+def test_async_save_matches_sync():
+    with (
+        patch("prazo.core.feed_version.datetime", FrozenDatetime),
+        patch("prazo.core.stats.datetime", FrozenDatetime),
+    ):
+        sync_db, async_fake_db = _seed(), _seed()
+        assert _save_sync(sync_db) == _save_async(async_fake_db) == 3
+
+    assert async_fake_db.writes == sync_db.writes
+    assert async_fake_db.contents() == sync_db.contents()
+
+    stories = {doc["title"]: doc for doc in sync_db["news"].docs}
+    assert len(stories) == 4
+    assert stories["Central bank holds rates"]["duplicate_of"] == "k1"
+    assert stories["Launch delayed"]["topic"] == ["Space", "Science"]
+    counters = {
+        doc["_id"]: doc["count"] for doc in sync_db[stats.STATS_COLLECTION].docs
+    }
+    assert counters[stats.TOTAL_ID] == 4
+    assert counters[stats.counter_id("topic", "Policy")] == 1
+    # The duplicate left the facets
+    assert counters[stats.counter_id("topic", "Markets")] == 0
+    assert counters[stats.counter_id("groups", "India")] == 3
+    meta = sync_db[indexes.META_COLLECTION].docs[0]
+    assert meta["version"] == 1
+    # The change feed's watermark: the newest story this save inserted
+    inserted = ["Launch delayed", "No sources"]
+    assert meta[LAST_STORY_FIELD] == max(stories[t]["_id"] for t in inserted)
+
+
+def test_async_initialize_reports_indexes():
+    with (
+        patch.object(db, "ensure_indexes") as ensure_indexes,
+        patch.object(db, "ensure_stats_indexes"),
+        patch.object(db, "log_index_report") as log_index_report,
+    ):
+        asyncio.run(async_db.ainitialize_database())
+    # The same plan and report as the sync startup
+    ensure_indexes.assert_called_once_with(db.collection, db.meta_collection)
+    log_index_report.assert_called_once_with(db.collection)
+
+
+if __name__ == "__main__":
+    test_async_save_matches_sync()
+    test_async_initialize_reports_indexes()
@@ -0,0 +1,51 @@
+"""Test the URL bloom filter."""
+
+import os
+import tempfile
+
+from prazo.utils.bloom import BloomFilter
+
+
+def test_membership():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://example.com/article-{i}" for i in range(1000)]
+    bloom.update(urls)
+
+    # No false negatives
+    assert all(url in bloom for url in urls)
+    # False positives close to the configured rate
+    false_positives = sum(
+        f"https://example.com/other-{i}" in bloom for i in range(10000)
+    )
+    assert false_positives < 300
+    assert bloom.is_full
+
+
+def test_save_and_load():
+    bloom = BloomFilter(capacity=100)
+    bloom.update(["https://example.com/a", "https://example.com/b"])
+    bloom.mark_synced()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "filters", "urls.bin")
+        bloom.save(path)
+        loaded = BloomFilter.load(path)
+
+        with open(path, "r+b") as file:
+            file.truncate(10)
+        try:
+            BloomFilter.load(path)
+            assert False, "Truncated file should not load"
+        except ValueError:
+            pass
+
+    assert "https://example.com/a" in loaded
+    assert "https://example.com/c" not in loaded
+    assert len(loaded) == 2
+    assert loaded.synced_at == bloom.synced_at
+    assert not loaded.is_full
+
+
+if __name__ == "__main__":
+    test_membership()
+    test_save_and_load()
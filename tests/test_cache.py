@@ -0,0 +1,119 @@
+"""Test the API response cache."""
+
+import asyncio
+import threading
+import time
+
+from prazo.utils.cache import COALESCED, HIT, MISS, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hits_until_version_or_ttl_changes():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return b"page"
+
+    assert cache.get_or_compute("k", 1, compute) == (b"page", MISS)
+    assert cache.get_or_compute("k", 1, compute) == (b"page", HIT)
+    # The agent saved: new version
+    assert cache.get_or_compute("k", 2, compute)[1] == MISS
+    # Expired
+    clock.now = 11
+    assert cache.get_or_compute("k", 2, compute)[1] == MISS
+    assert len(calls) == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["hit_ratio"] == 0.25
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.get_or_compute("a", 1, lambda: 1)
+    cache.get_or_compute("b", 1, lambda: 2)
+    cache.get_or_compute("a", 1, lambda: 1)
+    cache.get_or_compute("c", 1, lambda: 3)
+
+    assert cache.get_or_compute("a", 1, lambda: 1)[1] == HIT
+    assert cache.get_or_compute("b", 1, lambda: 2)[1] == MISS
+    assert cache.stats()["evictions"] == 2
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    calls = []
+    statuses = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return b"page"
+
+    def request():
+        statuses.append(cache.get_or_compute("k", 1, compute)[1])
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["requests"] < len(threads):
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(statuses) == [COALESCED] * 7 + [MISS]
+
+
+def test_errors_are_not_cached():
+    cache = ResponseCache()
+
+    def fail():
+        raise RuntimeError("database down")
+
+    try:
+        cache.get_or_compute("k", 1, fail)
+        assert False, "error not raised"
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("k", 1, lambda: b"page") == (b"page", MISS)
+
+
+def test_async_concurrent_misses_compute_once():
+    cache = ResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"page"
+
+    async def requests():
+        return await asyncio.gather(
+            *[cache.aget_or_compute("k", 1, compute) for _ in range(8)]
+        )
+
+    results = asyncio.run(requests())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == [COALESCED] * 7 + [MISS]
+    assert asyncio.run(cache.aget_or_compute("k", 1, compute)) == (b"page", HIT)
+
+
+if __name__ == "__main__":
+    test_hits_until_version_or_ttl_changes()
+    test_evicts_least_recently_used()
+    test_concurrent_misses_compute_once()
+    test_errors_are_not_cached()
+    test_async_concurrent_misses_compute_once()
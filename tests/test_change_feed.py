@@ -0,0 +1,119 @@
+"""Test the fan-out of newly saved stories to stream subscribers."""
+
+import asyncio
+
+from bson import ObjectId
+from fake_mongo import AsyncFakeCollection, FakeDatabase
+
+from prazo.core.change_feed import (
+    SUBSCRIBER_QUEUE_SIZE,
+    AsyncChangeFeed,
+    StoryEvent,
+    sse_event,
+)
+from prazo.core.feed_version import AsyncFeedVersion, bump_feed_version
+from prazo.core.indexes import META_COLLECTION, in_category
+
+
+def test_sse_event():
+    event = StoryEvent(id="abc", tool_source=["tavily"], data=b'{"a":1}')
+    assert event.sse() == b'id: abc\nevent: story\ndata: {"a":1}\n\n'
+    assert sse_event(b"{}") == b"data: {}\n\n"
+
+
+def test_in_category():
+    assert in_category(["daily_news"], "daily")
+    assert not in_category(["tavily"], "daily")
+    assert in_category([], "topics")
+    assert in_category(["daily_news"], "all")
+
+
+def test_publish_fans_out_and_drops_slow_subscribers():
+    feed = AsyncChangeFeed(None, None, {}, lambda doc: b"{}")
+    events = [StoryEvent(id=i, tool_source=[], data=b"{}") for i in range(3)]
+
+    async def run():
+        fast, slow = feed.subscribe(), feed.subscribe()
+        for _ in range(SUBSCRIBER_QUEUE_SIZE - 2):
+            slow.put_nowait(events[0])
+        feed.publish(events)
+        assert [fast.get_nowait().id for _ in range(3)] == [0, 1, 2]
+        # Dropped: its stream ends, the client reconnects
+        assert slow.get_nowait() is None and slow.empty()
+        assert feed._subscribers == {fast}
+
+        feed.close_subscribers()
+        assert fast.get_nowait() is None
+
+    asyncio.run(run())
+
+
+def _story(n: int, **fields) -> dict:
+    return {
+        "_id": ObjectId(f"{n:024x}"),
+        "title": f"Story {n}",
+        "tool_source": ["tavily"],
+        "duplicate_of": None,
+    } | fields
+
+
+def _titles(subscriber) -> list:
+    titles = []
+    while not subscriber.empty():
+        titles.append(subscriber.get_nowait().data.decode())
+    return titles
+
+
+def test_read_new_waits_for_the_watermark():
+    database = FakeDatabase()
+    news, meta = database["news"], database[META_COLLECTION]
+    news.docs = [_story(1), _story(2)]
+    feed = AsyncChangeFeed(
+        AsyncFakeCollection(news),
+        AsyncFeedVersion(AsyncFakeCollection(meta)),
+        {"title": 1},
+        lambda doc: doc["title"].encode(),
+    )
+
+    async def run():
+        subscriber = feed.subscribe()
+        feed.last_id = _story(1)["_id"]
+        # No watermark yet: no save is known to have marked its duplicates
+        await feed.aread_new()
+        assert _titles(subscriber) == [] and await feed.amissed(None) == []
+
+        bump_feed_version(meta, _story(2)["_id"])
+        # The next save has inserted its stories but not marked them yet
+        news.docs += [_story(3), _story(4)]
+        await feed.aread_new()
+        assert _titles(subscriber) == ["Story 2"]
+        assert feed.last_id == _story(2)["_id"]
+
+        news.docs[3]["duplicate_of"] = "k3"
+        bump_feed_version(meta, _story(4)["_id"])
+        await feed.aread_new()
+        # The duplicate is never pushed
+        assert _titles(subscriber) == ["Story 3"]
+        assert [e.id for e in await feed.amissed(None)] == [
+            _story(n)["_id"] for n in (1, 2, 3)
+        ]
+
+        # A restarted reader resumes at the watermark, not the newest story
+        news.docs.append(_story(5))
+        feed.last_id = None
+        feed.start()
+        await asyncio.sleep(0.01)
+        await feed.stop()
+        assert feed.last_id == _story(4)["_id"] and subscriber.empty()
+        bump_feed_version(meta, _story(5)["_id"])
+        await feed.aread_new()
+        assert _titles(subscriber) == ["Story 5"]
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_sse_event()
+    test_in_category()
+    test_publish_fans_out_and_drops_slow_subscribers()
+    test_read_new_waits_for_the_watermark()
@@ -0,0 +1,28 @@
+"""Test the helpers shared by the Flask and aiohttp servers."""
+
+from service.common import (
+    COMPACT_SUMMARY_WORDS,
+    serialize_news_item,
+    truncate_words,
+)
+
+SUMMARY = "Reliance Industries reported a 12% rise in quarterly profit."
+
+
+def test_truncate_words():
+    assert truncate_words(SUMMARY, 5) == "Reliance Industries reported a 12%…"
+    assert truncate_words("Markets closed flat.", 3) == "Markets closed flat."
+    assert truncate_words("", 3) == ""
+
+
+def test_serialize_compact_news_item():
+    summary = " ".join(["word"] * (COMPACT_SUMMARY_WORDS + 10))
+    item = serialize_news_item({"summary": summary}, compact=True)
+    assert len(item["summary"].split()) == COMPACT_SUMMARY_WORDS
+    assert item["summary"].endswith("…")
+    assert serialize_news_item({"summary": summary})["summary"] == summary
+
+
+if __name__ == "__main__":
+    test_truncate_words()
+    test_serialize_compact_news_item()
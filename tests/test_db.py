@@ -1,6 +1,14 @@
 """Test database functionality."""
 
-from prazo.core.db import check_urls_exist, save_news_items, initialize_database
+from datetime import datetime
+
+from prazo.core.db import (
+    check_urls_exist,
+    collection,
+    duplicate_marks,
+    initialize_database,
+    save_news_items,
+)
 from prazo.schemas import NewsItem
 
 
@@ -73,9 +81,56 @@ def test_database_operations():
     assert "New URLs" in result or "new" in result.lower()
     print("✓ DB tool works correctly\n")
     
+    # Test 4: Saving again is idempotent and merges list fields
+    print("Test 4: Re-saving items upserts by story key...")
+    rerun_item = test_items[0].model_copy(
+        update={"topic": ["Reruns"], "tool_source": ["daily_news"]}
+    )
+    save_news_items([rerun_item])
+    docs = list(collection.find({"sources": "https://test-db-1.com/article1"}))
+    assert len(docs) == 1
+    assert set(docs[0]["topic"]) == {"Testing", "Database", "Reruns"}
+    assert set(docs[0]["tool_source"]) == {"tavily", "daily_news"}
+    print("✓ Upserts are idempotent\n")
+
     print("=== All Tests Passed! ===\n")
 
 
+def test_duplicate_marks():
+    """Stories linked through shared URLs collapse onto the earliest one."""
+    stories = [
+        {
+            "_id": 2,
+            "story_key": "b",
+            "sources": ["https://x.com/2", "https://x.com/3"],
+            "created_at": datetime(2025, 1, 2),
+        },
+        {
+            "_id": 1,
+            "story_key": "a",
+            "sources": ["https://x.com/1", "https://x.com/2"],
+            "created_at": datetime(2025, 1, 1),
+            "duplicate_of": "c",
+        },
+        {
+            "_id": 3,
+            "story_key": "c",
+            "sources": ["https://x.com/3"],
+            "created_at": datetime(2025, 1, 3),
+            "duplicate_of": "a",
+        },
+        {
+            "_id": 4,
+            "story_key": "d",
+            "sources": ["https://x.com/4"],
+            "created_at": datetime(2025, 1, 1),
+        },
+    ]
+    # Canonical story loses its stale mark, story "c" is already correct
+    assert duplicate_marks(stories) == {1: None, 2: "a"}
+
+
 if __name__ == "__main__":
+    test_duplicate_marks()
     test_database_operations()
 
@@ -0,0 +1,40 @@
+"""Test extractive (TextRank) summarisation."""
+
+from prazo.utils.extractive_summary import split_sentences, textrank_summary
+
+ARTICLE = """Reliance Industries reported a 12% rise in quarterly profit on Friday, beating analyst estimates. The company said strong growth in its retail and telecom businesses offset weaker refining margins.
+Revenue from the retail segment rose 18% year on year, driven by new store openings and higher footfall. Jio added 8 million subscribers during the quarter, taking its total base past 480 million users.
+Refining margins fell for a second straight quarter as global fuel demand softened. Analysts expect margins to recover in the second half of the year as demand picks up.
+Shares of Reliance closed 1.2% higher ahead of the results. The board also approved a dividend of Rs 10 per share.
+The weather in Mumbai was pleasant on Friday evening."""
+
+
+def test_split_sentences():
+    sentences = split_sentences(ARTICLE)
+    print(sentences)
+    assert len(sentences) == 9
+    assert sentences[0].startswith("Reliance Industries reported")
+
+
+def test_textrank_summary():
+    summary = textrank_summary(ARTICLE, max_words=60)
+    print(summary)
+    assert summary
+    assert len(summary.split()) <= 60
+    # Lead sentence carries the key facts
+    assert summary.startswith("Reliance Industries reported")
+    # Selected sentences keep their original order
+    positions = [ARTICLE.index(s) for s in split_sentences(summary)]
+    assert positions == sorted(positions)
+
+
+def test_textrank_summary_short_text():
+    assert textrank_summary("") == ""
+    assert textrank_summary("Markets closed flat.") == "Markets closed flat."
+
+
+
+if __name__ == "__main__":
+    test_split_sentences()
+    test_textrank_summary()
+    test_textrank_summary_short_text()
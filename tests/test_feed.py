@@ -0,0 +1,174 @@
+"""Test streaming RSS/Atom feed parsing."""
+
+from io import BytesIO
+from unittest.mock import patch
+
+from prazo.core.db import save_feed_states
+from prazo.utils.parser.feed import iter_feed_entries
+from prazo.utils.parser.parser_tools import FeedParserTool
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+  <channel>
+    <title>Business</title>
+    <item>
+      <title>Markets rally &amp; rupee gains</title>
+      <link>https://example.com/markets/rally</link>
+      <pubDate>Mon, 20 Oct 2025 09:30:00 GMT</pubDate>
+      <description><![CDATA[<p>Indian equities <b>rallied</b> on Monday.</p>]]></description>
+      <category>markets</category>
+    </item>
+    <item>
+      <title>No link item</title>
+    </item>
+  </channel>
+</rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Tech</title>
+  <entry>
+    <title>New model released</title>
+    <link rel="alternate" href="https://example.com/ai/model"/>
+    <link rel="self" href="https://example.com/ai/model.atom"/>
+    <published>2025-10-20T08:00:00Z</published>
+    <summary>A short summary.</summary>
+    <content type="html">&lt;p&gt;A much longer body of the article.&lt;/p&gt;</content>
+    <category term="ai"/>
+  </entry>
+</feed>"""
+
+
+def test_rss_entries():
+    entries = list(iter_feed_entries(BytesIO(RSS)))
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry.url == "https://example.com/markets/rally"
+    assert entry.title == "Markets rally & rupee gains"
+    assert entry.description == "Indian equities rallied on Monday."
+    assert entry.published_date.isoformat() == "2025-10-20T09:30:00+00:00"
+    assert entry.categories == ["markets"]
+
+
+def test_atom_entries():
+    entries = list(iter_feed_entries(BytesIO(ATOM)))
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry.url == "https://example.com/ai/model"
+    assert entry.description == "A much longer body of the article."
+    assert entry.published_date.isoformat() == "2025-10-20T08:00:00+00:00"
+    assert entry.categories == ["ai"]
+
+
+FEED_URL = "https://example.com/rss.xml"
+TWO_ITEMS = RSS.replace(
+    b"</channel>",
+    b"""<item>
+      <title>Second story</title>
+      <link>https://example.com/markets/second</link>
+    </item>
+  </channel>""",
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = BytesIO(body)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeServer:
+    """Serves `body` with an ETag, 304 to requests that send it back"""
+
+    def __init__(self, body):
+        self.body = body
+        self.conditional = []
+
+    def get(self, url, headers, **kwargs):
+        self.conditional.append("If-None-Match" in headers)
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeResponse(304)
+        return FakeResponse(200, self.body, {"ETag": '"v1"'})
+
+
+class FakeStateCollection:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    def update_one(self, query, update, upsert):
+        self.docs.setdefault(query["_id"], {}).update(update["$set"])
+
+
+def _poll(tool, server, states, stored_urls):
+    with (
+        patch("prazo.core.db.feed_state_collection", states),
+        patch("prazo.utils.parser.parser_tools.requests.get", server.get),
+        patch(
+            "prazo.core.db.check_urls_exist",
+            lambda urls: stored_urls & set(urls),
+        ),
+    ):
+        articles = tool.discover()
+        # What the crawl does once the news items are saved
+        save_feed_states(tool.feed_states)
+    return [article.url for article in articles]
+
+
+def test_feed_state_saved_after_entries():
+    server = FakeServer(TWO_ITEMS)
+    states = FakeStateCollection()
+    tool = FeedParserTool("feed", {"feed_url": FEED_URL})
+    urls = [
+        "https://example.com/markets/rally",
+        "https://example.com/markets/second",
+    ]
+
+    # Saving failed: the validators are not kept, the feed is read again
+    assert _poll(tool, server, states, stored_urls=set()) == urls
+    assert states.docs == {}
+    assert _poll(tool, server, states, stored_urls={urls[0]}) == urls
+    assert states.docs == {}
+    assert server.conditional == [False, False]
+
+    # Every entry saved: the next poll is conditional and gets a 304
+    assert _poll(tool, server, states, stored_urls=set(urls)) == urls
+    assert states.docs[FEED_URL]["etag"] == '"v1"'
+    assert _poll(tool, server, states, stored_urls=set(urls)) == []
+    assert server.conditional == [False, False, False, True]
+
+
+def test_feed_state_not_saved_when_capped():
+    server = FakeServer(TWO_ITEMS)
+    states = FakeStateCollection()
+    tool = FeedParserTool("feed", {"feed_url": FEED_URL, "max_articles": 1})
+    stored = {"https://example.com/markets/rally"}
+
+    # The entry left out by the cap is only read with a full GET
+    assert _poll(tool, server, states, stored) == [
+        "https://example.com/markets/rally"
+    ]
+    assert not tool.feed_states[0].complete
+    assert states.docs == {}
+
+
+if __name__ == "__main__":
+    test_rss_entries()
+    test_atom_entries()
+    test_feed_state_saved_after_entries()
+    test_feed_state_not_saved_when_capped()
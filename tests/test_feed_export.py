@@ -0,0 +1,100 @@
+"""Test the static feed snapshot pages, manifest and snapshot rotation."""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from prazo.core.feed_export import (
+    MANIFEST_NAME,
+    build_pages,
+    prune_snapshots,
+    topic_slug,
+    write_snapshot,
+)
+from prazo.utils.pagination import decode_cursor
+
+
+def _docs(n):
+    start = datetime(2025, 10, 22, 8)
+    return [
+        {
+            "_id": ObjectId(),
+            "title": f"Story {i}",
+            "published_date": start - timedelta(hours=i),
+            "created_at": start,
+        }
+        for i in range(n)
+    ]
+
+
+def _path(n):
+    return f"v/all/{n}.json"
+
+
+def test_topic_slug():
+    assert topic_slug("AI & Machine Learning") == "ai-machine-learning"
+    assert topic_slug("!!!") == "topic"
+    taken = set()
+    assert topic_slug("Space", taken) == "space"
+    assert topic_slug("space", taken) == "space-2"
+    assert taken == {"space", "space-2"}
+
+
+def test_build_pages():
+    # Two full pages plus the extra item telling that more remain
+    docs = _docs(5)
+    ids = [doc["_id"] for doc in docs]
+    pages = build_pages(docs, 12, page_size=2, pages=2, page_path=_path)
+    assert [page["count"] for page in pages] == [2, 2]
+    assert pages[0]["total"] == 12 and "total" not in pages[1]
+    assert pages[0]["next_page"] == "v/all/2.json"
+    assert pages[1]["next_page"] is None
+    # The API continues after the last exported item
+    assert pages[1]["has_more"]
+    assert decode_cursor(pages[1]["next_cursor"])[-1] == ids[3]
+    assert pages[0]["news_items"][0]["id"] == str(ids[0])
+
+    # Fewer items than the pages hold
+    pages = build_pages(_docs(3), 3, page_size=2, pages=3, page_path=_path)
+    assert [page["count"] for page in pages] == [2, 1]
+    assert not pages[1]["has_more"] and pages[1]["next_cursor"] is None
+
+    pages = build_pages([], 0, page_size=2, pages=3, page_path=_path)
+    assert len(pages) == 1 and pages[0]["news_items"] == []
+
+
+def test_write_snapshot():
+    with tempfile.TemporaryDirectory() as out_dir:
+        body = json.dumps({"news_items": ["summary"] * 200}).encode()
+        for version in [
+            "20251022T080000000000Z",
+            "20251022T090000000000Z",
+            "20251022T100000000000Z",
+        ]:
+            manifest = {"version": version}
+            write_snapshot(out_dir, version, {"all/1.json": body}, manifest)
+
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as f:
+            assert json.load(f)["version"] == "20251022T100000000000Z"
+        # The newest two snapshots are kept, nothing is left staged
+        assert sorted(os.listdir(out_dir)) == [
+            "20251022T090000000000Z",
+            "20251022T100000000000Z",
+            MANIFEST_NAME,
+        ]
+        page = os.path.join(out_dir, "20251022T100000000000Z", "all", "1.json")
+        with open(page + ".gz", "rb") as f:
+            assert gzip.decompress(f.read()) == body
+
+        prune_snapshots(out_dir, keep=1)
+        assert "20251022T090000000000Z" not in os.listdir(out_dir)
+
+
+if __name__ == "__main__":
+    test_topic_slug()
+    test_build_pages()
+    test_write_snapshot()
@@ -0,0 +1,107 @@
+"""Test pre-encoded response bodies, content negotiation and ETags."""
+
+import gzip
+from datetime import datetime, timedelta, timezone
+
+from prazo.utils.http_body import (
+    ENCODINGS,
+    conditional_response,
+    encode_body,
+    etag_matches,
+    negotiate_encoding,
+)
+
+
+def test_encode_body():
+    body = b'{"news_items": [' + b'"summary", ' * 500 + b"]}"
+    page = encode_body(body)
+
+    assert set(page.encoded) == set(ENCODINGS)
+    assert gzip.decompress(page.variant("gzip")) == body
+    assert len(page.variant("gzip")) < len(body) / 10
+    # Same content, same tag; codings are told apart
+    assert encode_body(body).etag == page.etag
+    assert page.variant_etag(None) == f'"{page.etag}"'
+    assert page.variant_etag("gzip") == f'"{page.etag}-gzip"'
+
+    # Small bodies are not compressed
+    assert encode_body(b"{}").encoded == {}
+
+
+def test_negotiate_encoding():
+    available = ["br", "gzip"]
+    assert negotiate_encoding("gzip, deflate, br", available) == "br"
+    assert negotiate_encoding("gzip, br;q=0.5", available) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip", available) == "gzip"
+    assert negotiate_encoding("*", ["gzip"]) == "gzip"
+    assert negotiate_encoding("identity", available) is None
+    assert negotiate_encoding(None, available) is None
+    assert negotiate_encoding("gzip", []) is None
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', "abc")
+    assert etag_matches('"abc-gzip"', "abc")
+    assert etag_matches('W/"abc-br"', "abc")
+    assert etag_matches('"old", "abc"', "abc")
+    assert etag_matches("*", "abc")
+    assert not etag_matches('"abd"', "abc")
+    assert not etag_matches(None, "abc")
+
+
+def test_conditional_response():
+    page = encode_body(b"[" + b"1, " * 1000 + b"1]", datetime(2025, 10, 22, 8))
+
+    status, headers, body = conditional_response(
+        page, {"Accept-Encoding": "gzip"}
+    )
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == page.body
+    assert headers["Last-Modified"] == "Wed, 22 Oct 2025 08:00:00 GMT"
+
+    status, _, body = conditional_response(
+        page, {"If-None-Match": headers["ETag"]}
+    )
+    assert status == 304 and body == b""
+    status, _, _ = conditional_response(
+        page, {"If-Modified-Since": headers["Last-Modified"]}
+    )
+    assert status == 304
+    # The ETag wins over the date
+    status, _, body = conditional_response(
+        page,
+        {
+            "If-None-Match": '"other"',
+            "If-Modified-Since": headers["Last-Modified"],
+        },
+    )
+    assert status == 200 and body == page.body
+
+
+def test_last_modified_timezone():
+    # A bump stamped on a host at UTC+05:30, read back aware or as pymongo
+    # returns it (naive UTC)
+    ist = timezone(timedelta(hours=5, minutes=30))
+    for updated_at in [
+        datetime(2025, 10, 22, 13, 30, tzinfo=ist),
+        datetime(2025, 10, 22, 8, 0, 0, 250000),
+    ]:
+        page = encode_body(b"[]", updated_at)
+        status, headers, _ = conditional_response(page, {})
+        assert headers["Last-Modified"] == "Wed, 22 Oct 2025 08:00:00 GMT"
+        status, _, _ = conditional_response(
+            page, {"If-Modified-Since": "Wed, 22 Oct 2025 08:00:00 GMT"}
+        )
+        assert status == 304
+        status, _, _ = conditional_response(
+            page, {"If-Modified-Since": "Wed, 22 Oct 2025 07:59:59 GMT"}
+        )
+        assert status == 200
+
+
+if __name__ == "__main__":
+    test_encode_body()
+    test_negotiate_encoding()
+    test_etag_matches()
+    test_conditional_response()
+    test_last_modified_timezone()
@@ -0,0 +1,125 @@
+"""Test index declarations and the feed query plans they enable."""
+
+from prazo.core.indexes import (
+    FEED_SORT,
+    INDEX_VERSION,
+    NEWS_INDEXES,
+    ensure_indexes,
+    feed_query,
+    plan_index_changes,
+)
+
+
+def existing_indexes(models):
+    return {
+        model.document["name"]: {"key": list(model.document["key"].items())}
+        for model in models
+    }
+
+
+def plan_stages(plan: dict) -> list:
+    """Stage names of an explain() plan, from the root down."""
+    stages = [plan.get("stage")]
+    for child_key in ("inputStage", "queryPlan"):
+        if child_key in plan:
+            stages += plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+def test_plan_index_changes():
+    # Fresh collection: everything is created
+    to_create, to_drop = plan_index_changes({"_id_": {}}, None)
+    assert len(to_create) == len(NEWS_INDEXES) and to_drop == []
+
+    # Up to date: nothing to do
+    existing = existing_indexes(NEWS_INDEXES)
+    assert plan_index_changes(existing, INDEX_VERSION) == ([], [])
+    # Text indexes are listed with the server's `_fts` / `_ftsx` key
+    existing["text_search"] = {"key": [("_fts", "text"), ("_ftsx", 1)]}
+    assert plan_index_changes(existing, INDEX_VERSION) == ([], [])
+
+    # Redefined index is rebuilt
+    existing["feed_sort"] = {"key": [("published_date", -1)]}
+    to_create, to_drop = plan_index_changes(existing, INDEX_VERSION)
+    assert [m.document["name"] for m in to_create] == ["feed_sort"]
+    assert to_drop == ["feed_sort"]
+
+
+FEED_QUERIES = [
+    ("all", None, None),
+    ("daily", None, None),
+    ("topics", None, None),
+    ("all", "AI", None),
+    ("daily", None, "Technology"),
+    ("topics", "AI", "Technology"),
+]
+
+
+def test_feed_query_hints_declared_indexes():
+    declared = {model.document["name"] for model in NEWS_INDEXES}
+    for args in FEED_QUERIES:
+        assert feed_query(*args).hint in declared
+
+
+def test_feed_query_filters():
+    query = feed_query("daily", group="Technology")
+    assert query.filter == {
+        "duplicate_of": None,
+        "tool_source": {"$in": ["daily_news"]},
+        "groups": "Technology",
+    }
+    assert query.hint == "groups_feed_sort"
+    # The topic index serves a feed filtered on both
+    query = feed_query(topic="AI", group="Technology")
+    assert query.filter["topic"] == "AI" and query.hint == "topic_feed_sort"
+
+
+def test_feed_queries_use_indexes():
+    """Needs MongoDB: no collection scan and no in-memory sort per page."""
+    from prazo.core.db import db, meta_collection
+
+    test_collection = db["test_indexes"]
+    test_collection.drop()
+    meta_collection.delete_one({"_id": "indexes"})
+    ensure_indexes(test_collection, meta_collection)
+    test_collection.insert_many(
+        [
+            {
+                "title": f"Story {i}",
+                "tool_source": ["daily_news"] if i % 2 else ["tavily"],
+                "topic": ["AI", "Robotics"] if i % 3 else ["Space"],
+                "groups": ["Technology"] if i % 5 else ["Science"],
+                "published_date": i,
+                "created_at": i,
+            }
+            for i in range(200)
+        ]
+    )
+
+    try:
+        for args in FEED_QUERIES:
+            query = feed_query(*args)
+            explain = (
+                test_collection.find(query.filter)
+                .sort(FEED_SORT)
+                .hint(query.hint)
+                .limit(20)
+                .explain()
+            )
+            stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+            assert "COLLSCAN" not in stages, (args, stages)
+            assert "SORT" not in stages, (args, stages)
+            print(f"✓ {args}: {' <- '.join(filter(None, stages))}")
+    finally:
+        test_collection.drop()
+        # Let the real collection re-apply its indexes on next start
+        meta_collection.delete_one({"_id": "indexes"})
+
+
+if __name__ == "__main__":
+    test_plan_index_changes()
+    test_feed_query_hints_declared_indexes()
+    test_feed_query_filters()
+    test_feed_queries_use_indexes()
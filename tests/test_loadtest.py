@@ -0,0 +1,72 @@
+"""Test the load test corpus generator and report."""
+
+from datetime import datetime
+
+from service.loadtest import (
+    Sample,
+    depth_bucket,
+    generate_stories,
+    latency_summary,
+    summarize,
+)
+
+
+def test_generate_stories():
+    end = datetime(2025, 10, 22)
+    stories = list(generate_stories(2000, duplicate_rate=0.2, end=end))
+    assert len(stories) == 2000
+    assert stories == list(generate_stories(2000, duplicate_rate=0.2, end=end))
+
+    by_id = {story["_id"]: story for story in stories}
+    duplicates = [story for story in stories if "duplicate_of" in story]
+    assert 300 < len(duplicates) < 500
+    for story in duplicates:
+        # Shares a source with an earlier, canonical story
+        original = by_id[story["duplicate_of"]]
+        assert "duplicate_of" not in original
+        assert original["created_at"] < story["created_at"]
+        assert original["sources"][0] in story["sources"]
+
+    # One document per story key, as the unique index requires
+    assert len({story["story_key"] for story in stories}) == len(stories)
+    assert max(story["created_at"] for story in stories) < end
+
+
+def test_latency_summary():
+    summary = latency_summary([i / 1000 for i in range(1, 101)], seconds=2)
+    assert summary["requests"] == 100 and summary["rps"] == 50
+    assert summary["p50_ms"] == 50.5 and summary["max_ms"] == 100
+    assert 95 <= summary["p95_ms"] < summary["p99_ms"] <= 100
+    assert latency_summary([], 1) == {"requests": 0}
+
+
+def test_summarize():
+    assert [depth_bucket(d) for d in (1, 2, 3, 4, 7, 8, 20)] == [
+        "1",
+        "2-3",
+        "2-3",
+        "4-7",
+        "4-7",
+        "8-15",
+        "16-31",
+    ]
+    samples = [
+        Sample("feed", 200, 0.01, "HIT"),
+        Sample("feed", 200, 0.02, "MISS"),
+        Sample("feed", 500, 0.03),
+        Sample("deep", 200, 0.01, "MISS", depth=1),
+        Sample("deep", 200, 0.02, "MISS", depth=2),
+        Sample("deep", 200, 0.04, "MISS", depth=3),
+    ]
+    report = summarize(samples, seconds=1)
+    assert report["total"]["requests"] == 6
+    assert report["feed"]["errors"] == 1
+    assert report["feed"]["cache_hit_ratio"] == 0.5
+    assert list(report["depth"]) == ["1", "2-3"]
+    assert report["depth"]["2-3"]["requests"] == 2
+
+
+if __name__ == "__main__":
+    test_generate_stories()
+    test_latency_summary()
+    test_summarize()
@@ -0,0 +1,89 @@
+"""Test the in-process metrics and their Prometheus text rendering."""
+
+from types import SimpleNamespace
+
+from prazo.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MongoMetrics,
+    Registry,
+    returned_documents,
+    start_request,
+)
+
+
+def test_render():
+    registry = Registry({"worker": "1"})
+    requests = registry.register(
+        Counter("api_requests_total", "Requests", ["route", "status"])
+    )
+    latency = registry.register(
+        Histogram("api_seconds", "Latency", ["route"], buckets=(0.1, 1))
+    )
+    requests.inc("/api/news", "200")
+    requests.inc("/api/news", "200")
+    requests.inc('/a"b', "500")
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, "/api/news")
+    entries = Gauge("cache_entries", "Entries in\nmemory")
+    entries.set(3)
+    registry.set_collector("cache", lambda: [entries])
+
+    lines = registry.render().decode().splitlines()
+    assert "# TYPE api_requests_total counter" in lines
+    assert (
+        'api_requests_total{worker="1",route="/api/news",status="200"} 2'
+        in lines
+    )
+    assert (
+        'api_requests_total{worker="1",route="/a\\"b",status="500"} 1' in lines
+    )
+    # Buckets are cumulative, a value on a bound falls in that bucket
+    assert (
+        'api_seconds_bucket{worker="1",route="/api/news",le="0.1"} 2' in lines
+    )
+    assert 'api_seconds_bucket{worker="1",route="/api/news",le="1"} 3' in lines
+    assert (
+        'api_seconds_bucket{worker="1",route="/api/news",le="+Inf"} 4' in lines
+    )
+    assert 'api_seconds_count{worker="1",route="/api/news"} 4' in lines
+    assert 'api_seconds_sum{worker="1",route="/api/news"} 3.65' in lines
+    assert "# HELP cache_entries Entries in\\nmemory" in lines
+    assert 'cache_entries{worker="1"} 3' in lines
+
+
+def test_mongo_metrics():
+    registry = Registry()
+    listener = MongoMetrics(registry, "api")
+    stats = start_request()
+
+    find = SimpleNamespace(
+        command_name="find",
+        duration_micros=2000,
+        reply={"cursor": {"firstBatch": [{}, {}, {}], "id": 0}},
+    )
+    count = SimpleNamespace(
+        command_name="count", duration_micros=1000, reply={"n": 42}
+    )
+    listener.succeeded(find)
+    listener.succeeded(count)
+    assert stats.db_queries == 2 and stats.documents_returned == 3
+    assert abs(stats.db_seconds - 0.003) < 1e-9
+
+    listener.connection_created(None)
+    listener.connection_checked_out(SimpleNamespace(duration=0.01))
+    text = registry.render().decode()
+    assert 'api_mongodb_pool_connections{state="open"} 1' in text
+    assert 'api_mongodb_pool_connections{state="in_use"} 1' in text
+    assert (
+        'api_mongodb_command_duration_seconds_count{command="find"} 1' in text
+    )
+
+    assert returned_documents({"cursor": {"nextBatch": [{}]}}) == 1
+    assert returned_documents({"ok": 1}) == 0
+
+
+if __name__ == "__main__":
+    test_render()
+    test_mongo_metrics()
@@ -0,0 +1,69 @@
+"""Test feed cursors for keyset pagination."""
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from prazo.utils.pagination import (
+    InvalidCursor,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    page_filter,
+)
+
+
+def test_cursor_round_trip():
+    doc = {
+        "_id": ObjectId(),
+        "published_date": datetime(2025, 10, 20, 9, 30),
+        "created_at": datetime(2025, 10, 20, 10, 0, 5, 123000),
+        "title": "Not part of the cursor",
+    }
+    cursor = encode_cursor(doc)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == [
+        doc["published_date"],
+        doc["created_at"],
+        doc["_id"],
+    ]
+
+    undated = dict(doc, published_date=None)
+    assert decode_cursor(encode_cursor(undated))[0] is None
+
+
+def test_invalid_cursor():
+    for token in ("garbage", "", encode_cursor({})[:-3]):
+        try:
+            decode_cursor(token)
+            assert False, f"{token!r} should be rejected"
+        except InvalidCursor:
+            pass
+
+
+def test_after_cursor():
+    published, created, _id = datetime(2025, 1, 2), datetime(2025, 1, 3), 7
+    branches = after_cursor([published, created, _id])["$or"]
+    assert {"published_date": {"$lt": published}} in branches
+    # Undated documents come after every dated one
+    assert {"published_date": None} in branches
+    assert {
+        "published_date": published,
+        "created_at": created,
+        "_id": {"$lt": _id},
+    } in branches
+
+    # From an undated document only undated ones follow
+    branches = after_cursor([None, created, _id])["$or"]
+    assert all(branch["published_date"] is None for branch in branches)
+
+    assert page_filter({"a": 1}, None) == {"a": 1}
+    assert page_filter({}, [published, created, _id]) == after_cursor(
+        [published, created, _id]
+    )
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_invalid_cursor()
+    test_after_cursor()
@@ -0,0 +1,136 @@
+"""Test the staged ingestion pipeline."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from prazo.schemas import NewsItem
+from prazo.schemas.article import Article
+from prazo.utils.parser.parser_tools import BaseParserTool
+from prazo.utils.parser.pipeline import Pipeline, Stage
+from prazo.utils.parser.source_config import SourceConfig
+from prazo.utils.parser.source_service import SourceService
+
+
+def test_pipeline_fan_out_batches_and_drops():
+    def expand(n):
+        return [n * 10 + i for i in range(3)]
+
+    def drop_odd(n):
+        return n if n % 2 == 0 else None
+
+    async def double_batch(batch):
+        await asyncio.sleep(0)
+        return [n * 2 for n in batch]
+
+    pipeline = Pipeline(
+        stages=[
+            Stage("expand", expand, workers=2),
+            Stage("drop_odd", drop_odd, workers=3, queue_size=2),
+            Stage("double", double_batch, batch_size=4, batch_timeout=0.05),
+        ]
+    )
+    results = pipeline.run(range(4))
+
+    expected = [2 * n for s in range(4) for n in expand(s) if n % 2 == 0]
+    assert sorted(results) == sorted(expected)
+
+    stats = {s["stage"]: s for s in pipeline.stats()}
+    print(stats)
+    assert stats["expand"]["items_in"] == 4
+    assert stats["expand"]["items_out"] == 12
+    assert stats["drop_odd"]["items_out"] == len(expected)
+    assert stats["double"]["items_in"] == len(expected)
+
+
+def test_pipeline_stage_workers_run_concurrently():
+    def slow(n):
+        time.sleep(0.1)
+        return n
+
+    pipeline = Pipeline(stages=[Stage("slow", slow, workers=5)])
+    started = time.perf_counter()
+    assert sorted(pipeline.run(range(5))) == list(range(5))
+    assert time.perf_counter() - started < 0.4
+
+
+def test_pipeline_failures_are_counted():
+    def fail_on_three(n):
+        if n == 3:
+            raise ValueError("boom")
+        return n
+
+    pipeline = Pipeline(stages=[Stage("fail", fail_on_three, workers=2)])
+    assert sorted(pipeline.run(range(5))) == [0, 1, 2, 4]
+    assert pipeline.stats()[0]["failed"] == 1
+
+
+LISTING = [f"https://example.com/story-{i}" for i in range(8)]
+STORED = {LISTING[0], LISTING[2], LISTING[5]}
+
+
+class ListingParserTool(BaseParserTool):
+    """A source listing `LISTING`, fetched without network access"""
+
+    def discover(self, **filter_kwargs):
+        return [
+            Article(url=url, content="", source=self.source) for url in LISTING
+        ]
+
+    def fetch(self, article):
+        article.content = f"Content of {article.url}"
+        return article
+
+    def to_news_item(self, article):
+        return NewsItem(title=article.url, summary=article.summary)
+
+
+class TaggingSummariser:
+    """Marks which articles got an LLM summary"""
+
+    async def asummarise(self, contents, mode, llm_top_k):
+        return [
+            "llm" if i < llm_top_k else "local" for i in range(len(contents))
+        ]
+
+    def summarise(self, contents, mode, llm_top_k):
+        return asyncio.run(self.asummarise(contents, mode, llm_top_k))
+
+
+async def _astored(urls):
+    return STORED & set(urls)
+
+
+def test_hybrid_top_k_same_in_pipeline_and_parse():
+    options = {"summariser": {"mode": "hybrid", "llm_top_k": 4}}
+    source_config = SourceConfig("stub", {"parser": "sitemap", **options})
+    source_config.parser_tool = ListingParserTool("stub", options)
+    summariser = TaggingSummariser()
+
+    with patch(
+        "prazo.utils.parser.parser_tools.check_urls_exist",
+        lambda urls: STORED & set(urls),
+    ):
+        source_config.parser_tool.summariser = summariser
+        serial = source_config.parser_tool.parse()
+    # Small batches split the source's articles across stage batches
+    service = SourceService(
+        source_config_map={"stub": source_config},
+        check_batch_size=2,
+        summarise_batch_size=2,
+    )
+    with patch("prazo.utils.parser.source_service.acheck_urls_exist", _astored):
+        pipelined = service.build_pipeline(summariser).run([source_config])
+
+    # Stored articles keep their place in the listing's top-k
+    expected = {LISTING[1]: "llm", LISTING[3]: "llm"}
+    expected.update((url, "local") for url in LISTING[4:] if url not in STORED)
+    assert {item.title: item.summary for item in serial} == expected
+    assert {item.title: item.summary for item in pipelined} == expected
+
+
+if __name__ == "__main__":
+    test_pipeline_fan_out_batches_and_drops()
+    test_pipeline_stage_workers_run_concurrently()
+    test_pipeline_failures_are_counted()
+    test_hybrid_top_k_same_in_pipeline_and_parse()
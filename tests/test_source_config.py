@@ -0,0 +1,105 @@
+"""Test loading the source registry from a sources.yaml file."""
+
+import os
+import tempfile
+from unittest.mock import patch
+
+from prazo.utils.parser.parser_tools import (
+    FeedParserTool,
+    NDTVProfitParserTool,
+    SitemapParserTool,
+)
+from prazo.utils.parser.source_config import load_source_configs
+from prazo.utils.summarisation import SummaryMode
+
+SOURCES = """
+ndtv_profit:
+  parser: ndtv_profit
+  name: NDTV Profit
+  sitemap_url: https://www.ndtvprofit.com/sitemap.xml
+  latest_sitemap: true
+  summariser:
+    mode: hybrid
+    llm_top_k: 10
+
+plain:
+  sitemap_url: https://example.com/sitemap.xml
+
+feed:
+  parser: feed
+  feed_url: https://example.com/rss.xml
+  summariser:
+    mode: extractive
+
+disabled:
+  enabled: false
+  parser: feed
+  feed_url: https://example.com/disabled.xml
+
+unknown_parser:
+  parser: scraper
+  sitemap_url: https://example.com/sitemap.xml
+
+bad_mode:
+  sitemap_url: https://example.com/sitemap.xml
+  summariser:
+    mode: abstractive
+
+bad_top_k:
+  sitemap_url: https://example.com/sitemap.xml
+  summariser:
+    mode: hybrid
+    llm_top_k: ten
+"""
+
+
+def _load(text: str):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sources.yaml")
+        with open(path, "w") as f:
+            f.write(text)
+        return load_source_configs(path)
+
+
+def test_load_source_configs():
+    with patch(
+        "prazo.utils.parser.parser_tools.get_latest_sitemap"
+    ) as get_latest_sitemap:
+        configs = _load(SOURCES)
+        # Nothing is fetched until the crawl resolves the sitemap
+        assert not get_latest_sitemap.called
+
+        # Disabled and invalid sources are left out, the others still load
+        assert list(configs) == ["ndtv_profit", "plain", "feed"]
+        tools = {name: c.parser_tool for name, c in configs.items()}
+        assert type(tools["ndtv_profit"]) is NDTVProfitParserTool
+        assert type(tools["plain"]) is SitemapParserTool
+        assert type(tools["feed"]) is FeedParserTool
+        assert tools["ndtv_profit"].name == "NDTV Profit"
+        assert tools["plain"].name == "plain"
+
+        get_latest_sitemap.return_value = "https://www.ndtvprofit.com/1.xml"
+        assert tools["ndtv_profit"].resolve_sitemap_url().endswith("/1.xml")
+        get_latest_sitemap.assert_called_once_with(
+            "https://www.ndtvprofit.com/sitemap.xml"
+        )
+
+    assert tools["ndtv_profit"].summariser_options() == {
+        "mode": SummaryMode.HYBRID,
+        "llm_top_k": 10,
+    }
+    assert tools["plain"].summariser_options() == {
+        "mode": SummaryMode.LLM,
+        "llm_top_k": 0,
+    }
+    assert tools["feed"].summariser_options()["mode"] == SummaryMode.EXTRACTIVE
+
+
+def test_load_empty_file():
+    assert _load("") == {}
+    assert _load("# nothing enabled\n") == {}
+
+
+if __name__ == "__main__":
+    test_load_source_configs()
+    test_load_empty_file()
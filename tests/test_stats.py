@@ -0,0 +1,176 @@
+"""Test the incremental stats counters."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from bson import ObjectId
+from fake_mongo import FakeDatabase
+
+from prazo.core import db
+from prazo.core.indexes import META_COLLECTION
+from prazo.core.stats import (
+    DAY,
+    STATS_COLLECTION,
+    TOTAL_ID,
+    counter_id,
+    counter_updates,
+    mark_deltas,
+    reconcile_stats,
+    save_deltas,
+    story_day,
+)
+from prazo.schemas import NewsItem
+
+
+def news_doc(**fields):
+    return {
+        "tool_source": ["tavily"],
+        "topic": ["AI"],
+        "published_date": datetime(2025, 10, 22, 8),
+        "created_at": datetime(2025, 10, 23, 9),
+    } | fields
+
+
+def test_story_day():
+    published = datetime(2025, 10, 22, 23, 59)
+    assert story_day(published, datetime(2025, 10, 23)) == "2025-10-22"
+    assert story_day(None, datetime(2025, 10, 23)) == "2025-10-23"
+    assert story_day(None, None) is None
+    # Feed dates keep their source offset, days are counted in UTC
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert story_day(datetime(2025, 10, 23, 2, tzinfo=ist), None) == (
+        "2025-10-22"
+    )
+
+
+def test_save_deltas():
+    stories = {
+        # New story saved from two items
+        "a": [news_doc(), news_doc(topic=["AI", "Robotics"], groups=["Tech"])],
+        # Known story found again by another tool
+        "b": [news_doc(tool_source=["arxiv"], topic=["AI"])],
+        # Inserted by a concurrent save, left to reconciliation
+        "c": [news_doc()],
+    }
+    existing = {
+        "b": {"story_key": "b", "tool_source": ["tavily"], "topic": ["AI"]}
+    }
+
+    deltas, new_stories = save_deltas(stories, existing, inserted={"a"})
+    assert new_stories == 1
+    assert dict(deltas) == {
+        ("tool_source", "tavily"): 1,
+        ("tool_source", "arxiv"): 1,
+        ("topic", "AI"): 1,
+        ("topic", "Robotics"): 1,
+        ("groups", "Tech"): 1,
+        ("day", "2025-10-22"): 1,
+    }
+
+    updates = {op._filter["_id"]: op._doc for op in counter_updates(deltas, 1)}
+    assert updates["topic:Robotics"] == {
+        "$inc": {"count": 1},
+        "$setOnInsert": {"dim": "topic", "value": "Robotics"},
+    }
+    assert updates[TOTAL_ID] == {"$inc": {"count": 1}}
+
+    # Saving known stories again changes nothing
+    deltas, new_stories = save_deltas(
+        {"b": [news_doc()]}, {"b": news_doc()}, inserted=set()
+    )
+    assert counter_updates(deltas, new_stories) == []
+
+
+def test_facets_count_canonical_stories():
+    duplicate = news_doc(story_key="d", duplicate_of="a", groups=["Tech"])
+    deltas, _ = save_deltas(
+        {"d": [news_doc(tool_source=["arxiv"], topic=["Robotics"])]},
+        {"d": duplicate},
+        inserted=set(),
+    )
+    # The duplicate is out of the facets, not out of the other stats
+    assert dict(deltas) == {("tool_source", "arxiv"): 1}
+
+    stories = [
+        news_doc(_id=1, duplicate_of=None, groups=["Tech"]),
+        news_doc(_id=2, duplicate_of="x", topic=["AI", "Robotics"]),
+        news_doc(_id=3, duplicate_of="x"),
+    ]
+    # 1 becomes a duplicate, 2 canonical, 3 a duplicate of another story
+    deltas = mark_deltas(stories, {1: "y", 2: None, 3: "y"})
+    assert dict(deltas) == {
+        ("topic", "AI"): 0,
+        ("groups", "Tech"): -1,
+        ("topic", "Robotics"): 1,
+    }
+
+
+def _counters(database: FakeDatabase) -> dict:
+    return {
+        doc["_id"]: doc["count"]
+        for doc in database[STATS_COLLECTION].docs
+        if doc.get("count")
+    }
+
+
+def test_saved_counters_match_reconciliation():
+    database = FakeDatabase()
+    news, counters = database["news"], database[STATS_COLLECTION]
+    news.docs = [
+        news_doc(
+            _id=ObjectId(f"{n:024x}"),
+            story_key=key,
+            title=key,
+            sources=[f"https://example.com/{key}"],
+            topic=[topic],
+            groups=["India"],
+            created_at=datetime(2025, 10, 20 + n),
+        )
+        for n, key, topic in [(1, "rates", "Economy"), (2, "bank", "Markets")]
+    ]
+    reconcile_stats(news, counters)
+
+    item = NewsItem(
+        title="Rates unchanged",
+        summary="Rates were left unchanged.",
+        # Links the two stored stories: the newer one becomes a duplicate
+        sources=["https://example.com/rates", "https://example.com/bank"],
+        topic=["Policy"],
+        groups=["India"],
+        tool_source=["daily_news"],
+        published_date=datetime(2025, 10, 22, 8),
+    )
+    # A feed story, dated with the source's offset
+    launch = NewsItem(
+        title="Launch delayed",
+        summary="The launch was delayed.",
+        sources=["https://example.com/launch"],
+        topic=["Space"],
+        tool_source=["feed"],
+        published_date=datetime(
+            2025, 10, 23, 2, tzinfo=timezone(timedelta(hours=5, minutes=30))
+        ),
+    )
+    with (
+        patch.object(db, "collection", news),
+        patch.object(db, "stats_collection", counters),
+        patch.object(db, "meta_collection", database[META_COLLECTION]),
+    ):
+        assert db.save_news_items([item, launch]) == 2
+    assert news.docs[1]["duplicate_of"] == "rates"
+
+    saved = _counters(database)
+    assert counter_id("topic", "Markets") not in saved
+    assert saved[counter_id("groups", "India")] == 1
+    assert saved[counter_id("tool_source", "tavily")] == 2
+    assert saved[counter_id(DAY, "2025-10-22")] == 3
+    # The counters kept by the save are the ones a recount finds
+    reconcile_stats(news, counters)
+    assert _counters(database) == saved
+
+
+if __name__ == "__main__":
+    test_story_day()
+    test_save_deltas()
+    test_facets_count_canonical_stories()
+    test_saved_counters_match_reconciliation()
@@ -0,0 +1,183 @@
+"""Test packed LLM summarisation, the token budget and summary modes."""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+from prazo.utils.summarisation import (
+    ArticleSummariser,
+    ArticleSummary,
+    PackedSummaries,
+    SummaryMode,
+    TokenBudget,
+)
+
+ARTICLE_ID = re.compile(r"Article (\d+) ")
+PACKED_ARTICLE = re.compile(
+    r"### ARTICLE (\d+)\n(.*?)(?=\n\n### ARTICLE|\Z)", re.S
+)
+
+
+def _article(n: int, sentences: int = 3) -> str:
+    return " ".join(
+        f"Article {n} reports on the markets, sentence number {i} of it."
+        for i in range(sentences)
+    )
+
+
+def _number(content: str) -> int:
+    return int(ARTICLE_ID.search(content).group(1))
+
+
+def _summary_of(content: str) -> str:
+    return f"summary of {_number(content)}"
+
+
+class StubLLM:
+    """
+    Stands in for the chat model: summarises by quoting the article number.
+
+    Args:
+        tokens: Tokens reported as used per call
+        fail: Article numbers whose call raises
+        drop: Article numbers left out of a packed reply
+    """
+
+    def __init__(self, tokens=100, fail=(), drop=()):
+        self.tokens = tokens
+        self.fail = set(fail)
+        self.drop = set(drop)
+        self.single_calls = 0
+        self.packed_calls = []
+
+    def _message(self, content=""):
+        return SimpleNamespace(
+            content=content, usage_metadata={"total_tokens": self.tokens}
+        )
+
+    async def ainvoke(self, prompt: str):
+        await asyncio.sleep(0)
+        self.single_calls += 1
+        if _number(prompt) in self.fail:
+            raise RuntimeError("provider error")
+        return self._message(f"SUMMARY: {_summary_of(prompt)}")
+
+    async def ainvoke_packed(self, prompt: str):
+        await asyncio.sleep(0)
+        pack = {int(i): text for i, text in PACKED_ARTICLE.findall(prompt)}
+        self.packed_calls.append(sorted(pack))
+        if any(_number(text) in self.fail for text in pack.values()):
+            raise RuntimeError("provider error")
+        # Out of order, short of dropped articles, plus an unknown id
+        summaries = [
+            ArticleSummary(id=idx, summary=f" {_summary_of(text)} ")
+            for idx, text in reversed(pack.items())
+            if _number(text) not in self.drop
+        ]
+        summaries.append(ArticleSummary(id=999, summary="not asked for"))
+        return {
+            "raw": self._message(),
+            "parsed": PackedSummaries(summaries=summaries),
+            "parsing_error": None,
+        }
+
+
+def _summariser(llm: StubLLM, **kwargs) -> ArticleSummariser:
+    kwargs = {"pack_size": 3, "pack_max_chars": 1000, **kwargs}
+    summariser = ArticleSummariser(**kwargs)
+    summariser.llm = llm
+    summariser.packed_llm = SimpleNamespace(ainvoke=llm.ainvoke_packed)
+    return summariser
+
+
+def test_token_budget():
+    budget = TokenBudget(1000)
+    assert budget.reserve(600) and not budget.reserve(500)
+    budget.settle(600, 200)
+    assert budget.used == 200 and not budget.exhausted
+    assert budget.reserve(800) and budget.exhausted
+    unlimited = TokenBudget()
+    assert unlimited.reserve(10**9) and not unlimited.exhausted
+
+
+def test_packed_results_map_to_articles():
+    llm = StubLLM(drop={4})
+    contents = [_article(n) for n in range(8)]
+    contents[2] = None  # Already summarised
+    contents[6] = _article(6, sentences=40)  # Too long to pack
+    summaries = _summariser(llm).summarise(contents)
+
+    # Packs of three short articles, the last short one is sent alone
+    assert llm.packed_calls == [[0, 1, 3], [4, 5, 7]]
+    assert llm.single_calls == 1
+    expected = [f"summary of {n}" for n in range(8)]
+    expected[2] = ""  # No content
+    expected[4] = ""  # Missing from its pack's reply
+    assert summaries == expected
+
+
+def test_failed_batch():
+    llm = StubLLM(fail={1})
+    contents = [_article(n) for n in range(5)]
+    summaries = _summariser(llm).summarise(contents)
+    # Only the articles packed with the failing one are left out
+    assert summaries == ["", "", "", "summary of 3", "summary of 4"]
+
+    summaries = _summariser(StubLLM(fail={1})).summarise(
+        contents, mode=SummaryMode.HYBRID, llm_top_k=5
+    )
+    # Hybrid falls back to an extractive summary of the article itself
+    assert all(
+        s.startswith(f"Article {n} ") for n, s in enumerate(summaries[:3])
+    )
+    assert summaries[3:] == ["summary of 3", "summary of 4"]
+
+
+def test_budget_exhaustion():
+    # Articles are reserved in order: the first pack fits, the next do not
+    contents = [_article(n) for n in range(9)]
+    summariser = _summariser(StubLLM(tokens=50), token_budget=1200)
+    summaries = summariser.summarise(contents)
+    assert summaries[:3] == ["summary of 0", "summary of 1", "summary of 2"]
+    assert summaries[3:] == [""] * 6
+    # The reservation was replaced by the reported usage
+    assert summariser.budget.used == 50
+
+    summariser = _summariser(StubLLM(), token_budget=1200)
+    summaries = summariser.summarise(contents, mode=SummaryMode.HYBRID)
+    # Nothing in the LLM top-k: every article is summarised locally
+    assert all(s.startswith(f"Article {n} ") for n, s in enumerate(summaries))
+    assert summariser.budget.used == 0
+
+
+def test_summary_modes():
+    contents = [_article(n) for n in range(4)] + [None]
+
+    llm = StubLLM()
+    summaries = _summariser(llm).summarise(
+        contents, mode=SummaryMode.EXTRACTIVE
+    )
+    assert llm.single_calls == 0 and llm.packed_calls == []
+    assert all(
+        s.startswith(f"Article {n} ") for n, s in enumerate(summaries[:4])
+    )
+    assert summaries[4] == ""
+
+    llm = StubLLM()
+    summaries = _summariser(llm).summarise(
+        contents, mode=SummaryMode.HYBRID, llm_top_k=2
+    )
+    # The first two articles by position go to the LLM, in one pack
+    assert llm.packed_calls == [[0, 1]]
+    assert summaries[:2] == ["summary of 0", "summary of 1"]
+    assert summaries[2].startswith("Article 2 ")
+    assert summaries[3].startswith("Article 3 ")
+    assert summaries[4] == ""
+
+
+if __name__ == "__main__":
+    test_token_budget()
+    test_packed_results_map_to_articles()
+    test_failed_batch()
+    test_budget_exhaustion()
+    test_summary_modes()
@@ -0,0 +1,82 @@
+"""Test search filters, pipeline and highlighted snippets."""
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from prazo.core.text_search import (
+    SEARCH_SORT_FIELDS,
+    highlight_snippet,
+    parse_date_bound,
+    search_filter,
+    search_pipeline,
+    search_terms,
+)
+from prazo.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_search_filter():
+    assert search_filter() == {"duplicate_of": None}
+    query_filter = search_filter(
+        "daily",
+        topic="AI",
+        since=parse_date_bound("2025-10-01"),
+        until=parse_date_bound("2025-10-22", end=True),
+    )
+    assert query_filter["tool_source"] == {"$in": ["daily_news"]}
+    assert query_filter["topic"] == "AI"
+    assert query_filter["published_date"] == {
+        "$gte": datetime(2025, 10, 1),
+        "$lte": datetime(2025, 10, 22, 23, 59, 59, 999999),
+    }
+
+
+def test_search_pipeline_pages_by_score():
+    result = {"_id": ObjectId(), "score": 3.25, "title": "GPU prices"}
+    cursor_key = decode_cursor(
+        encode_cursor(result, SEARCH_SORT_FIELDS), SEARCH_SORT_FIELDS
+    )
+    assert cursor_key == [3.25, result["_id"]]
+
+    pipeline = search_pipeline(
+        "gpu", {"duplicate_of": None}, {"title": 1}, cursor_key, 20
+    )
+    # $text must come first to use the text index
+    assert pipeline[0] == {
+        "$match": {"$text": {"$search": "gpu"}, "duplicate_of": None}
+    }
+    assert pipeline[1]["$project"]["score"] == {"$meta": "textScore"}
+    assert pipeline[2]["$match"]["$or"][0] == {"score": {"$lt": 3.25}}
+    assert pipeline[-2:] == [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": 21},
+    ]
+
+
+def test_highlight_snippet():
+    terms = search_terms('Nvidia "chip exports" -china')
+    assert terms == ["nvidia", "chip", "export"]
+
+    summary = (
+        "Shares rose on Monday. " * 10
+        + "Nvidia said chip exports <to partners> would resume."
+    )
+    snippet = highlight_snippet(summary, terms, max_words=12)
+    assert snippet.startswith("…") and not snippet.endswith("…")
+    assert (
+        "<mark>Nvidia</mark> said <mark>chip</mark> <mark>exports</mark>"
+        in (snippet)
+    )
+    # Summary text is escaped
+    assert "&lt;to" in snippet
+
+    # No match: the start of the summary
+    assert highlight_snippet("Markets closed flat.", ["gpu"]) == (
+        "Markets closed flat."
+    )
+
+
+if __name__ == "__main__":
+    test_search_filter()
+    test_search_pipeline_pages_by_score()
+    test_highlight_snippet()
@@ -0,0 +1,70 @@
+"""Test URL canonicalization and story keys."""
+
+from prazo.utils.urls import canonicalize_url, canonicalize_urls, story_key
+
+
+def test_generic_rules():
+    assert (
+        canonicalize_url("http://WWW.Example.com:80/a/b/?utm_source=x#top")
+        == "https://example.com/a/b"
+    )
+    assert (
+        canonicalize_url("https://m.example.com/a?b=2&a=1&fbclid=z")
+        == "https://example.com/a?a=1&b=2"
+    )
+    assert canonicalize_url("https://example.com:8443/a") == (
+        "https://example.com:8443/a"
+    )
+    assert canonicalize_url("mailto:someone@example.com") == (
+        "mailto:someone@example.com"
+    )
+
+
+def test_amp_paths():
+    canonical = "https://example.com/markets/story"
+    assert (
+        canonicalize_url("https://example.com/amp/markets/story") == canonical
+    )
+    assert (
+        canonicalize_url("https://example.com/markets/story/amp/") == canonical
+    )
+    assert (
+        canonicalize_url("https://amp.example.com/markets/story") == canonical
+    )
+    assert (
+        canonicalize_url("https://example.com/markets/story.amp.html")
+        == canonical + ".html"
+    )
+
+
+def test_domain_rules():
+    assert (
+        canonicalize_url("https://www.bbc.co.uk/news/business-1.amp?at_x=1")
+        == "https://bbc.com/news/business-1"
+    )
+    assert (
+        canonicalize_url("https://www.youtube.com/watch?v=abc&t=3")
+        == "https://youtube.com/watch?v=abc"
+    )
+    assert (
+        canonicalize_url("https://arxiv.org/pdf/2401.01234v2.pdf")
+        == "https://arxiv.org/abs/2401.01234"
+    )
+
+
+def test_story_key():
+    urls = [
+        "https://www.example.com/a/?utm_medium=rss",
+        "http://example.com/a",
+    ]
+    assert canonicalize_urls(urls) == ["https://example.com/a"]
+    assert story_key(urls[:1]) == story_key(urls[1:])
+    assert story_key([], "  Markets   Rally ") == story_key([], "markets rally")
+    assert story_key([]) is None
+
+
+if __name__ == "__main__":
+    test_generic_rules()
+    test_amp_paths()
+    test_domain_rules()
+    test_story_key()
@@ -0,0 +1,64 @@
+"""Test stored embeddings and the in-memory vector index."""
+
+import numpy as np
+from bson import ObjectId
+
+from prazo.core.vector_index import (
+    VectorIndex,
+    normalize,
+    pack_embedding,
+    top_k,
+    unpack_embedding,
+)
+
+
+def test_pack_embedding():
+    embedding = np.random.default_rng(0).normal(size=1536).tolist()
+    packed = pack_embedding(embedding)
+    # float16: 2 bytes per dimension
+    assert len(packed) == 3072
+    vector = unpack_embedding(packed)
+    assert abs(np.linalg.norm(vector) - 1) < 1e-3
+    assert vector @ normalize(np.array(embedding)) > 0.999
+    assert pack_embedding(None) is None
+
+
+def test_top_k():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+    assert top_k(scores, 3).tolist() == [1, 3, 2]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 4, 0]
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_vector_index_search():
+    rng = np.random.default_rng(1)
+    vectors = normalize(rng.normal(size=(3000, 64)).astype(np.float32))
+    keys = [ObjectId() for _ in vectors]
+    index = VectorIndex()
+    index.add_documents(
+        {"_id": key, "embedding": pack_embedding(vector)}
+        for key, vector in zip(keys, vectors)
+    )
+    # Stories without an embedding are skipped but still advance the
+    # refresh position
+    index.add_documents([{"_id": ObjectId()}])
+    assert len(index) == 3000 and index.last_id not in index.positions
+
+    # Batched queries, the story itself excluded
+    results = index.search(vectors[:2], 5, exclude={keys[0]})
+    assert len(results) == 2
+    assert keys[0] not in [key for key, _ in results[0]]
+    assert results[1][0][0] == keys[1] and results[1][0][1] > 0.99
+    exact = np.argsort(-(vectors @ vectors[1]))[:5]
+    assert [key for key, _ in results[1]] == [keys[i] for i in exact]
+
+    # Replacing an embedding keeps a single row
+    index.add([keys[2]], vectors[1:2])
+    assert len(index) == 3000
+    assert index.search(vectors[1], 2)[0][1][0] == keys[2]
+
+
+if __name__ == "__main__":
+    test_pack_embedding()
+    test_top_k()
+    test_vector_index_search()